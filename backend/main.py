@@ -13,7 +13,9 @@ try:
     load_dotenv()
 except ImportError:
     pass
-from src.utils import load_all_engines
+from src.utils import load_all_engines, load_engine_registry
+from src.runtime import THREAD_MODES, resolve_thread_settings, apply_thread_settings
+from src.encoders import ENCODER_BACKENDS
 from src.cli import run_cli_mode
 from src.api import run_api_mode
 
@@ -24,6 +26,7 @@ def test_auth_mode():
     import uvicorn
     from src.auth.database import init_db
     from src.auth.routes import auth_router, users_router
+    from src.auth.sessions import start_session_sweeper
     from src.admin import admin_router
     
     # Initialiser la base de données
@@ -48,6 +51,10 @@ def test_auth_mode():
     app.include_router(users_router)
     app.include_router(admin_router)
 
+    @app.on_event("startup")
+    async def start_sweeper():
+        start_session_sweeper()
+
     @app.get("/")
     async def root():
         return {
@@ -69,15 +76,48 @@ def test_auth_mode():
     ssl_keyfile = os.getenv("SSL_KEYFILE", "certs/backend.key")
     ssl_certfile = os.getenv("SSL_CERTFILE", "certs/backend.crt")
     
+    # Derrière un load balancer : adresse client lue dans X-Forwarded-For, uniquement
+    # si la connexion vient d'un proxy de confiance (limites par IP des recherches et connexions)
+    proxy_options = {
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    }
+    
     # Vérifier si les certificats SSL existent
     if os.path.exists(ssl_keyfile) and os.path.exists(ssl_certfile):
         print(f"🔒 Démarrage du serveur de test HTTPS sur {host}:{port}")
         print(f"📚 Documentation disponible sur https://{host}:{port}/docs")
-        uvicorn.run(app, host=host, port=port, ssl_keyfile=ssl_keyfile, ssl_certfile=ssl_certfile)
+        uvicorn.run(app, host=host, port=port, ssl_keyfile=ssl_keyfile, ssl_certfile=ssl_certfile, **proxy_options)
     else:
         print(f"⚠️  Certificats SSL non trouvés, démarrage en HTTP sur {host}:{port}")
         print(f"📚 Documentation disponible sur http://{host}:{port}/docs")
-        uvicorn.run(app, host=host, port=port)
+        uvicorn.run(app, host=host, port=port, **proxy_options)
+
+def sync_mode(sync_url, embeddings_dir):
+    """Synchronise les artefacts modifiés depuis l'API de téléchargement des embeddings"""
+    from src.artifact_sync import SyncError, sync_artifacts
+    
+    if not sync_url:
+        print("❌ URL du serveur d'embeddings manquante (--sync_url ou ARTIFACT_SERVER_URL)")
+        raise SystemExit(1)
+    
+    print(f"🔄 Synchronisation depuis {sync_url} vers {embeddings_dir}")
+    try:
+        report = sync_artifacts(sync_url, embeddings_dir)
+    except SyncError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    
+    for lang, result in report.items():
+        if result.get("error"):
+            print(f"   ❌ {lang}: {result['error']}")
+        elif result["changed"]:
+            print(f"   ✅ {lang}: version {result['version']} - {result['downloaded_files']} fichier(s) téléchargé(s) "
+                  f"({result['downloaded_bytes'] / 1024 / 1024:.1f} Mo), {result['reused_files']} repris")
+        else:
+            print(f"   ✓ {lang}: version {result['version']} déjà à jour")
+    if any(result.get("error") for result in report.values()):
+        raise SystemExit(1)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -85,18 +125,64 @@ def main():
     )
     parser.add_argument("--embeddings_dir", type=str, default="embeddings", help="Répertoire contenant les embeddings calculés")
     parser.add_argument("--top_k", type=int, default=5, help="Nombre de résultats à retourner")
-    parser.add_argument("--mode", choices=["cli", "api", "test-auth"], default="cli", help="Mode d'exécution : 'cli', 'api' ou 'test-auth'")
+    parser.add_argument("--mode", choices=["cli", "api", "test-auth", "sync"], default="cli", help="Mode d'exécution : 'cli', 'api', 'test-auth' ou 'sync' (synchronisation des artefacts)")
     parser.add_argument("--rerank", action="store_true", help="Activer le re-ranking avec un cross-encoder")
     parser.add_argument("--year_weighted", action="store_true", help="Activer le scoring pondéré par l'année")
     parser.add_argument("--embedding_model", type=str, default="paraphrase-multilingual-MiniLM-L12-v2", help="Nom du modèle d'embedding")
     parser.add_argument("--crossencoder_model", type=str, default="cross-encoder/ms-marco-MiniLM-L-12-v2", help="Nom du modèle de cross-encoder pour le re-ranking")
     parser.add_argument("--batch_size", type=int, default=64, help="Taille des batchs pour la vectorisation")
+    parser.add_argument("--encoder_backend", choices=ENCODER_BACKENDS, default=os.getenv("ENCODER_BACKEND", "torch"), help="Backend d'encodage des requêtes : 'torch' ou 'onnx' (ONNX Runtime)")
+    parser.add_argument("--onnx_dir", type=str, default=os.getenv("ONNX_MODEL_DIR"), help="Répertoire de l'export ONNX (exporté au premier lancement si absent)")
+    parser.add_argument("--onnx_quantize", action="store_true", help="Utiliser le modèle ONNX quantifié dynamiquement en int8")
+    parser.add_argument("--parity_tolerance", type=float, default=0.02, help="Dérive cosinus maximale admise entre l'encodeur ONNX et PyTorch")
+    parser.add_argument("--max_seq_length", type=int, default=int(os.getenv("QUERY_MAX_SEQ_LENGTH", "0")) or None, help="Longueur maximale des requêtes en tokens (troncature, défaut : valeur du modèle)")
+    parser.add_argument("--tokenize_cache_size", type=int, default=int(os.getenv("TOKENIZE_CACHE_SIZE", "1024")), help="Nombre de requêtes tokenisées conservées en cache (0 pour désactiver)")
+    parser.add_argument("--index_type", choices=["auto", "flat", "ivf", "ivfpq", "hnsw"], default=os.getenv("INDEX_TYPE", "auto"), help="Type d'index FAISS à charger ('auto' : type retenu lors du calcul des embeddings)")
+    parser.add_argument("--verify_checksums", action="store_true", default=os.getenv("VERIFY_BUNDLE_CHECKSUMS", "").lower() in ("1", "true", "yes"), help="Vérifier le SHA-256 de chaque fichier des bundles au chargement (sinon existence et taille uniquement)")
+    parser.add_argument("--rescore_factor", type=int, default=int(os.getenv("RESCORE_FACTOR", "4")), help="Candidats récupérés par résultat pour le re-scoring exact depuis embeddings.npy (index approchés et diversification, 1 pour désactiver)")
+    parser.add_argument("--memory_budget_mb", type=float, default=float(os.getenv("ENGINE_MEMORY_BUDGET_MB", "0")) or None, help="Budget mémoire total des moteurs chargés (Mo), éviction LRU au-delà")
+    parser.add_argument("--thread_mode", choices=THREAD_MODES, default=None, help="Répartition des threads : 'latency' (nombreuses petites requêtes) ou 'throughput' (gros batchs), variable THREAD_MODE")
+    parser.add_argument("--torch_threads", type=int, default=None, help="Threads intra-op de torch (variable TORCH_NUM_THREADS)")
+    parser.add_argument("--faiss_threads", type=int, default=None, help="Threads OpenMP de FAISS (variable FAISS_NUM_THREADS)")
+    parser.add_argument("--executor_workers", type=int, default=None, help="Taille de l'exécuteur de recherche (variable SEARCH_EXECUTOR_WORKERS)")
+    parser.add_argument("--sync_url", type=str, default=os.getenv("ARTIFACT_SERVER_URL"), help="URL de l'API de téléchargement des embeddings pour la synchronisation différentielle (mode 'sync' et POST /admin/sync)")
+    parser.add_argument("--no_warmup", action="store_true", help="Désactiver le préchauffage des moteurs au démarrage de l'API")
     args = parser.parse_args()
 
     if args.mode == "test-auth":
         test_auth_mode()
         return
 
+    if args.mode == "sync":
+        sync_mode(args.sync_url, args.embeddings_dir)
+        return
+
+    thread_settings = apply_thread_settings(resolve_thread_settings(
+        args.thread_mode,
+        torch_threads=args.torch_threads,
+        faiss_threads=args.faiss_threads,
+        executor_workers=args.executor_workers
+    ))
+
+    if args.mode == "api":
+        registry = load_engine_registry(
+            args.embeddings_dir,
+            memory_budget_mb=args.memory_budget_mb,
+            index_type=args.index_type,
+            model_name=args.embedding_model,
+            encoder_backend=args.encoder_backend,
+            onnx_dir=args.onnx_dir,
+            onnx_quantize=args.onnx_quantize,
+            parity_tolerance=args.parity_tolerance,
+            max_seq_length=args.max_seq_length,
+            tokenize_cache_size=args.tokenize_cache_size,
+            verify_checksums=args.verify_checksums,
+            rescore_factor=args.rescore_factor
+        )
+        run_api_mode(registry, args.top_k, args.year_weighted, warmup=not args.no_warmup,
+                     thread_settings=thread_settings, sync_url=args.sync_url)
+        return
+
     engines = load_all_engines(
         args.embeddings_dir,
         args.embedding_model,
@@ -104,10 +190,7 @@ def main():
         batch_size=args.batch_size
     )
 
-    if args.mode == "cli":
-        run_cli_mode(engines, args.top_k, args.year_weighted)
-    else:
-        run_api_mode(engines, args.top_k, args.year_weighted)
+    run_cli_mode(engines, args.top_k, args.year_weighted)
 
 if __name__ == "__main__":
     main()
@@ -16,6 +16,7 @@ from .auth.models import User, SearchLog
 from .auth.dependencies import get_current_admin
 from .auth.schemas import UserCreate, UserUpdate, User as UserSchema
 from .auth.crud import UserCRUD, SearchLogCRUD
+from .auth.security import hash_password_async
 
 # Import des templates depuis api.py
 from fastapi.templating import Jinja2Templates
@@ -962,7 +963,9 @@ async def create_user_admin(
             detail=str(e)
         )
     
-    user = UserCRUD.create_user(db, user_data)
+    # Hash bcrypt calculé hors de la boucle d'événements
+    password_hash = await hash_password_async(password)
+    user = UserCRUD.create_user(db, user_data, password_hash=password_hash)
     
     # Assigner les rôles
     for role_id in role_ids:
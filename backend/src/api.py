@@ -3,12 +3,14 @@
 
 import os
 import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from fastapi import FastAPI, Request, Depends, HTTPException, status
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 # Note: Imports HTML retirés - interface d'administration séparée
-from sqlalchemy.orm import Session
 import uvicorn
 from dotenv import load_dotenv
 
@@ -16,12 +18,17 @@ from dotenv import load_dotenv
 os.environ['KMP_DUPLICATE_LIB_OK'] = 'TRUE'
 
 from src.utils import detect_language
-from src.auth.database import get_db, init_db
-from src.auth.models import User, SearchLog
+from src.engine_registry import DEFAULT_CORPUS, is_corpus_allowed
+from src.runtime import resolve_thread_settings, init_search_thread, faiss_thread_count
+from src.artifact_sync import SyncError, SyncInProgress, sync_artifacts
+from src.rate_limit import create_usage_limiter
+from src.search_log_writer import SearchLogWriter
+from starlette.concurrency import run_in_threadpool
+from src.auth.database import ASYNC_DB, get_auth_db, init_db
 from src.auth.dependencies import get_current_user, get_current_admin, get_current_admin_session, get_optional_user
 from src.auth.routes import auth_router, users_router
-from src.auth.crud import SearchLogCRUD
-from src.auth.schemas import SearchLogCreate
+from src.auth.sessions import start_session_sweeper
+from src.auth.crud import SearchLogCRUD, UserCRUD
 # Note: Import admin_router retiré - interface d'administration séparée
 
 # Charger les variables d'environnement
@@ -29,16 +36,112 @@ load_dotenv()
 
 # Note: Configuration templates retirée - interface d'administration séparée
 
-def run_api_mode(engines, top_k, year_weighted):
+def run_api_mode(registry, top_k, year_weighted, warmup=True, thread_settings=None, sync_url=None):
     """
     Lance l'API FastAPI pour servir les recherches avec authentification.
+    
+    Les moteurs sont servis par un EngineRegistry indexé par (corpus, langue).
+    Si warmup est activé, /ready ne répond 200 qu'une fois les moteurs préchauffés.
+    Les recherches s'exécutent dans un exécuteur dimensionné par thread_settings.
+    Si sync_url est défini, POST /admin/sync synchronise les artefacts depuis l'API
+    de téléchargement et recharge les moteurs modifiés.
     """
     # Initialiser la base de données
     init_db()
     
-    # Créer un loader pour les recherches
-    from .embedding_loader import EmbeddingLoader
-    loader = EmbeddingLoader()
+    # Le loader du registre porte le modèle d'encodage des requêtes
+    loader = registry.loader
+    
+    # Exécuteur dédié aux recherches (encodage + FAISS hors de la boucle d'événements)
+    thread_settings = dict(thread_settings or resolve_thread_settings())
+    search_executor = ThreadPoolExecutor(
+        max_workers=thread_settings["executor_workers"],
+        thread_name_prefix="search",
+        initializer=init_search_thread,
+        initargs=(thread_settings["faiss_threads"],)
+    )
+    
+    # Débit et quotas des recherches, par utilisateur ou par adresse IP
+    usage_limiter = create_usage_limiter()
+    
+    # Logs de recherche insérés par lots, hors du chemin des requêtes
+    search_log_writer = SearchLogWriter(
+        max_queue=int(os.getenv("SEARCH_LOG_QUEUE_SIZE", "10000")),
+        batch_size=int(os.getenv("SEARCH_LOG_BATCH_SIZE", "200")),
+        flush_interval_ms=float(os.getenv("SEARCH_LOG_FLUSH_MS", "500")),
+        sample_rate=float(os.getenv("SEARCH_LOG_SAMPLE_RATE", "0.1"))
+    )
+    
+    def run_search(corpus, query, top_k_req, quality="full", diversity=0.0):
+        """
+        Détecte la langue, récupère le moteur du corpus et effectue la recherche
+        
+        Returns:
+            tuple: (langue, résultats ou None si aucun moteur, diversité effectivement appliquée)
+        """
+        lang, engine = registry.resolve(corpus, detect_language(query))
+        if not engine:
+            return lang, None, 0.0
+        results = loader.search(engine, query, top_k=top_k_req, year_weighted=year_weighted,
+                                quality=quality, diversity=diversity)
+        return lang, results, loader.applied_diversity(engine, diversity, quality)
+    
+    def run_similar(corpus, language, row_id, top_k_req, diversity=0.0):
+        """
+        Récupère le moteur (chargement éventuel) puis cherche les questions proches d'une question
+        
+        Returns:
+            tuple: (résultats ou None si aucun moteur, diversité effectivement appliquée)
+        """
+        engine = registry.get(corpus, language)
+        if not engine:
+            return None, 0.0
+        results = loader.similar_by_id(engine, row_id, top_k_req, diversity)
+        return results, loader.applied_diversity(engine, diversity)
+    
+    async def run_db(sync_call, async_call, db, *args):
+        """Exécute une requête via la session asynchrone (ASYNC_DB) ou dans le pool de threads"""
+        if ASYNC_DB:
+            return await async_call(db, *args)
+        return await run_in_threadpool(sync_call, db, *args)
+    
+    def enforce_rate_limit(request, user_info):
+        """Applique le débit et le quota journalier du client (utilisateur, sinon adresse IP)"""
+        if user_info:
+            key, category = f"user:{user_info['user_id']}", "user"
+        else:
+            key, category = f"ip:{request.client.host if request.client else 'unknown'}", "ip"
+        allowed, retry_after, reason = usage_limiter.check(key, category)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Quota journalier de recherches atteint" if reason == "quota"
+                else "Trop de recherches, réessayez dans quelques instants",
+                headers={"Retry-After": str(int(retry_after) + 1)}
+            )
+    
+    def parse_text_param(data, name, default=None):
+        """Lit un paramètre texte du corps JSON (corpus, langue) : 400 si ce n'est pas une chaîne"""
+        value = data.get(name, default)
+        if value is not None and not isinstance(value, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Le paramètre {name} doit être une chaîne de caractères"
+            )
+        return value
+    
+    def parse_diversity(data):
+        """Lit le poids de diversification MMR (0 = aucune, 1 = maximale)"""
+        try:
+            diversity = float(data.get("diversity", 0.0))
+        except (TypeError, ValueError):
+            diversity = -1.0
+        if not 0.0 <= diversity <= 1.0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Le paramètre diversity doit être compris entre 0 et 1"
+            )
+        return diversity
     
     app = FastAPI(
         title="Moteur de recherche sémantique",
@@ -46,15 +149,15 @@ def run_api_mode(engines, top_k, year_weighted):
         version="3.0.0"
     )
 
-                                    app.add_middleware(
-                    CORSMiddleware,
-                    allow_origins=[
-                        "https://lesphinx.mindpath-dev.fr",
-                        "http://lesphinx.mindpath-dev.fr",
-                        "https://api.lesphinx.mindpath-dev.fr",
-                        "http://api.lesphinx.mindpath-dev.fr",
-                        "https://module.mindpath-dev.fr",
-                        "http://module.mindpath-dev.fr",
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "https://lesphinx.mindpath-dev.fr",
+            "http://lesphinx.mindpath-dev.fr",
+            "https://api.lesphinx.mindpath-dev.fr",
+            "http://api.lesphinx.mindpath-dev.fr",
+            "https://module.mindpath-dev.fr",
+            "http://module.mindpath-dev.fr",
             "http://localhost:8000",
             "http://127.0.0.1:8000",
             "http://164.132.58.187",
@@ -72,6 +175,70 @@ def run_api_mode(engines, top_k, year_weighted):
 
 
 
+    # État de préparation exposé sur /ready (gating du load balancer)
+    readiness = {
+        "ready": not warmup,
+        "warmup_seconds": None,
+        "warmup_details": {}
+    }
+
+    def run_warmup():
+        """Préchauffe les moteurs puis déclare le serveur prêt (uniquement si le préchauffage réussit)"""
+        print("🔥 Préchauffage des moteurs...")
+        start = time.time()
+        try:
+            readiness["warmup_details"] = registry.warmup()
+        except Exception as e:
+            # Moteurs froids ou défaillants : /ready reste à 503
+            readiness["warmup_seconds"] = round(time.time() - start, 3)
+            readiness["warmup_details"] = {"error": str(e)}
+            print(f"❌ Erreur lors du préchauffage : {e}, serveur non prêt")
+            return
+        readiness["warmup_seconds"] = round(time.time() - start, 3)
+        readiness["ready"] = True
+        print(f"✅ Préchauffage terminé en {readiness['warmup_seconds']:.2f}s, serveur prêt")
+
+    @app.on_event("startup")
+    async def start_warmup():
+        """Lance le préchauffage en tâche de fond pour que /health réponde pendant ce temps"""
+        if warmup:
+            asyncio.get_event_loop().run_in_executor(None, run_warmup)
+
+    @app.on_event("startup")
+    async def read_search_threads():
+        """Relève les threads FAISS effectifs depuis un thread de l'exécuteur de recherche"""
+        thread_settings["faiss_threads"] = await asyncio.get_event_loop().run_in_executor(
+            search_executor, faiss_thread_count
+        )
+
+    @app.on_event("startup")
+    async def start_sweeper():
+        """Lance la purge des sessions d'administration expirées"""
+        start_session_sweeper()
+
+    @app.on_event("startup")
+    async def start_usage_persistence():
+        """Sauvegarde périodique des compteurs de quotas"""
+        asyncio.ensure_future(usage_limiter.run_persistence(float(os.getenv("USAGE_PERSIST_INTERVAL", "30"))))
+
+    @app.on_event("startup")
+    async def start_search_log_writer():
+        """Lance l'écriture groupée des logs de recherche"""
+        search_log_writer.start()
+
+    @app.on_event("shutdown")
+    async def flush_search_logs():
+        """Insère les logs de recherche encore en file avant l'arrêt"""
+        await search_log_writer.stop()
+
+    @app.on_event("shutdown")
+    async def save_usage():
+        """Sauvegarde les compteurs de quotas à l'arrêt"""
+        try:
+            usage_limiter.save()
+        except Exception as e:
+            print(f"⚠️  Erreur lors de la sauvegarde des quotas : {e}")
+
     # Inclure les routeurs d'authentification et API
     app.include_router(auth_router)
     app.include_router(users_router)
@@ -85,6 +252,7 @@ def run_api_mode(engines, top_k, year_weighted):
             "version": "3.0.0",
             "endpoints": {
                 "search": "/search",
+                "similar": "/similar",
                 "auth": "/auth",
                 "users": "/users",
                 "docs": "/docs"
@@ -96,8 +264,7 @@ def run_api_mode(engines, top_k, year_weighted):
     @app.post("/search")
     async def search_endpoint(
         request: Request,
-        current_user: dict = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: dict = Depends(get_current_user)
     ):
         """
         Recherche sémantique (authentification requise)
@@ -109,36 +276,50 @@ def run_api_mode(engines, top_k, year_weighted):
         if not query:
             return {"error": "Aucune question fournie."}
         
-        # Permet de spécifier top_k dans la requête
+        # Permet de spécifier top_k et le corpus dans la requête
         top_k_req = data.get("top_k", top_k)
-        lang = detect_language(query)
-        engine = engines.get(lang, engines.get("en"))
+        corpus = parse_text_param(data, "corpus", DEFAULT_CORPUS)
+        if not is_corpus_allowed(current_user, corpus):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Accès non autorisé au corpus {corpus}"
+            )
         
-        if not engine:
-            return {"error": f"Aucun moteur disponible pour la langue {lang}"}
+        # quality=fast : tier statique (prévisualisation), quality=full : modèle complet
+        quality = data.get("quality", "full")
+        if quality not in ("fast", "full"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Le paramètre quality doit valoir 'fast' ou 'full'"
+            )
+        
+        diversity = parse_diversity(data)
+        
+        # Quota décompté une fois la requête validée
+        enforce_rate_limit(request, current_user)
+        
+        lang, results, applied_diversity = await asyncio.get_event_loop().run_in_executor(
+            search_executor, run_search, corpus, query, top_k_req, quality, diversity
+        )
         
-        results = loader.search(engine, query, top_k=top_k_req, year_weighted=year_weighted)
+        if results is None:
+            return {"error": f"Aucun moteur disponible pour la langue {lang} (corpus {corpus})"}
         
         # Calculer le temps de réponse
         response_time = int((time.time() - start_time) * 1000)  # en millisecondes
         
-        # Logger la recherche
-        try:
-            log_data = SearchLogCreate(
-                query=query,
-                language=lang,
-                results_count=len(results),
-                response_time=response_time
-            )
-            SearchLogCRUD.create_search_log(db, current_user["user_id"], log_data)
-        except Exception as e:
-            print(f"Erreur lors du logging de la recherche : {e}")
+        # Logger la recherche (insertion différée, par lots)
+        search_log_writer.submit(current_user["user_id"], query, lang, len(results), response_time)
         
         return jsonable_encoder({
             "results": results,
             "metadata": {
                 "query": query,
                 "language": lang,
+                "corpus": corpus,
+                "quality": quality,
+                "diversity": applied_diversity,
+                "diversity_requested": diversity,
                 "results_count": len(results),
                 "response_time_ms": response_time,
                 "user_id": current_user["user_id"]
@@ -148,8 +329,7 @@ def run_api_mode(engines, top_k, year_weighted):
     @app.post("/search/public")
     async def search_public_endpoint(
         request: Request,
-        current_user: Optional[dict] = Depends(get_optional_user),
-        db: Session = Depends(get_db)
+        current_user: Optional[dict] = Depends(get_optional_user)
     ):
         """
         Recherche sémantique publique (authentification optionnelle)
@@ -161,62 +341,218 @@ def run_api_mode(engines, top_k, year_weighted):
         if not query:
             return {"error": "Aucune question fournie."}
         
-        # Permet de spécifier top_k dans la requête
+        # Permet de spécifier top_k et le corpus dans la requête
         top_k_req = data.get("top_k", top_k)
-        lang = detect_language(query)
-        engine = engines.get(lang, engines.get("en"))
+        corpus = parse_text_param(data, "corpus", DEFAULT_CORPUS)
+        if not is_corpus_allowed(current_user, corpus):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Accès non autorisé au corpus {corpus}"
+            )
         
-        if not engine:
-            return {"error": f"Aucun moteur disponible pour la langue {lang}"}
+        # quality=fast : tier statique (prévisualisation), quality=full : modèle complet
+        quality = data.get("quality", "full")
+        if quality not in ("fast", "full"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Le paramètre quality doit valoir 'fast' ou 'full'"
+            )
         
-        results = loader.search(engine, query, top_k=top_k_req, year_weighted=year_weighted)
+        diversity = parse_diversity(data)
+        
+        # Quota décompté une fois la requête validée
+        enforce_rate_limit(request, current_user)
+        
+        lang, results, applied_diversity = await asyncio.get_event_loop().run_in_executor(
+            search_executor, run_search, corpus, query, top_k_req, quality, diversity
+        )
+        
+        if results is None:
+            return {"error": f"Aucun moteur disponible pour la langue {lang} (corpus {corpus})"}
         
         # Calculer le temps de réponse
         response_time = int((time.time() - start_time) * 1000)  # en millisecondes
         
-        # Logger la recherche (avec ou sans utilisateur)
-        try:
-            log_data = SearchLogCreate(
-                query=query,
-                language=lang,
-                results_count=len(results),
-                response_time=response_time
-            )
-            user_id = current_user["user_id"] if current_user else None
-            SearchLogCRUD.create_search_log(db, user_id, log_data)
-        except Exception as e:
-            print(f"Erreur lors du logging de la recherche : {e}")
+        # Logger la recherche (avec ou sans utilisateur, insertion différée par lots)
+        user_id = current_user["user_id"] if current_user else None
+        search_log_writer.submit(user_id, query, lang, len(results), response_time)
         
         return jsonable_encoder({
             "results": results,
             "metadata": {
                 "query": query,
                 "language": lang,
+                "corpus": corpus,
+                "quality": quality,
+                "diversity": applied_diversity,
+                "diversity_requested": diversity,
                 "results_count": len(results),
                 "response_time_ms": response_time,
                 "authenticated": current_user is not None
             }
         })
 
+    @app.post("/similar")
+    async def similar_endpoint(
+        request: Request,
+        current_user: dict = Depends(get_current_user)
+    ):
+        """
+        Questions les plus proches d'une question du corpus (champ "id" des résultats de recherche)
+        """
+        start_time = time.time()
+        
+        data = await request.json()
+        corpus = parse_text_param(data, "corpus", DEFAULT_CORPUS)
+        language = parse_text_param(data, "language")
+        if not is_corpus_allowed(current_user, corpus):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Accès non autorisé au corpus {corpus}"
+            )
+        try:
+            row_id = int(data["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Le paramètre id (entier) est requis"
+            )
+        top_k_req = data.get("top_k", top_k)
+        diversity = parse_diversity(data)
+        
+        # Chargement du moteur (cache manquant) et recherche hors de la boucle d'événements
+        try:
+            results, applied_diversity = await asyncio.get_event_loop().run_in_executor(
+                search_executor, run_similar, corpus, language, row_id, top_k_req, diversity
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if results is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Aucun moteur disponible pour la langue {language} (corpus {corpus})"
+            )
+        
+        return jsonable_encoder({
+            "results": results,
+            "metadata": {
+                "id": row_id,
+                "language": language,
+                "corpus": corpus,
+                "diversity": applied_diversity,
+                "diversity_requested": diversity,
+                "results_count": len(results),
+                "response_time_ms": int((time.time() - start_time) * 1000)
+            }
+        })
+
     @app.get("/health")
     async def health_check():
         """Vérification de l'état de l'API"""
+        engines = registry.engines()
         return {
-            "status": "healthy",
+            "status": "healthy" if readiness["ready"] else (
+                "warmup_failed" if "error" in readiness["warmup_details"] else "warming_up"
+            ),
+            "ready": readiness["ready"],
+            "warmup_seconds": readiness["warmup_seconds"],
             "timestamp": time.time(),
             "engines_loaded": len(engines),
-            "available_languages": list(engines.keys())
+            "available_languages": list(engines.keys()),
+            "threads": thread_settings
+        }
+
+    @app.get("/ready")
+    async def readiness_check():
+        """Disponibilité pour le load balancer : 503 tant que le préchauffage n'est pas terminé"""
+        engines = registry.engines()
+        if not readiness["ready"] or not engines:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={
+                    "status": "not_ready",
+                    "engines_loaded": len(engines),
+                    "warmup_details": readiness["warmup_details"]
+                }
+            )
+        return {
+            "status": "ready",
+            "warmup_seconds": readiness["warmup_seconds"],
+            "engines_loaded": len(engines)
+        }
+
+    @app.get("/admin/engines")
+    async def engines_stats(current_user: dict = Depends(get_current_admin_session)):
+        """Statistiques du registre des moteurs (chargements, évictions, mémoire résidente)"""
+        return registry.get_stats()
+
+    @app.post("/admin/sync")
+    async def sync_engines(current_user: dict = Depends(get_current_admin_session)):
+        """Synchronise les artefacts modifiés depuis l'API de téléchargement et recharge les moteurs concernés"""
+        if not sync_url:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Synchronisation non configurée (ARTIFACT_SERVER_URL)"
+            )
+        
+        loop = asyncio.get_event_loop()
+        try:
+            report = await loop.run_in_executor(
+                None, sync_artifacts, sync_url, loader.embeddings_dir, registry.languages
+            )
+        except SyncInProgress as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        except SyncError as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+        
+        # Recharger les moteurs dont la version a changé
+        for lang, result in report.items():
+            if result.get("changed"):
+                result["reloaded"] = await loop.run_in_executor(None, registry.reload, DEFAULT_CORPUS, lang)
+        return {"server": sync_url, "languages": report}
+
+    @app.get("/admin/usage")
+    async def usage_stats(
+        current_user: dict = Depends(get_current_admin_session),
+        db = Depends(get_auth_db)
+    ):
+        """Consommation courante (jetons, recherches du jour, quota restant) par utilisateur et par adresse IP"""
+        usage = usage_limiter.usage()
+        user_ids = [int(key.split(":", 1)[1]) for key in usage["clients"] if key.startswith("user:")]
+        usernames = await run_db(UserCRUD.get_usernames, UserCRUD.get_usernames_async, db, user_ids) if user_ids else {}
+        for key, client in usage["clients"].items():
+            if key.startswith("user:"):
+                client["username"] = usernames.get(int(key.split(":", 1)[1]))
+        return usage
+
+    @app.get("/admin/search-logs")
+    async def search_log_stats(current_user: dict = Depends(get_current_admin_session)):
+        """Compteurs de l'écriture groupée des logs de recherche (écrits, échantillonnés, abandonnés, en file)"""
+        return search_log_writer.stats()
+
+    @app.get("/admin/latency")
+    async def latency_stats(current_user: dict = Depends(get_current_admin_session)):
+        """Latences de recherche par étape (tokenisation, passe avant, FAISS) et cache de tokenisation"""
+        encoder = loader.embedding_model
+        return {
+            "stages_ms": loader.latency.snapshot(),
+            "max_seq_length": getattr(encoder, "max_seq_length", None),
+            "tokenize_cache": {
+                "size": encoder.cache_size,
+                "hits": encoder.cache_hits,
+                "misses": encoder.cache_misses
+            }
         }
 
     @app.get("/debug/stats")
-    async def debug_stats(db: Session = Depends(get_db)):
+    async def debug_stats(db = Depends(get_auth_db)):
         """Endpoint de debug pour les statistiques"""
         try:
             import json
             import os
             
-            users_count = db.query(User).count()
-            logs_count = db.query(SearchLog).count()
+            users_count = await run_db(UserCRUD.count_users, UserCRUD.count_users_async, db)
+            logs_count = await run_db(SearchLogCRUD.count_logs, SearchLogCRUD.count_logs_async, db)
             
             # Lire le fichier metadata.json
             metadata_info = {}
@@ -238,6 +574,7 @@ def run_api_mode(engines, top_k, year_weighted):
                         }
                     break
             
+            engines = registry.engines()
             return {
                 "users_count": users_count,
                 "logs_count": logs_count,
@@ -251,17 +588,18 @@ def run_api_mode(engines, top_k, year_weighted):
     @app.get("/stats")
     async def get_stats(
         current_user: dict = Depends(get_current_admin_session),
-        db: Session = Depends(get_db)
+        db = Depends(get_auth_db)
     ):
         """Statistiques générales du système"""
         try:
             # Compter les utilisateurs
-            total_users = db.query(User).count()
+            total_users = await run_db(UserCRUD.count_users, UserCRUD.count_users_async, db)
             print(f"DEBUG: Nombre d'utilisateurs = {total_users}")
             
-            # Compter les entrées dans la base (logs de recherche)
-            total_entries = db.query(SearchLog).count()
-            print(f"DEBUG: Nombre d'entrées = {total_entries}")
+            # Statistiques des logs de recherche
+            search_statistics = await run_db(SearchLogCRUD.get_search_statistics,
+                                             SearchLogCRUD.get_search_statistics_async, db)
+            print(f"DEBUG: Statistiques de recherche = {search_statistics}")
             
             # Lire les statistiques depuis le fichier metadata.json
             total_questions = 0
@@ -301,7 +639,7 @@ def run_api_mode(engines, top_k, year_weighted):
             except Exception as e:
                 print(f"DEBUG: Erreur lecture metadata.json: {e}")
                 # Fallback: essayer de compter depuis les moteurs
-                for engine_name, engine in engines.items():
+                for engine_name, engine in registry.engines().items():
                     if hasattr(engine, 'documents') and engine.documents:
                         total_questions = len(engine.documents)
                         break
@@ -309,7 +647,9 @@ def run_api_mode(engines, top_k, year_weighted):
             result = {
                 "total_users": total_users,
                 "total_entries": total_questions,  # Nombre de questions
-                "total_documents": total_entreprises  # Nombre d'entreprises
+                "total_documents": total_entreprises,  # Nombre d'entreprises
+                "total_searches": search_statistics["total_searches"],
+                "average_response_time": search_statistics["average_response_time"]
             }
             print(f"DEBUG: Résultat final = {result}")
             return result
@@ -335,15 +675,22 @@ def run_api_mode(engines, top_k, year_weighted):
     ssl_keyfile = os.getenv("SSL_KEYFILE", "certs/backend.key")
     ssl_certfile = os.getenv("SSL_CERTFILE", "certs/backend.crt")
     
+    # Derrière un load balancer : adresse client lue dans X-Forwarded-For, uniquement
+    # si la connexion vient d'un proxy de confiance (limites par IP des recherches et connexions)
+    proxy_options = {
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    }
+    
     # Vérifier si les certificats SSL existent
     if os.path.exists(ssl_keyfile) and os.path.exists(ssl_certfile):
         print(f"🔒 Démarrage du serveur HTTPS sur {host}:{port}")
         print(f"📚 Documentation disponible sur https://{host}:{port}/docs")
         print(f"🔐 Compte admin par défaut : admin / admin123")
-        uvicorn.run(app, host=host, port=port, ssl_keyfile=ssl_keyfile, ssl_certfile=ssl_certfile)
+        uvicorn.run(app, host=host, port=port, ssl_keyfile=ssl_keyfile, ssl_certfile=ssl_certfile, **proxy_options)
     else:
         print(f"⚠️  Certificats SSL non trouvés, démarrage en HTTP sur {host}:{port}")
         print(f"📚 Documentation disponible sur http://{host}:{port}/docs")
         print(f"🔐 Compte admin par défaut : admin / admin123")
-        uvicorn.run(app, host=host, port=port)
+        uvicorn.run(app, host=host, port=port, **proxy_options)
 
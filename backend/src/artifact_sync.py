@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Synchronisation différentielle des artefacts depuis l'API de téléchargement des embeddings
+Compare le manifeste distant (/manifest) aux fichiers locaux et ne télécharge que les
+fichiers modifiés, dans un répertoire de préparation, avant de publier la version
+en remplaçant atomiquement le pointeur CURRENT
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au processus
+    fcntl = None
+
+import httpx
+
+from src.bundles import (
+    VERSIONS_DIR, CURRENT_POINTER, BUNDLE_MANIFEST,
+    BundleError, read_current_version, verify_bundle
+)
+
+logger = logging.getLogger(__name__)
+
+# Préfixe des répertoires de préparation (ignorés par le loader)
+STAGING_PREFIX = ".staging-"
+
+# Verrou inter-processus (API, --mode sync) dans le répertoire des embeddings
+SYNC_LOCK_FILE = ".sync.lock"
+
+# Verrou des synchronisations lancées dans ce processus
+_sync_lock = threading.Lock()
+
+class SyncError(Exception):
+    """Échec de la synchronisation (serveur injoignable, fichier corrompu...)"""
+
+class SyncInProgress(SyncError):
+    """Une autre synchronisation est déjà en cours sur le même répertoire"""
+
+@contextmanager
+def sync_lock(embeddings_dir: str):
+    """
+    Verrou exclusif des synchronisations (répertoires de préparation et pointeurs partagés)
+    
+    Pris sans attente, dans le processus (threading) puis entre processus (fcntl).
+    
+    Args:
+        embeddings_dir: Répertoire local des embeddings
+    
+    Raises:
+        SyncInProgress: Si une synchronisation détient déjà le verrou
+    """
+    if not _sync_lock.acquire(blocking=False):
+        raise SyncInProgress("Synchronisation déjà en cours dans ce processus")
+    lock_file = None
+    try:
+        if fcntl is not None:
+            os.makedirs(embeddings_dir, exist_ok=True)
+            lock_file = open(os.path.join(embeddings_dir, SYNC_LOCK_FILE), 'w')
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                raise SyncInProgress(f"Synchronisation déjà en cours sur {embeddings_dir}")
+        yield
+    finally:
+        # La fermeture du fichier libère le verrou fcntl
+        if lock_file is not None:
+            lock_file.close()
+        _sync_lock.release()
+
+def fetch_manifest(client: httpx.Client, server_url: str) -> Dict:
+    """
+    Récupère le manifeste du serveur d'embeddings
+    
+    Args:
+        client: Client HTTP
+        server_url: URL de l'API de téléchargement
+    
+    Returns:
+        dict: Manifeste par langue ({'version', 'files': {chemin: {'size', 'sha256'}}})
+    """
+    response = client.get(f"{server_url.rstrip('/')}/manifest")
+    if response.status_code != 200:
+        raise SyncError(f"Manifeste indisponible ({response.status_code}): {server_url}")
+    return response.json().get("languages", {})
+
+def local_hash_index(lang_dir: str) -> Dict[str, str]:
+    """
+    Fichiers locaux réutilisables, indexés par SHA-256
+    
+    Les empreintes proviennent des manifestes des versions déjà présentes : aucun
+    fichier n'est relu.
+    
+    Args:
+        lang_dir: Répertoire de la langue
+    
+    Returns:
+        dict: SHA-256 -> chemin d'un fichier local
+    """
+    index = {}
+    versions_root = os.path.join(lang_dir, VERSIONS_DIR)
+    if not os.path.isdir(versions_root):
+        return index
+    
+    for version in os.listdir(versions_root):
+        manifest_path = os.path.join(versions_root, version, BUNDLE_MANIFEST)
+        if version.startswith(STAGING_PREFIX) or not os.path.exists(manifest_path):
+            continue
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                files = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            continue
+        for relative, entry in files.items():
+            path = os.path.join(versions_root, version, *relative.split("/"))
+            if os.path.exists(path) and os.path.getsize(path) == entry['size']:
+                index.setdefault(entry['sha256'], path)
+    return index
+
+def download_file(client: httpx.Client, url: str, destination: str, expected: Dict) -> int:
+    """
+    Télécharge un fichier en flux en vérifiant sa taille et son SHA-256
+    
+    Args:
+        client: Client HTTP
+        url: URL du fichier
+        destination: Chemin local
+        expected: Entrée du manifeste ({'size', 'sha256'})
+    
+    Returns:
+        int: Nombre d'octets téléchargés
+    """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with client.stream("GET", url) as response:
+        if response.status_code != 200:
+            raise SyncError(f"Téléchargement impossible ({response.status_code}): {url}")
+        with open(destination, 'wb') as f:
+            for block in response.iter_bytes():
+                f.write(block)
+                digest.update(block)
+                size += len(block)
+    
+    if size != expected['size'] or digest.hexdigest() != expected['sha256']:
+        os.remove(destination)
+        raise SyncError(f"Fichier corrompu après téléchargement: {url}")
+    return size
+
+def reuse_file(source: str, destination: str):
+    """Reprend un fichier local (lien physique, ou copie si impossible)"""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+def write_pointer(lang_dir: str, version: str):
+    """Remplace atomiquement le pointeur CURRENT"""
+    pointer = os.path.join(lang_dir, CURRENT_POINTER)
+    with open(pointer + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer + ".tmp", pointer)
+
+def prune_versions(lang_dir: str, keep: int) -> List[str]:
+    """Supprime les versions locales les plus anciennes (la version publiée est conservée)"""
+    versions_root = os.path.join(lang_dir, VERSIONS_DIR)
+    current = read_current_version(lang_dir)
+    versions = sorted(
+        (name for name in os.listdir(versions_root) if not name.startswith(STAGING_PREFIX)),
+        reverse=True
+    )
+    removed = []
+    for version in versions[max(1, keep):]:
+        if version == current:
+            continue
+        shutil.rmtree(os.path.join(versions_root, version), ignore_errors=True)
+        removed.append(version)
+    return removed
+
+def sync_language(client: httpx.Client, server_url: str, embeddings_dir: str, language: str,
+                  remote: Dict, keep_versions: int = 3) -> Dict:
+    """
+    Synchronise une langue à partir de son manifeste distant
+    
+    Les fichiers déjà présents localement (même SHA-256) sont repris sans transfert ;
+    les autres sont téléchargés dans versions/.staging-<version>/, vérifiés, puis la
+    version est renommée en place et publiée via CURRENT.
+    
+    Args:
+        client: Client HTTP
+        server_url: URL de l'API de téléchargement
+        embeddings_dir: Répertoire local des embeddings
+        language: Code de langue
+        remote: Manifeste distant de la langue
+        keep_versions: Nombre de versions locales conservées
+    
+    Returns:
+        dict: Rapport (version, changed, downloaded_files, downloaded_bytes, reused_files)
+    """
+    version = remote.get('version')
+    if not version:
+        raise SyncError(f"Le serveur ne publie pas de version pour {language} (ancienne disposition sans versions)")
+    
+    lang_dir = os.path.join(embeddings_dir, language)
+    versions_root = os.path.join(lang_dir, VERSIONS_DIR)
+    version_dir = os.path.join(versions_root, version)
+    report = {
+        'version': version,
+        'changed': False,
+        'downloaded_files': 0,
+        'downloaded_bytes': 0,
+        'reused_files': 0
+    }
+    
+    # Version déjà présente et publiée
+    if read_current_version(lang_dir) == version and os.path.isdir(version_dir) and not verify_bundle(version_dir):
+        return report
+    
+    prefix = f"{VERSIONS_DIR}/{version}/"
+    files = {name[len(prefix):]: entry for name, entry in remote['files'].items() if name.startswith(prefix)}
+    if BUNDLE_MANIFEST not in files:
+        raise SyncError(f"Manifeste de bundle absent pour {language}/{version}")
+    
+    if not (os.path.isdir(version_dir) and not verify_bundle(version_dir)):
+        local = local_hash_index(lang_dir)
+        staging_dir = os.path.join(versions_root, STAGING_PREFIX + version)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        
+        try:
+            for relative, entry in sorted(files.items()):
+                destination = os.path.join(staging_dir, *relative.split("/"))
+                source = local.get(entry['sha256'])
+                if source is not None:
+                    reuse_file(source, destination)
+                    report['reused_files'] += 1
+                else:
+                    url = f"{server_url.rstrip('/')}/file/{language}/{prefix}{relative}"
+                    report['downloaded_bytes'] += download_file(client, url, destination, entry)
+                    report['downloaded_files'] += 1
+            
+            problems = verify_bundle(staging_dir)
+            if problems:
+                raise SyncError(f"Bundle {language}/{version} invalide: {'; '.join(problems)}")
+            
+            shutil.rmtree(version_dir, ignore_errors=True)
+            os.rename(staging_dir, version_dir)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+    
+    write_pointer(lang_dir, version)
+    report['changed'] = True
+    report['removed_versions'] = prune_versions(lang_dir, keep_versions)
+    logger.info(f"📦 {language}: version {version} synchronisée ({report['downloaded_files']} fichier(s) "
+                f"téléchargé(s), {report['downloaded_bytes']} octets, {report['reused_files']} repris)")
+    return report
+
+def sync_artifacts(server_url: str, embeddings_dir: str, languages: Optional[List[str]] = None,
+                   keep_versions: int = 3, timeout: float = 60.0) -> Dict[str, Dict]:
+    """
+    Synchronise les artefacts du corpus par défaut depuis l'API de téléchargement
+    
+    Args:
+        server_url: URL de l'API de téléchargement (ex: http://embeddings:8001)
+        embeddings_dir: Répertoire local des embeddings
+        languages: Langues à synchroniser (par défaut: toutes celles du serveur)
+        keep_versions: Nombre de versions locales conservées
+        timeout: Délai maximal des requêtes HTTP (secondes)
+    
+    Returns:
+        dict: Rapport par langue (voir sync_language, 'error' en cas d'échec)
+    
+    Raises:
+        SyncInProgress: Si une autre synchronisation est en cours sur embeddings_dir
+        SyncError: Si le serveur est injoignable
+    """
+    results = {}
+    with sync_lock(embeddings_dir), httpx.Client(timeout=timeout) as client:
+        try:
+            manifest = fetch_manifest(client, server_url)
+        except httpx.HTTPError as e:
+            raise SyncError(f"Serveur d'embeddings injoignable: {e}")
+        
+        for language, remote in manifest.items():
+            if languages and language not in languages:
+                continue
+            try:
+                results[language] = sync_language(client, server_url, embeddings_dir, language,
+                                                  remote, keep_versions)
+            except (SyncError, BundleError, httpx.HTTPError, OSError) as e:
+                logger.error(f"Erreur de synchronisation pour {language}: {e}")
+                results[language] = {'version': remote.get('version'), 'changed': False, 'error': str(e)}
+    return results
@@ -3,11 +3,12 @@
 
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, select
 from datetime import datetime
 from .models import User, SearchLog
 from .schemas import UserCreate, UserUpdate, SearchLogCreate
 from .security import generate_api_token, hash_password
+from .token_cache import token_cache
 
 class UserCRUD:
     """Opérations CRUD pour les utilisateurs"""
@@ -34,16 +35,37 @@ class UserCRUD:
             and_(User.api_token == api_token, User.is_active == True)
         ).first()
     
+    @staticmethod
+    def count_users(db: Session) -> int:
+        """Nombre d'utilisateurs"""
+        return db.query(User).count()
+    
+    @staticmethod
+    async def count_users_async(db) -> int:
+        """Nombre d'utilisateurs (session asynchrone)"""
+        return (await db.execute(select(func.count(User.id)))).scalar()
+    
+    @staticmethod
+    def get_usernames(db: Session, user_ids: List[int]) -> dict:
+        """Noms d'utilisateur par identifiant"""
+        return dict(db.query(User.id, User.username).filter(User.id.in_(user_ids)).all())
+    
+    @staticmethod
+    async def get_usernames_async(db, user_ids: List[int]) -> dict:
+        """Noms d'utilisateur par identifiant (session asynchrone)"""
+        return dict((await db.execute(select(User.id, User.username).where(User.id.in_(user_ids)))).all())
+    
     @staticmethod
     def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         """Récupère une liste d'utilisateurs"""
         return db.query(User).offset(skip).limit(limit).all()
     
     @staticmethod
-    def create_user(db: Session, user: UserCreate) -> User:
-        """Crée un nouvel utilisateur"""
+    def create_user(db: Session, user: UserCreate, password_hash: Optional[str] = None) -> User:
+        """Crée un nouvel utilisateur (password_hash : hash déjà calculé, sinon calculé ici)"""
         api_token = generate_api_token()
-        password_hash = hash_password(user.password) if user.password else None
+        if password_hash is None and user.password:
+            password_hash = hash_password(user.password)
         
         db_user = User(
             email=user.email,
@@ -51,7 +73,8 @@ class UserCRUD:
             full_name=user.full_name,
             password_hash=password_hash,
             api_token=api_token,
-            is_admin=user.is_admin
+            is_admin=user.is_admin,
+            allowed_corpora=user.allowed_corpora
         )
         db.add(db_user)
         db.commit()
@@ -72,6 +95,9 @@ class UserCRUD:
         db_user.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(db_user)
+        
+        # Droits, statut ou token modifiés : ne plus servir l'ancienne version en cache
+        token_cache.invalidate_user(user_id)
         return db_user
     
     @staticmethod
@@ -83,6 +109,7 @@ class UserCRUD:
         
         db.delete(db_user)
         db.commit()
+        token_cache.invalidate_user(user_id)
         return True
     
     @staticmethod
@@ -96,6 +123,7 @@ class UserCRUD:
         db_user.api_token = new_token
         db_user.updated_at = datetime.utcnow()
         db.commit()
+        token_cache.invalidate_user(user_id)
         return new_token
 
 class SearchLogCRUD:
@@ -116,6 +144,28 @@ class SearchLogCRUD:
         db.refresh(db_log)
         return db_log
     
+    @staticmethod
+    def bulk_create_search_logs(db: Session, records: List[dict]):
+        """Insère un lot de logs de recherche en une seule transaction"""
+        db.execute(SearchLog.__table__.insert(), records)
+        db.commit()
+    
+    @staticmethod
+    async def bulk_create_search_logs_async(db, records: List[dict]):
+        """Insère un lot de logs de recherche en une seule transaction (session asynchrone)"""
+        await db.execute(SearchLog.__table__.insert(), records)
+        await db.commit()
+    
+    @staticmethod
+    def count_logs(db: Session) -> int:
+        """Nombre de logs de recherche"""
+        return db.query(SearchLog).count()
+    
+    @staticmethod
+    async def count_logs_async(db) -> int:
+        """Nombre de logs de recherche (session asynchrone)"""
+        return (await db.execute(select(func.count(SearchLog.id)))).scalar()
+    
     @staticmethod
     def get_search_logs(db: Session, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[SearchLog]:
         """Récupère les logs de recherche"""
@@ -137,4 +187,17 @@ class SearchLogCRUD:
         return {
             "total_searches": total_searches,
             "average_response_time": avg_response_time or 0
-        } 
\ No newline at end of file
+        }
+    
+    @staticmethod
+    async def get_search_statistics_async(db, user_id: Optional[int] = None) -> dict:
+        """Récupère les statistiques de recherche (session asynchrone)"""
+        query = select(func.count(SearchLog.id), func.avg(SearchLog.response_time))
+        if user_id:
+            query = query.where(SearchLog.user_id == user_id)
+        total_searches, avg_response_time = (await db.execute(query)).one()
+        
+        return {
+            "total_searches": total_searches,
+            "average_response_time": avg_response_time or 0
+        }
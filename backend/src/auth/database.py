@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from .models import Base
@@ -23,9 +23,45 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Couche asynchrone optionnelle (SQLAlchemy asyncio : aiosqlite pour SQLite, asyncpg pour PostgreSQL)
+ASYNC_DB = os.getenv("ASYNC_DB", "").lower() in ("1", "true", "yes")
+
+def async_database_url(url: str) -> str:
+    """Convertit DATABASE_URL vers le pilote asynchrone correspondant"""
+    scheme, _, rest = url.partition("://")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    
+    async_engine = create_async_engine(async_database_url(DATABASE_URL))
+    AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def create_tables():
     """Crée toutes les tables"""
     Base.metadata.create_all(bind=engine)
+    migrate_columns()
+
+def migrate_columns():
+    """Ajoute aux tables existantes les colonnes introduites après leur création"""
+    added_columns = {
+        "users": {"allowed_corpora": "TEXT"}
+    }
+    
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, columns in added_columns.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, column_type in columns.items():
+                if name not in existing:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+                    print(f"Colonne {table}.{name} ajoutée")
 
 def get_db():
     """Générateur de session de base de données"""
@@ -35,6 +71,14 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Générateur de session asynchrone de base de données (ASYNC_DB)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Session des dépendances d'authentification, des logs et des statistiques
+get_auth_db = get_async_db if ASYNC_DB else get_db
+
 def init_db():
     """Initialise la base de données avec les données par défaut"""
     from .models import User
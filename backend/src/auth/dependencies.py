@@ -3,14 +3,29 @@
 
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
-from .database import get_db
-from .security import verify_api_token
+from starlette.concurrency import run_in_threadpool
+from .database import ASYNC_DB, get_auth_db
+from .security import verify_api_token, verify_api_token_async
 from .sessions import get_session
+from .token_cache import token_cache
 
-def get_current_user(
+async def lookup_api_token(token: str, db) -> Optional[dict]:
+    """
+    Vérifie un token API sans bloquer la boucle d'événements
+    
+    Le cache des tokens est consulté directement ; en cas d'absence, la requête passe
+    par la session asynchrone (ASYNC_DB) ou par le pool de threads (session synchrone).
+    """
+    user_info = token_cache.get(token)
+    if user_info is not None:
+        return user_info
+    if ASYNC_DB:
+        return await verify_api_token_async(token, db)
+    return await run_in_threadpool(verify_api_token, token, db)
+
+async def get_current_user(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db = Depends(get_auth_db)
 ):
     """Récupère l'utilisateur actuellement connecté via token API"""
     if not authorization:
@@ -29,7 +44,7 @@ def get_current_user(
         )
     
     token = authorization.replace("Bearer ", "")
-    user_info = verify_api_token(token, db)
+    user_info = await lookup_api_token(token, db)
     
     if not user_info:
         raise HTTPException(
@@ -49,9 +64,9 @@ def get_current_admin(current_user: dict = Depends(get_current_user)):
         )
     return current_user
 
-def get_optional_user(
+async def get_optional_user(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    db = Depends(get_auth_db)
 ):
     """Récupère l'utilisateur actuel si le token est fourni, sinon None"""
     if not authorization:
@@ -62,7 +77,7 @@ def get_optional_user(
             return None
         
         token = authorization.replace("Bearer ", "")
-        user_info = verify_api_token(token, db)
+        user_info = await lookup_api_token(token, db)
         return user_info
     except:
         return None
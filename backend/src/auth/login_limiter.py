@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Limitation des tentatives de connexion par adresse IP et par email
+Fenêtre glissante : toutes les tentatives sont comptées par IP (rafales), seuls les
+échecs sont comptés par email (force brute sur un compte)
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+class SlidingWindowCounter:
+    """Compteurs d'événements par clé sur une fenêtre glissante, en nombre de clés borné"""
+    
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 10000):
+        """
+        Initialise les compteurs
+        
+        Args:
+            limit: Nombre maximal d'événements par clé sur la fenêtre (0 pour désactiver)
+            window_seconds: Durée de la fenêtre en secondes
+            max_keys: Nombre maximal de clés suivies
+        """
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._events: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+    
+    def _expire(self, key: str, now: float) -> Optional[deque]:
+        events = self._events.get(key)
+        if events is None:
+            return None
+        while events and events[0] <= now - self.window_seconds:
+            events.popleft()
+        if not events:
+            del self._events[key]
+            return None
+        return events
+    
+    def retry_after(self, key: str) -> float:
+        """Délai avant la prochaine tentative autorisée (0 si la clé est sous la limite)"""
+        if self.limit <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            events = self._expire(key, now)
+            if events is None or len(events) < self.limit:
+                return 0.0
+            return events[0] + self.window_seconds - now
+    
+    def add(self, key: str):
+        """Enregistre un événement pour une clé"""
+        if self.limit <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._events and len(self._events) >= self.max_keys:
+                # Libérer les clés dont la fenêtre est écoulée, sinon la plus ancienne
+                for stale in [k for k, events in self._events.items() if events[-1] <= now - self.window_seconds]:
+                    del self._events[stale]
+                if len(self._events) >= self.max_keys:
+                    del self._events[next(iter(self._events))]
+            self._events.setdefault(key, deque()).append(now)
+            if len(self._events[key]) > self.limit:
+                self._events[key].popleft()
+    
+    def reset(self, key: str):
+        """Oublie les événements d'une clé"""
+        with self._lock:
+            self._events.pop(key, None)
+
+class LoginLimiter:
+    """Limiteur des connexions : tentatives par IP, échecs par email"""
+    
+    def __init__(self, attempts_per_ip: int = 20, failures_per_email: int = 5, window_seconds: float = 300.0):
+        """
+        Initialise le limiteur
+        
+        Args:
+            attempts_per_ip: Tentatives autorisées par IP sur la fenêtre
+            failures_per_email: Échecs autorisés par email sur la fenêtre
+            window_seconds: Durée de la fenêtre en secondes
+        """
+        self.ip_attempts = SlidingWindowCounter(attempts_per_ip, window_seconds)
+        self.email_failures = SlidingWindowCounter(failures_per_email, window_seconds)
+    
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return email.strip().lower()
+    
+    def check(self, ip: str, email: str) -> float:
+        """
+        Vérifie et comptabilise une tentative de connexion
+        
+        Args:
+            ip: Adresse IP du client
+            email: Email saisi
+        
+        Returns:
+            float: Délai d'attente en secondes (0 si la tentative est autorisée)
+        """
+        retry_after = max(
+            self.ip_attempts.retry_after(ip),
+            self.email_failures.retry_after(self._email_key(email))
+        )
+        if retry_after <= 0:
+            self.ip_attempts.add(ip)
+        return retry_after
+    
+    def record_failure(self, email: str):
+        """Comptabilise un échec d'authentification pour un email"""
+        self.email_failures.add(self._email_key(email))
+    
+    def record_success(self, email: str):
+        """Réinitialise les échecs d'un email après une connexion réussie"""
+        self.email_failures.reset(self._email_key(email))
+
+# Limiteur partagé par la route de connexion
+login_limiter = LoginLimiter(
+    attempts_per_ip=int(os.getenv("LOGIN_ATTEMPTS_PER_IP", "20")),
+    failures_per_email=int(os.getenv("LOGIN_FAILURES_PER_EMAIL", "5")),
+    window_seconds=float(os.getenv("LOGIN_WINDOW_SECONDS", "300"))
+)
@@ -20,6 +20,7 @@ class User(Base):
     api_token = Column(String(255), unique=True, index=True, nullable=False)
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
+    allowed_corpora = Column(Text, nullable=True)  # Corpus accessibles, séparés par des virgules ("*" pour tous)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
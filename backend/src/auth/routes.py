@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
 from .database import get_db
@@ -13,20 +13,33 @@ from .schemas import (
 )
 from .crud import UserCRUD, SearchLogCRUD
 from .dependencies import get_current_user, get_current_admin, get_current_admin_session
-from .security import verify_password, generate_api_token
+from .security import verify_password_async, hash_password_async, generate_api_token
 from .sessions import create_session
+from .login_limiter import login_limiter
 
 # Routeur pour l'authentification
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @auth_router.post("/login", response_model=LoginResponse)
 async def login(
+    request: Request,
     login_data: LoginRequest,
     db: Session = Depends(get_db)
 ):
     """Connexion avec email et mot de passe"""
+    # Limiter les rafales par IP et la force brute par email avant tout calcul bcrypt
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = login_limiter.check(client_ip, login_data.email)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Trop de tentatives de connexion, réessayez plus tard",
+            headers={"Retry-After": str(int(retry_after) + 1)}
+        )
+    
     user = UserCRUD.get_user_by_email(db, login_data.email)
     if not user:
+        login_limiter.record_failure(login_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect"
@@ -38,7 +51,8 @@ async def login(
             detail="Compte non configuré pour l'authentification par mot de passe"
         )
     
-    if not verify_password(login_data.password, user.password_hash):
+    if not await verify_password_async(login_data.password, user.password_hash):
+        login_limiter.record_failure(login_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect"
@@ -50,6 +64,8 @@ async def login(
             detail="Compte désactivé"
         )
     
+    login_limiter.record_success(login_data.email)
+    
     # Créer une session pour l'interface d'administration
     user_info = {
         "id": user.id,
@@ -72,6 +88,7 @@ async def login(
             full_name=user.full_name,
             is_active=user.is_active,
             is_admin=user.is_admin,
+            allowed_corpora=user.allowed_corpora,
             created_at=user.created_at,
             updated_at=user.updated_at
         )
@@ -98,6 +115,7 @@ async def verify_api_token(
         full_name=user.full_name,
         is_active=user.is_active,
         is_admin=user.is_admin,
+        allowed_corpora=user.allowed_corpora,
         created_at=user.created_at,
         updated_at=user.updated_at
     )
@@ -123,6 +141,7 @@ async def get_current_user_info(
         full_name=user.full_name,
         is_active=user.is_active,
         is_admin=user.is_admin,
+        allowed_corpora=user.allowed_corpora,
         created_at=user.created_at,
         updated_at=user.updated_at
     )
@@ -149,6 +168,7 @@ async def update_current_user(
         full_name=updated_user.full_name,
         is_active=updated_user.is_active,
         is_admin=updated_user.is_admin,
+        allowed_corpora=updated_user.allowed_corpora,
         created_at=updated_user.created_at,
         updated_at=updated_user.updated_at
     )
@@ -191,7 +211,8 @@ async def create_user(
             detail="Un utilisateur avec ce nom d'utilisateur existe déjà"
         )
     
-    created_user = UserCRUD.create_user(db, user)
+    password_hash = await hash_password_async(user.password) if user.password else None
+    created_user = UserCRUD.create_user(db, user, password_hash=password_hash)
     
     return UserSchema(
         id=created_user.id,
@@ -201,6 +222,7 @@ async def create_user(
         full_name=created_user.full_name,
         is_active=created_user.is_active,
         is_admin=created_user.is_admin,
+        allowed_corpora=created_user.allowed_corpora,
         created_at=created_user.created_at,
         updated_at=created_user.updated_at
     )
@@ -225,6 +247,7 @@ async def get_users(
             full_name=user.full_name,
             is_active=user.is_active,
             is_admin=user.is_admin,
+            allowed_corpora=user.allowed_corpora,
             created_at=user.created_at,
             updated_at=user.updated_at
         ))
@@ -253,6 +276,7 @@ async def get_user(
         full_name=user.full_name,
         is_active=user.is_active,
         is_admin=user.is_admin,
+        allowed_corpora=user.allowed_corpora,
         created_at=user.created_at,
         updated_at=user.updated_at
     )
@@ -280,6 +304,7 @@ async def update_user(
         full_name=updated_user.full_name,
         is_active=updated_user.is_active,
         is_admin=updated_user.is_admin,
+        allowed_corpora=updated_user.allowed_corpora,
         created_at=updated_user.created_at,
         updated_at=updated_user.updated_at
     )
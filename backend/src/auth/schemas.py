@@ -33,6 +33,7 @@ class UserCreate(UserBase):
     password: str
     is_active: bool = True
     is_admin: bool = False
+    allowed_corpora: Optional[str] = None
 
 class UserUpdate(BaseModel):
     """Schéma pour mettre à jour un utilisateur"""
@@ -41,6 +42,7 @@ class UserUpdate(BaseModel):
     full_name: Optional[str] = None
     is_active: Optional[bool] = None
     is_admin: Optional[bool] = None
+    allowed_corpora: Optional[str] = None
 
 class User(UserBase):
     """Schéma de réponse pour les utilisateurs"""
@@ -48,6 +50,7 @@ class User(UserBase):
     api_token: str
     is_active: bool
     is_admin: bool
+    allowed_corpora: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
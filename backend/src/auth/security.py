@@ -1,28 +1,54 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
+import asyncio
 import secrets
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from fastapi import HTTPException, status
 
+# Coût bcrypt (log2 du nombre d'itérations) des nouveaux hashs
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Exécuteur dédié au hachage : borne le nombre de calculs bcrypt simultanés
+# et les tient hors de la boucle d'événements
+password_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    thread_name_prefix="bcrypt"
+)
+
 def generate_api_token() -> str:
     """Génère un token API sécurisé"""
     return secrets.token_urlsafe(32)
 
 def hash_password(password: str) -> str:
     """Hache un mot de passe avec bcrypt"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 def verify_password(password: str, hashed_password: str) -> bool:
     """Vérifie un mot de passe contre son hash"""
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+async def hash_password_async(password: str) -> str:
+    """Hache un mot de passe dans l'exécuteur dédié (n'occupe pas la boucle d'événements)"""
+    return await asyncio.get_event_loop().run_in_executor(password_executor, hash_password, password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """Vérifie un mot de passe dans l'exécuteur dédié (n'occupe pas la boucle d'événements)"""
+    return await asyncio.get_event_loop().run_in_executor(
+        password_executor, verify_password, password, hashed_password
+    )
+
 def verify_api_token(token: str, db) -> Optional[dict]:
     """
     Vérifie un token API et retourne les informations de l'utilisateur
     
+    Les résultats sont mis en cache (voir token_cache) : les recherches authentifiées
+    n'interrogent la base qu'au premier appel ou après expiration.
+    
     Args:
         token: Token API à vérifier
         db: Session de base de données
@@ -31,6 +57,12 @@ def verify_api_token(token: str, db) -> Optional[dict]:
         dict: Informations de l'utilisateur ou None si invalide
     """
     from .models import User
+    from .token_cache import token_cache
+    
+    # Chemin rapide : token déjà vérifié récemment
+    user_info = token_cache.get(token)
+    if user_info is not None:
+        return user_info
     
     user = db.query(User).filter(
         User.api_token == token,
@@ -40,11 +72,49 @@ def verify_api_token(token: str, db) -> Optional[dict]:
     if not user:
         return None
     
+    user_info = token_user_info(user)
+    token_cache.set(token, user_info)
+    return user_info
+
+async def verify_api_token_async(token: str, db) -> Optional[dict]:
+    """
+    Version asynchrone de verify_api_token (session SQLAlchemy asyncio, ASYNC_DB)
+    
+    Args:
+        token: Token API à vérifier
+        db: Session asynchrone de base de données
+        
+    Returns:
+        dict: Informations de l'utilisateur ou None si invalide
+    """
+    from sqlalchemy import select
+    from .models import User
+    from .token_cache import token_cache
+    
+    user_info = token_cache.get(token)
+    if user_info is not None:
+        return user_info
+    
+    result = await db.execute(
+        select(User).where(User.api_token == token, User.is_active == True)
+    )
+    user = result.scalars().first()
+    
+    if not user:
+        return None
+    
+    user_info = token_user_info(user)
+    token_cache.set(token, user_info)
+    return user_info
+
+def token_user_info(user) -> dict:
+    """Informations utilisateur associées à un token API"""
     return {
         "user_id": user.id,
         "username": user.username,
         "email": user.email,
-        "is_admin": user.is_admin
+        "is_admin": user.is_admin,
+        "allowed_corpora": [c.strip() for c in user.allowed_corpora.split(",") if c.strip()] if user.allowed_corpora else None
     }
 
 def require_token():
@@ -3,55 +3,251 @@
 
 """
 Système de gestion des sessions pour l'interface d'administration
+Les sessions sont conservées dans un SessionStore : en mémoire (un seul processus) ou
+dans SQLite (partagé entre les workers, conservé au redémarrage). Les sessions expirées
+sont purgées par une tâche de fond, dans l'ordre de leur expiration
 """
 
-from typing import Dict, Optional
+import os
+import json
+import heapq
+import sqlite3
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import secrets
 
-# Stockage des sessions en mémoire (pour simplifier)
-# En production, utilisez Redis ou une base de données
-sessions: Dict[str, dict] = {}
+logger = logging.getLogger(__name__)
+
+# Durée de vie d'une session
+SESSION_TTL = timedelta(hours=float(os.getenv("SESSION_TTL_HOURS", "24")))
+
+# Intervalle maximal entre deux purges (secondes)
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "300"))
+
+class SessionStore(ABC):
+    """Interface de stockage des sessions (tout backend doit implémenter chaque méthode)"""
+    
+    @abstractmethod
+    def save(self, session_token: str, session: dict):
+        """Enregistre une session"""
+    
+    @abstractmethod
+    def load(self, session_token: str) -> Optional[dict]:
+        """Retourne une session (expirée ou non), None si inconnue"""
+    
+    @abstractmethod
+    def delete(self, session_token: str) -> bool:
+        """Supprime une session"""
+    
+    @abstractmethod
+    def purge_expired(self, now: datetime) -> int:
+        """Supprime les sessions expirées et retourne leur nombre"""
+    
+    @abstractmethod
+    def next_expiry(self) -> Optional[datetime]:
+        """Date d'expiration la plus proche, None si aucune session"""
+    
+    @abstractmethod
+    def count(self) -> int:
+        """Nombre de sessions stockées"""
+
+class MemorySessionStore(SessionStore):
+    """Sessions en mémoire, avec un tas des dates d'expiration"""
+    
+    def __init__(self):
+        self._sessions: Dict[str, dict] = {}
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+    
+    def save(self, session_token: str, session: dict):
+        with self._lock:
+            self._sessions[session_token] = session
+            heapq.heappush(self._expiry_heap, (session["expires_at"], session_token))
+    
+    def load(self, session_token: str) -> Optional[dict]:
+        with self._lock:
+            return self._sessions.get(session_token)
+    
+    def delete(self, session_token: str) -> bool:
+        # L'entrée du tas est ignorée lors de la purge
+        with self._lock:
+            return self._sessions.pop(session_token, None) is not None
+    
+    def purge_expired(self, now: datetime) -> int:
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, session_token = heapq.heappop(self._expiry_heap)
+                session = self._sessions.get(session_token)
+                if session is not None and session["expires_at"] == expires_at:
+                    del self._sessions[session_token]
+                    removed += 1
+        return removed
+    
+    def next_expiry(self) -> Optional[datetime]:
+        with self._lock:
+            while self._expiry_heap:
+                expires_at, session_token = self._expiry_heap[0]
+                session = self._sessions.get(session_token)
+                if session is not None and session["expires_at"] == expires_at:
+                    return expires_at
+                heapq.heappop(self._expiry_heap)
+            return None
+    
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions dans une base SQLite, partagée entre processus (index sur la date d'expiration)"""
+    
+    def __init__(self, path: str):
+        """
+        Initialise le stockage
+        
+        Args:
+            path: Chemin de la base SQLite des sessions
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "token TEXT PRIMARY KEY, user_id INTEGER, user_info TEXT NOT NULL, "
+            "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
+    
+    @staticmethod
+    def _timestamp(value: datetime) -> float:
+        return (value - datetime(1970, 1, 1)).total_seconds()
+    
+    @staticmethod
+    def _datetime(value: float) -> datetime:
+        return datetime(1970, 1, 1) + timedelta(seconds=value)
+    
+    def save(self, session_token: str, session: dict):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sessions (token, user_id, user_info, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (session_token, session["user_id"], json.dumps(session["user_info"]),
+                 self._timestamp(session["created_at"]), self._timestamp(session["expires_at"]))
+            )
+    
+    def load(self, session_token: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT user_id, user_info, created_at, expires_at FROM sessions WHERE token = ?",
+                (session_token,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "user_id": row[0],
+            "user_info": json.loads(row[1]),
+            "created_at": self._datetime(row[2]),
+            "expires_at": self._datetime(row[3])
+        }
+    
+    def delete(self, session_token: str) -> bool:
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM sessions WHERE token = ?", (session_token,))
+            return cursor.rowcount > 0
+    
+    def purge_expired(self, now: datetime) -> int:
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (self._timestamp(now),))
+            return cursor.rowcount
+    
+    def next_expiry(self) -> Optional[datetime]:
+        with self._lock:
+            row = self._connection.execute("SELECT MIN(expires_at) FROM sessions").fetchone()
+        return self._datetime(row[0]) if row and row[0] is not None else None
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+def create_session_store() -> SessionStore:
+    """Crée le stockage configuré par SESSION_STORE (memory ou sqlite, chemin SESSION_DB_PATH)"""
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", "./sessions.db"))
+    if backend != "memory":
+        logger.warning(f"SESSION_STORE inconnu ({backend}), sessions conservées en mémoire")
+    return MemorySessionStore()
+
+# Stockage des sessions du processus
+session_store: SessionStore = create_session_store()
 
 def create_session(user_id: int, user_info: dict) -> str:
     """Crée une nouvelle session pour un utilisateur"""
     session_token = secrets.token_urlsafe(32)
-    sessions[session_token] = {
+    now = datetime.utcnow()
+    session_store.save(session_token, {
         "user_id": user_id,
         "user_info": user_info,
-        "created_at": datetime.utcnow(),
-        "expires_at": datetime.utcnow() + timedelta(hours=24)  # Session de 24h
-    }
+        "created_at": now,
+        "expires_at": now + SESSION_TTL
+    })
     return session_token
 
 def get_session(session_token: str) -> Optional[dict]:
     """Récupère les informations d'une session"""
-    if session_token not in sessions:
+    session = session_store.load(session_token)
+    if session is None:
         return None
     
-    session = sessions[session_token]
-    
-    # Vérifier l'expiration
+    # Vérifier l'expiration (la session peut ne pas encore avoir été purgée)
     if datetime.utcnow() > session["expires_at"]:
-        del sessions[session_token]
+        session_store.delete(session_token)
         return None
     
     return session
 
 def delete_session(session_token: str) -> bool:
     """Supprime une session"""
-    if session_token in sessions:
-        del sessions[session_token]
-        return True
-    return False
+    return session_store.delete(session_token)
 
-def cleanup_expired_sessions():
+def cleanup_expired_sessions() -> int:
     """Nettoie les sessions expirées"""
-    current_time = datetime.utcnow()
-    expired_tokens = [
-        token for token, session in sessions.items()
-        if current_time > session["expires_at"]
-    ]
-    
-    for token in expired_tokens:
-        del sessions[token]
+    return session_store.purge_expired(datetime.utcnow())
+
+def _sweep() -> Tuple[int, int, Optional[datetime]]:
+    """Purge les sessions expirées (sessions supprimées, restantes, prochaine expiration)"""
+    removed = cleanup_expired_sessions()
+    return removed, session_store.count(), session_store.next_expiry()
+
+async def run_session_sweeper(max_interval: float = SESSION_SWEEP_INTERVAL):
+    """
+    Purge les sessions expirées en tâche de fond
+    
+    La tâche dort jusqu'à la prochaine expiration connue (au plus max_interval, pour
+    prendre en compte les sessions créées par d'autres workers sur un stockage partagé).
+    
+    Args:
+        max_interval: Intervalle maximal entre deux purges (secondes)
+    """
+    loop = asyncio.get_event_loop()
+    while True:
+        try:
+            removed, remaining, next_expiry = await loop.run_in_executor(None, _sweep)
+            if removed:
+                logger.info(f"🧹 {removed} session(s) expirée(s) supprimée(s), {remaining} active(s)")
+        except Exception as e:
+            logger.error(f"Erreur lors de la purge des sessions: {e}")
+            next_expiry = None
+        
+        delay = max_interval
+        if next_expiry is not None:
+            delay = min(max_interval, max((next_expiry - datetime.utcnow()).total_seconds(), 1.0))
+        await asyncio.sleep(delay)
+
+def start_session_sweeper() -> "asyncio.Task":
+    """Lance la purge des sessions dans la boucle d'événements courante"""
+    return asyncio.ensure_future(run_session_sweeper())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cache mémoire des tokens API vérifiés
+Évite une requête en base à chaque recherche authentifiée ; les entrées expirent après
+un TTL (borne la durée de validité d'un token révoqué par un autre processus) et sont
+invalidées explicitement lors des modifications d'utilisateur
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+class TokenCache:
+    """Cache LRU borné token -> user_info, avec expiration"""
+    
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        """
+        Initialise le cache
+        
+        Args:
+            max_size: Nombre maximal de tokens conservés (0 pour désactiver)
+            ttl_seconds: Durée de vie d'une entrée en secondes
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, token: str) -> Optional[dict]:
+        """Retourne les informations utilisateur d'un token en cache (None si absent ou expiré)"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, user_info = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return dict(user_info)
+    
+    def set(self, token: str, user_info: dict):
+        """Enregistre les informations utilisateur d'un token valide"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (time.monotonic() + self.ttl_seconds, dict(user_info))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate_user(self, user_id: int):
+        """Retire du cache tous les tokens d'un utilisateur"""
+        with self._lock:
+            for token in [token for token, (_, info) in self._entries.items() if info.get("user_id") == user_id]:
+                del self._entries[token]
+    
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+# Cache partagé par les dépendances d'authentification
+token_cache = TokenCache(
+    max_size=int(os.getenv("TOKEN_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("TOKEN_CACHE_TTL", "60"))
+)
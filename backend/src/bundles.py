@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Résolution et vérification des bundles d'artefacts versionnés
+Le calculateur écrit chaque build dans <langue>/versions/<version>/ et publie la
+version en remplaçant atomiquement le pointeur <langue>/CURRENT
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIR = "versions"
+CURRENT_POINTER = "CURRENT"
+BUNDLE_MANIFEST = "manifest.json"
+
+class BundleError(Exception):
+    """Bundle publié absent, incomplet ou corrompu"""
+
+def _file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Empreinte SHA-256 d'un fichier, lue par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_current_version(lang_dir: str) -> Optional[str]:
+    """
+    Lit le pointeur CURRENT d'une langue
+
+    Args:
+        lang_dir: Répertoire de la langue
+
+    Returns:
+        str: Nom de la version publiée, ou None (ancienne disposition sans versions)
+    """
+    pointer = os.path.join(lang_dir, CURRENT_POINTER)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, 'r', encoding='utf-8') as f:
+        return f.read().strip() or None
+
+def verify_bundle(version_dir: str, full_hashes: bool = False) -> List[str]:
+    """
+    Vérifie une version par rapport à son manifeste
+
+    Par défaut seules l'existence et la taille des fichiers sont contrôlées (stat) ;
+    full_hashes recalcule en plus le SHA-256 de chaque fichier.
+
+    Args:
+        version_dir: Répertoire de la version
+        full_hashes: Si True, vérifie aussi les empreintes SHA-256
+
+    Returns:
+        list: Problèmes détectés (vide si le bundle est valide)
+    """
+    manifest_path = os.path.join(version_dir, BUNDLE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return [f"manifeste absent: {manifest_path}"]
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    problems = []
+    for relative, expected in manifest.get('files', {}).items():
+        path = os.path.join(version_dir, *relative.split("/"))
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            problems.append(f"fichier manquant: {relative}")
+            continue
+        if size != expected['size']:
+            problems.append(f"taille incorrecte: {relative} ({size} au lieu de {expected['size']})")
+        elif full_hashes and _file_sha256(path) != expected['sha256']:
+            problems.append(f"empreinte incorrecte: {relative}")
+    return problems
+
+def _model_key(name: str) -> str:
+    """Nom de modèle comparable (préfixe sentence-transformers/ facultatif)"""
+    name = name.strip().rstrip("/")
+    prefix = "sentence-transformers/"
+    return name[len(prefix):] if name.startswith(prefix) else name
+
+def check_bundle_model(version_dir: str, embedding_model: Optional[str] = None,
+                       embedding_dimension: Optional[int] = None) -> List[str]:
+    """
+    Vérifie que le modèle et la dimension du manifeste correspondent à l'encodeur des requêtes
+
+    Args:
+        version_dir: Répertoire de la version
+        embedding_model: Nom du modèle de l'encodeur (None = non vérifié)
+        embedding_dimension: Dimension des vecteurs de l'encodeur (None = non vérifiée)
+
+    Returns:
+        list: Incompatibilités détectées (vide si le bundle est compatible)
+    """
+    manifest_path = os.path.join(version_dir, BUNDLE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return [f"manifeste absent: {manifest_path}"]
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    problems = []
+    built_model = manifest.get('embedding_model')
+    if embedding_model and built_model and _model_key(built_model) != _model_key(embedding_model):
+        problems.append(f"modèle {built_model} (encodeur des requêtes: {embedding_model})")
+    built_dimension = manifest.get('embedding_dimension')
+    if embedding_dimension and built_dimension and int(built_dimension) != int(embedding_dimension):
+        problems.append(f"dimension {built_dimension} (encodeur des requêtes: {embedding_dimension})")
+    return problems
+
+def resolve_bundle_dir(lang_dir: str, verify: bool = True, full_hashes: bool = False,
+                       embedding_model: Optional[str] = None, embedding_dimension: Optional[int] = None) -> str:
+    """
+    Retourne le répertoire des artefacts à servir pour une langue
+
+    Args:
+        lang_dir: Répertoire de la langue
+        verify: Si True, vérifie le manifeste de la version publiée
+        full_hashes: Si True, vérifie aussi les empreintes SHA-256
+        embedding_model: Modèle de l'encodeur des requêtes, comparé au manifeste si verify
+        embedding_dimension: Dimension de l'encodeur des requêtes, comparée au manifeste si verify
+
+    Returns:
+        str: Répertoire de la version publiée, ou lang_dir pour l'ancienne disposition
+
+    Raises:
+        BundleError: Si la version publiée est absente, ne correspond pas à son manifeste
+                     ou a été construite avec un autre modèle
+    """
+    version = read_current_version(lang_dir)
+    if version is None:
+        return lang_dir
+
+    version_dir = os.path.join(lang_dir, VERSIONS_DIR, version)
+    if not os.path.isdir(version_dir):
+        raise BundleError(f"Version publiée introuvable: {version_dir}")
+
+    if verify:
+        problems = verify_bundle(version_dir, full_hashes)
+        if problems:
+            raise BundleError(f"Bundle {version_dir} invalide: {'; '.join(problems)}")
+        mismatches = check_bundle_model(version_dir, embedding_model, embedding_dimension)
+        if mismatches:
+            raise BundleError(f"Bundle {version_dir} incompatible: {'; '.join(mismatches)}")
+    return version_dir
@@ -7,67 +7,330 @@ Charge les fichiers .npy, index FAISS et métadonnées sans les recalculer
 
 import os
 import json
+import time
 import pickle
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer, CrossEncoder
 from typing import Dict, Optional, List
 import logging
 
+from .engine_registry import DEFAULT_CORPUS
+from .encoders import create_encoder, StaticEncoder
+from .bundles import BundleError, resolve_bundle_dir
+from .latency import LatencyTracker
+
 logger = logging.getLogger(__name__)
 
+# Colonnes de métadonnées d'un build en flux (un fichier JSONL par colonne)
+METADATA_COLUMNS_DIR = "metadata_columns"
+DATA_COLUMNS = ['questions', 'reponses', 'commentaires', 'entreprises', 'annees', 'metadata']
+
+def has_metadata(lang_dir: str) -> bool:
+    """Vérifie qu'un répertoire contient des métadonnées (metadata.pkl ou colonnes JSONL)"""
+    return (os.path.exists(os.path.join(lang_dir, "metadata.pkl"))
+            or os.path.isdir(os.path.join(lang_dir, METADATA_COLUMNS_DIR)))
+
+def load_metadata(lang_dir: str) -> Optional[Dict]:
+    """
+    Charge les métadonnées d'un moteur
+    
+    Lit metadata.pkl, ou à défaut les colonnes JSONL d'un build en flux
+    complétées par metadata.json.
+    
+    Args:
+        lang_dir: Répertoire des artefacts du moteur
+        
+    Returns:
+        dict: Métadonnées (model_info, data_info, calculation_info) et taille sur disque
+              sous 'disk_bytes', ou None si absentes
+    """
+    metadata_path = os.path.join(lang_dir, "metadata.pkl")
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'rb') as f:
+            metadata = pickle.load(f)
+        metadata['disk_bytes'] = os.path.getsize(metadata_path)
+        return metadata
+    
+    columns_dir = os.path.join(lang_dir, METADATA_COLUMNS_DIR)
+    if not os.path.isdir(columns_dir):
+        return None
+    
+    with open(os.path.join(lang_dir, "metadata.json"), 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    
+    data_info = {}
+    disk_bytes = 0
+    for column in DATA_COLUMNS:
+        column_path = os.path.join(columns_dir, f"{column}.jsonl")
+        with open(column_path, 'r', encoding='utf-8') as f:
+            data_info[column] = [json.loads(line) for line in f]
+        disk_bytes += os.path.getsize(column_path)
+    
+    return {
+        'model_info': metadata['model_info'],
+        'calculation_info': metadata['calculation_info'],
+        'data_info': data_info,
+        'disk_bytes': disk_bytes
+    }
+
+def read_index_info(lang_dir: str) -> Dict:
+    """
+    Lit les informations d'index enregistrées par le calculateur dans metadata.json
+    
+    Args:
+        lang_dir: Répertoire des artefacts du moteur
+        
+    Returns:
+        dict: Section index_info (type, paramètres de construction et de recherche), vide si absente
+    """
+    metadata_json_path = os.path.join(lang_dir, "metadata.json")
+    if not os.path.exists(metadata_json_path):
+        return {}
+    with open(metadata_json_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('index_info') or {}
+
+def load_shard_set(shard_paths: List[str]):
+    """
+    Charge un ensemble de shards FAISS interrogés ensemble
+    
+    Chaque shard conserve les identifiants globaux des lignes (IndexIDMap) : la
+    recherche est répartie sur les shards en parallèle et les top-k sont fusionnés.
+    
+    Args:
+        shard_paths: Chemins des index des shards
+        
+    Returns:
+        tuple: (faiss.IndexShards, liste des index des shards)
+    """
+    shards = [faiss.read_index(path) for path in shard_paths]
+    index = faiss.IndexShards(shards[0].d, True, False)
+    for shard in shards:
+        index.add_shard(shard)
+    return index, shards
+
+def mmr_select(scores: np.ndarray, vectors: np.ndarray, top_k: int, diversity: float) -> List[int]:
+    """
+    Sélection par Maximal Marginal Relevance
+    
+    Chaque étape retient le candidat maximisant
+    (1 - diversity) * similarité à la requête - diversity * similarité maximale aux retenus.
+    
+    Args:
+        scores: Similarités requête / candidats
+        vectors: Vecteurs normalisés des candidats
+        top_k: Nombre de candidats à retenir
+        diversity: Poids de la diversification entre 0 et 1
+        
+    Returns:
+        list: Positions des candidats retenus, dans l'ordre de sélection
+    """
+    similarities = vectors @ vectors.T
+    redundancy = np.full(len(scores), -np.inf, dtype=np.float32)
+    available = np.ones(len(scores), dtype=bool)
+    selected = []
+    for _ in range(min(top_k, len(scores))):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        objective = np.where(available, (1 - diversity) * scores - diversity * penalty, -np.inf)
+        best = int(np.argmax(objective))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarities[best])
+    return selected
+
 class EmbeddingLoader:
     """Chargeur d'embeddings pré-calculés"""
     
-    def __init__(self, embeddings_dir="embeddings"):
+    def __init__(self, embeddings_dir="embeddings", model_name="paraphrase-multilingual-MiniLM-L12-v2",
+                 encoder_backend="torch", onnx_dir=None, onnx_quantize=False, parity_tolerance=0.02,
+                 max_seq_length=None, tokenize_cache_size=1024, verify_checksums=False, rescore_factor=4):
         """
         Initialise le chargeur d'embeddings
         
         Args:
             embeddings_dir: Répertoire contenant les embeddings pré-calculés
+            model_name: Nom du modèle Sentence Transformers utilisé pour les requêtes
+            encoder_backend: Backend d'encodage des requêtes ("torch" ou "onnx")
+            onnx_dir: Répertoire de l'export ONNX (exporté au premier lancement si absent)
+            onnx_quantize: Si True, utilise le modèle ONNX quantifié en int8
+            parity_tolerance: Dérive cosinus maximale admise entre ONNX et PyTorch
+            max_seq_length: Longueur maximale des requêtes en tokens (troncature, None = valeur du modèle)
+            tokenize_cache_size: Nombre de requêtes tokenisées conservées en cache
+            verify_checksums: Si True, vérifie le SHA-256 de chaque fichier du bundle
+                              (sinon seules l'existence et la taille sont contrôlées)
+            rescore_factor: Nombre de candidats récupérés par résultat pour le re-scoring exact
+                            des index approchés (1 pour désactiver)
         """
         self.embeddings_dir = embeddings_dir
+        self.verify_checksums = verify_checksums
+        self.rescore_factor = max(1, rescore_factor or 1)
         self.engines = {}
         self.metadata = {}
         
-        # Charger le modèle Sentence Transformers pour les nouvelles requêtes
-        logger.info("Chargement du modèle Sentence Transformers pour les requêtes...")
-        self.embedding_model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+        # Charger l'encodeur des nouvelles requêtes
+        self.embedding_model = create_encoder(
+            encoder_backend,
+            model_name=model_name,
+            onnx_dir=onnx_dir,
+            quantize=onnx_quantize,
+            parity_tolerance=parity_tolerance,
+            max_seq_length=max_seq_length,
+            cache_size=tokenize_cache_size
+        )
+        
+        # Latences par étape (tokenisation, passe avant, recherche FAISS)
+        self.latency = LatencyTracker()
+    
+    def get_engine_dir(self, language: str, corpus: Optional[str] = None) -> str:
+        """
+        Retourne le répertoire des artefacts d'un moteur
+        
+        Le corpus par défaut est stocké directement dans embeddings_dir/<langue>,
+        les autres corpus dans embeddings_dir/<corpus>/<langue>.
+        
+        Args:
+            language: Code de langue (fr, en)
+            corpus: Nom du corpus (None pour le corpus par défaut)
+            
+        Returns:
+            str: Chemin du répertoire
+        """
+        if corpus and corpus != DEFAULT_CORPUS:
+            return os.path.join(self.embeddings_dir, corpus, language)
+        return os.path.join(self.embeddings_dir, language)
     
-    def load_language_engine(self, language: str, index_type: str = "flat") -> Optional[Dict]:
+    def get_bundle_dir(self, language: str, corpus: Optional[str] = None, verify: bool = True) -> str:
+        """
+        Retourne le répertoire de la version publiée d'un moteur
+        
+        Args:
+            language: Code de langue (fr, en)
+            corpus: Nom du corpus (None pour le corpus par défaut)
+            verify: Si True, vérifie le manifeste du bundle
+            
+        Returns:
+            str: Répertoire des artefacts à servir
+            
+        Raises:
+            BundleError: Si la version publiée est absente, invalide ou construite avec
+                         un autre modèle que l'encodeur des requêtes
+        """
+        return resolve_bundle_dir(self.get_engine_dir(language, corpus), verify=verify,
+                                  full_hashes=self.verify_checksums,
+                                  embedding_model=getattr(self.embedding_model, 'model_name', None),
+                                  embedding_dimension=getattr(self.embedding_model, 'dimension', None))
+    
+    def _has_engine(self, language: str, corpus: Optional[str] = None) -> bool:
+        """Vérifie qu'un moteur existe sur disque (sans vérifier son bundle)"""
+        try:
+            return has_metadata(self.get_bundle_dir(language, corpus, verify=False))
+        except BundleError:
+            return False
+    
+    def list_corpora(self, languages: List[str] = None) -> List[str]:
+        """
+        Liste les corpus disponibles sur disque
+        
+        Args:
+            languages: Langues à rechercher (par défaut: fr, en)
+            
+        Returns:
+            list: Noms des corpus possédant au moins un moteur
+        """
+        if languages is None:
+            languages = ["fr", "en"]
+        
+        corpora = []
+        if any(self._has_engine(lang) for lang in languages):
+            corpora.append(DEFAULT_CORPUS)
+        
+        if os.path.isdir(self.embeddings_dir):
+            for name in sorted(os.listdir(self.embeddings_dir)):
+                if name in languages or name == DEFAULT_CORPUS:
+                    continue
+                if any(self._has_engine(lang, name) for lang in languages):
+                    corpora.append(name)
+        
+        return corpora
+    
+    def load_language_engine(self, language: str, index_type: str = "flat", corpus: Optional[str] = None) -> Optional[Dict]:
         """
         Charge un moteur pour une langue spécifique
         
         Args:
             language: Code de langue (fr, en)
-            index_type: Type d'index FAISS à charger
+            index_type: Type d'index FAISS à charger ("auto" : type retenu lors du build)
+            corpus: Nom du corpus (None pour le corpus par défaut)
             
         Returns:
             dict: Moteur chargé avec index et métadonnées
         """
-        lang_dir = os.path.join(self.embeddings_dir, language)
+        lang_dir = self.get_engine_dir(language, corpus)
         
         if not os.path.exists(lang_dir):
             logger.warning(f"Répertoire d'embeddings non trouvé pour {language}: {lang_dir}")
             return None
         
         try:
-            # Charger les métadonnées
-            metadata_path = os.path.join(lang_dir, "metadata.pkl")
-            if not os.path.exists(metadata_path):
-                logger.error(f"Fichier de métadonnées non trouvé: {metadata_path}")
+            # Version publiée (pointeur CURRENT), vérifiée avant d'être servie
+            bundle_dir = self.get_bundle_dir(language, corpus)
+            version = os.path.basename(bundle_dir) if bundle_dir != lang_dir else None
+            lang_dir = bundle_dir
+            
+            # Charger les métadonnées (metadata.pkl ou colonnes d'un build en flux)
+            metadata = load_metadata(lang_dir)
+            if metadata is None:
+                logger.error(f"Métadonnées non trouvées dans: {lang_dir}")
                 return None
             
-            with open(metadata_path, 'rb') as f:
-                metadata = pickle.load(f)
+            # Charger l'index FAISS ("auto" : type retenu lors du build, flat à défaut)
+            index_info = read_index_info(lang_dir)
+            if index_type == "auto":
+                index_type = index_info.get('type', "flat")
+            shards_info = index_info.get('shards') if index_info.get('type') == index_type else None
+            shards = None
+            if shards_info and shards_info.get('mode') == "set":
+                # Ensemble de shards : recherche parallèle et fusion des top-k
+                shard_paths = [os.path.join(lang_dir, shards_info['directory'], name) for name in shards_info['files']]
+                missing = [path for path in shard_paths if not os.path.exists(path)]
+                if missing:
+                    logger.error(f"Shards FAISS non trouvés: {missing}")
+                    return None
+                index, shards = load_shard_set(shard_paths)
+                index_bytes = sum(os.path.getsize(path) for path in shard_paths)
+            else:
+                index_path = os.path.join(lang_dir, f"faiss_index_{index_type}.idx")
+                if not os.path.exists(index_path):
+                    logger.error(f"Index FAISS non trouvé: {index_path}")
+                    return None
+                index = faiss.read_index(index_path)
+                index_bytes = os.path.getsize(index_path)
             
-            # Charger l'index FAISS
-            index_path = os.path.join(lang_dir, f"faiss_index_{index_type}.idx")
-            if not os.path.exists(index_path):
-                logger.error(f"Index FAISS non trouvé: {index_path}")
-                return None
+            # Paramètres de recherche réglés lors du build (nprobe, efSearch)
+            if index_info.get('type') == index_type:
+                parameters = faiss.ParameterSpace()
+                for name, value in index_info.get('search_params', {}).items():
+                    parameters.set_index_parameter(index, name, value)
             
-            index = faiss.read_index(index_path)
+            # Vecteurs stockés en memory-map (re-scoring exact, similar-by-id, diversification) :
+            # lus à la demande depuis le cache de pages, sans copie dans l'index
+            embeddings = None
+            embeddings_path = os.path.join(lang_dir, "embeddings.npy")
+            if os.path.exists(embeddings_path):
+                embeddings = np.load(embeddings_path, mmap_mode='r')
+                if embeddings.shape[0] != len(metadata['data_info']['questions']):
+                    logger.warning(f"embeddings.npy incohérent avec les métadonnées ({embeddings.shape[0]} lignes), ignoré")
+                    embeddings = None
+            
+            # Tier statique optionnel (quality=fast)
+            static_index_path = os.path.join(lang_dir, "faiss_index_static.idx")
+            static_tier = None
+            if os.path.exists(static_index_path):
+                static_tier = {
+                    'index': faiss.read_index(static_index_path),
+                    'encoder': StaticEncoder(lang_dir),
+                    'resident_bytes': os.path.getsize(static_index_path)
+                        + os.path.getsize(os.path.join(lang_dir, "static_token_embeddings.npy"))
+                }
             
             # Créer le moteur
             engine = {
@@ -78,17 +341,31 @@ class EmbeddingLoader:
                 'commentaires': metadata['data_info']['commentaires'],
                 'entreprises': metadata['data_info']['entreprises'],
                 'annees': metadata['data_info']['annees'],
-                'embedding_model': self.embedding_model
+                'embedding_model': self.embedding_model,
+                'corpus': corpus or DEFAULT_CORPUS,
+                'language': language,
+                'index_type': index_type,
+                'shards': shards,
+                'embeddings': embeddings,
+                'version': version,
+                # Estimation de l'empreinte mémoire à partir de la taille des artefacts
+                'resident_bytes': index_bytes + metadata['disk_bytes']
+                    + (static_tier['resident_bytes'] if static_tier else 0),
+                'static': static_tier
             }
             
-            logger.info(f"✅ Moteur {language} chargé: {len(engine['questions'])} questions")
+            logger.info(f"✅ Moteur {language} ({engine['corpus']}) chargé: {len(engine['questions'])} questions"
+                        + (f" (version {version})" if version else ""))
             return engine
             
+        except BundleError as e:
+            logger.error(f"Bundle du moteur {language} refusé: {e}")
+            return None
         except Exception as e:
             logger.error(f"Erreur lors du chargement du moteur {language}: {e}")
             return None
     
-    def load_all_engines(self, languages: List[str] = None, index_type: str = "flat") -> Dict:
+    def load_all_engines(self, languages: List[str] = None, index_type: str = "auto") -> Dict:
         """
         Charge tous les moteurs pour les langues spécifiées
         
@@ -113,7 +390,28 @@ class EmbeddingLoader:
         logger.info(f"🎉 {len(engines)} moteurs chargés: {list(engines.keys())}")
         return engines
     
-    def search(self, engine: Dict, query: str, top_k: int = 5, year_weighted: bool = False) -> List[Dict]:
+    def applied_diversity(self, engine: Dict, diversity: float, quality: str = "full") -> float:
+        """
+        Poids de diversification effectivement appliqué par search / similar_by_id
+        
+        La MMR re-score les candidats avec les vecteurs stockés du modèle complet : elle
+        est ignorée (0) sans embeddings.npy, avec rescore_factor <= 1 ou en quality="fast".
+        
+        Args:
+            engine: Moteur chargé
+            diversity: Poids demandé
+            quality: "full" ou "fast"
+            
+        Returns:
+            float: Poids appliqué
+        """
+        fast = quality == "fast" and engine.get('static')
+        if fast or engine.get('embeddings') is None or self.rescore_factor <= 1:
+            return 0.0
+        return diversity
+    
+    def search(self, engine: Dict, query: str, top_k: int = 5, year_weighted: bool = False,
+               quality: str = "full", diversity: float = 0.0) -> List[Dict]:
         """
         Effectue une recherche dans un moteur chargé
         
@@ -122,19 +420,137 @@ class EmbeddingLoader:
             query: Requête de recherche
             top_k: Nombre de résultats à retourner
             year_weighted: Si True, applique une pondération temporelle
+            quality: "full" (modèle complet) ou "fast" (tier statique, si disponible)
+            diversity: Poids de la diversification MMR entre 0 (aucune) et 1 (nécessite embeddings.npy)
             
         Returns:
             list: Liste des résultats
         """
-        # Encoder la requête
-        query_embedding = self.embedding_model.encode([query], convert_to_numpy=True)
+        fast = quality == "fast" and engine.get('static')
+        if fast:
+            encoder = engine['static']['encoder']
+            index = engine['static']['index']
+        else:
+            encoder = self.embedding_model
+            index = engine['index']
+        
+        # Encoder la requête (tokenisation mise en cache, puis passe avant)
+        start = time.perf_counter()
+        features = encoder.tokenize_cached(query)
+        tokenized = time.perf_counter()
+        query_embedding = encoder.forward(features)
+        encoded = time.perf_counter()
         faiss.normalize_L2(query_embedding)
         
-        # Recherche dans l'index
-        distances, indices = engine['index'].search(query_embedding, top_k)
-        indices = indices[0]
-        distances = distances[0]
+        self.latency.record(f"{encoder.backend}.tokenize", (tokenized - start) * 1000)
+        self.latency.record(f"{encoder.backend}.forward", (encoded - tokenized) * 1000)
+        
+        # Les vecteurs stockés ne correspondent qu'à l'espace du modèle complet
+        vectors = None if fast else engine.get('embeddings')
+        indices, scores = self._rank(engine, index, query_embedding, top_k, vectors, diversity,
+                                     stage=encoder.backend)
+        return self._build_results(engine, indices, scores, year_weighted)
+    
+    def similar_by_id(self, engine: Dict, row_id: int, top_k: int = 5, diversity: float = 0.0) -> List[Dict]:
+        """
+        Recherche les questions les plus proches d'une question du corpus
+        
+        Le vecteur de la question est lu dans embeddings.npy (memory-map), sans ré-encodage.
+        
+        Args:
+            engine: Moteur chargé (avec embeddings.npy)
+            row_id: Identifiant de la question (champ "id" des résultats)
+            top_k: Nombre de résultats à retourner
+            diversity: Poids de la diversification MMR entre 0 et 1
+            
+        Returns:
+            list: Liste des résultats (la question elle-même exclue)
+            
+        Raises:
+            ValueError: Si les vecteurs ne sont pas disponibles ou si l'identifiant est invalide
+        """
+        vectors = engine.get('embeddings')
+        if vectors is None:
+            raise ValueError("Vecteurs stockés (embeddings.npy) non disponibles pour ce moteur")
+        if not 0 <= row_id < vectors.shape[0]:
+            raise ValueError(f"Identifiant hors limites: {row_id}")
+        
+        query_embedding = np.ascontiguousarray(vectors[row_id:row_id + 1], dtype=np.float32)
+        indices, scores = self._rank(engine, engine['index'], query_embedding, top_k, vectors, diversity,
+                                     stage="similar", exclude=row_id)
+        return self._build_results(engine, indices, scores, year_weighted=False)
+    
+    def _rank(self, engine: Dict, index, query_embedding: np.ndarray, top_k: int,
+              vectors: Optional[np.ndarray], diversity: float, stage: str, exclude: Optional[int] = None):
+        """
+        Recherche les candidats dans l'index puis les re-score et diversifie si possible
+        
+        Si les vecteurs sont disponibles, les candidats d'un index approché (ou ceux à
+        diversifier) sont récupérés en plus grand nombre (rescore_factor) puis re-scorés
+        exactement par produit scalaire avec les vecteurs stockés.
+        
+        Args:
+            engine: Moteur chargé
+            index: Index FAISS interrogé
+            query_embedding: Requête normalisée (1, dim)
+            top_k: Nombre de résultats à retourner
+            vectors: Vecteurs stockés (memmap) ou None
+            diversity: Poids de la diversification MMR entre 0 et 1
+            stage: Préfixe des latences enregistrées
+            exclude: Identifiant à exclure des résultats
+            
+        Returns:
+            tuple: (identifiants, scores)
+        """
+        approximate = engine.get('index_type', "flat") != "flat"
+        refine = vectors is not None and self.rescore_factor > 1 and (approximate or diversity > 0)
+        fetch = top_k * self.rescore_factor if refine else top_k
+        if exclude is not None:
+            fetch += 1
         
+        start = time.perf_counter()
+        distances, indices = index.search(query_embedding, fetch)
+        searched = time.perf_counter()
+        self.latency.record(f"{stage}.faiss_search", (searched - start) * 1000)
+        
+        keep = indices[0] >= 0
+        if exclude is not None:
+            keep &= indices[0] != exclude
+        indices = indices[0][keep]
+        scores = distances[0][keep]
+        
+        if not refine or not len(indices):
+            return indices[:top_k], scores[:top_k]
+        
+        # Re-scoring exact à partir des vecteurs stockés (lecture des seules lignes candidates)
+        order = np.argsort(indices)
+        candidates = np.asarray(vectors[indices[order]], dtype=np.float32)
+        indices = indices[order]
+        scores = candidates @ query_embedding[0]
+        ranking = np.argsort(-scores)
+        indices, scores, candidates = indices[ranking], scores[ranking], candidates[ranking]
+        
+        if diversity > 0:
+            selected = mmr_select(scores, candidates, top_k, diversity)
+            indices, scores = indices[selected], scores[selected]
+        
+        self.latency.record(f"{stage}.rescore", (time.perf_counter() - searched) * 1000)
+        return indices[:top_k], scores[:top_k]
+    
+    def _build_results(self, engine: Dict, indices: np.ndarray, distances: np.ndarray,
+                       year_weighted: bool = False) -> List[Dict]:
+        """
+        Construit les résultats à partir des identifiants et des scores
+        
+        Args:
+            engine: Moteur chargé
+            indices: Identifiants des questions
+            distances: Scores de similarité
+            year_weighted: Si True, applique une pondération temporelle
+            
+        Returns:
+            list: Liste des résultats
+        """
         results = []
         
         # Préparation du scoring pondéré par l'année
@@ -169,6 +585,7 @@ class EmbeddingLoader:
                 final_score = base_score
             
             result = {
+                "id": int(idx),
                 "entreprise": engine['entreprises'][idx] if idx < len(engine['entreprises']) else "",
                 "question": engine['questions'][idx],
                 "reponse": engine['reponses'][idx] if idx < len(engine['reponses']) else "",
@@ -219,7 +636,7 @@ class EmbeddingLoader:
 
 def load_engines_from_precomputed(embeddings_dir: str = "embeddings", 
                                 languages: List[str] = None, 
-                                index_type: str = "flat") -> Dict:
+                                index_type: str = "auto") -> Dict:
     """
     Fonction utilitaire pour charger les moteurs depuis les embeddings pré-calculés
     
@@ -243,7 +660,7 @@ def main():
                        help="Répertoire des embeddings pré-calculés")
     parser.add_argument("--languages", nargs="+", default=["fr", "en"], 
                        help="Langues à charger")
-    parser.add_argument("--index_type", type=str, default="flat", 
+    parser.add_argument("--index_type", type=str, default="auto", 
                        help="Type d'index FAISS")
     parser.add_argument("--query", type=str, default="sécurité informatique", 
                        help="Requête de test")
@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Encodeurs de requêtes pour le moteur de recherche sémantique
+Backend PyTorch (SentenceTransformer) ou ONNX Runtime (export optionnellement quantifié en int8)
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BACKENDS = ("torch", "onnx")
+
+# Phrases de référence pour le contrôle de parité ONNX / PyTorch
+PARITY_SENTENCES = [
+    "Chiffrez-vous vos disques ?",
+    "Disposez-vous d'une politique de sécurité des systèmes d'information ?",
+    "Les accès administrateurs sont-ils protégés par une authentification multifacteur ?",
+    "Do you encrypt your disks?",
+    "Do you perform regular penetration tests on your infrastructure?",
+    "How are security incidents reported and handled?"
+]
+
+class QueryEncoder:
+    """Interface commune des encodeurs : tokenisation puis passe avant du modèle"""
+
+    backend = None
+
+    def __init__(self, cache_size: int = 0):
+        """
+        Args:
+            cache_size: Nombre de requêtes tokenisées conservées en cache (0 = désactivé)
+        """
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._token_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def tokenize_cached(self, text: str) -> Dict:
+        """
+        Tokenise un texte unique en passant par le cache LRU
+
+        Args:
+            text: Requête à tokeniser
+
+        Returns:
+            dict: Entrées du modèle (batch de taille 1)
+        """
+        if not self.cache_size:
+            return self.tokenize([text])
+
+        with self._cache_lock:
+            features = self._token_cache.get(text)
+            if features is not None:
+                self._token_cache.move_to_end(text)
+                self.cache_hits += 1
+                return features
+            self.cache_misses += 1
+
+        features = self.tokenize([text])
+
+        with self._cache_lock:
+            self._token_cache[text] = features
+            while len(self._token_cache) > self.cache_size:
+                self._token_cache.popitem(last=False)
+        return features
+
+    def tokenize(self, texts: List[str]) -> Dict:
+        """Tokenise une liste de textes"""
+        raise NotImplementedError
+
+    def forward(self, features: Dict) -> np.ndarray:
+        """Calcule les embeddings (float32) à partir des textes tokenisés"""
+        raise NotImplementedError
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode une liste de textes
+
+        Args:
+            texts: Textes à encoder
+
+        Returns:
+            numpy.ndarray: Embeddings non normalisés (float32)
+        """
+        return self.forward(self.tokenize(texts))
+
+class TorchEncoder(QueryEncoder):
+    """Encodeur PyTorch basé sur SentenceTransformer"""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str, max_seq_length: Optional[int] = None, cache_size: int = 0):
+        """
+        Args:
+            model_name: Nom du modèle Sentence Transformers
+            max_seq_length: Longueur maximale des requêtes en tokens (None = valeur du modèle)
+            cache_size: Taille du cache de tokenisation
+        """
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        super().__init__(cache_size)
+        self._torch = torch
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.model.eval()
+        if max_seq_length:
+            self.model.max_seq_length = min(max_seq_length, self.model.max_seq_length)
+        self.max_seq_length = self.model.max_seq_length
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def tokenize(self, texts: List[str]) -> Dict:
+        return self.model.tokenize(texts)
+
+    def forward(self, features: Dict) -> np.ndarray:
+        features = {name: tensor.to(self.model.device) for name, tensor in features.items()}
+        with self._torch.no_grad():
+            output = self.model(features)
+        return output["sentence_embedding"].cpu().numpy().astype(np.float32)
+
+class OnnxEncoder(QueryEncoder):
+    """Encodeur ONNX Runtime (tokenizer Rust + modèle exporté, sans dépendance à torch)"""
+
+    backend = "onnx"
+
+    def __init__(self, export_dir: str, quantized: bool = False,
+                 max_seq_length: Optional[int] = None, cache_size: int = 0):
+        """
+        Args:
+            export_dir: Répertoire produit par export_onnx_model
+            quantized: Si True, utilise le modèle quantifié en int8
+            max_seq_length: Longueur maximale des requêtes en tokens (None = valeur du modèle)
+            cache_size: Taille du cache de tokenisation
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        super().__init__(cache_size)
+
+        with open(os.path.join(export_dir, "encoder_config.json"), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        self.model_name = self.config["model_name"]
+        self.dimension = self.config.get("embedding_dimension")
+        self.quantized = quantized
+        model_file = "model_int8.onnx" if quantized else "model.onnx"
+        model_path = os.path.join(export_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Modèle ONNX non trouvé: {model_path}")
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(export_dir, "tokenizer.json"))
+        self.max_seq_length = min(max_seq_length or self.config["max_seq_length"], self.config["max_seq_length"])
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+    def tokenize(self, texts: List[str]) -> Dict:
+        encodings = self.tokenizer.encode_batch(texts)
+        return {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        }
+
+    def forward(self, features: Dict) -> np.ndarray:
+        (embeddings,) = self.session.run(["sentence_embedding"], features)
+        return embeddings.astype(np.float32)
+
+class StaticEncoder(QueryEncoder):
+    """
+    Encodeur statique (tier "fast") : moyenne NumPy d'embeddings de tokens distillés
+    
+    Les artefacts (static_token_ids.npy, static_token_embeddings.npy, tokenizer.json)
+    sont produits par EmbeddingCalculator.build_static_tier. Les tokens absents de la
+    table distillée sont ignorés.
+    """
+
+    backend = "static"
+
+    def __init__(self, lang_dir: str):
+        """
+        Args:
+            lang_dir: Répertoire des artefacts d'un moteur
+        """
+        from tokenizers import Tokenizer
+
+        super().__init__()
+        self.tokenizer = Tokenizer.from_file(os.path.join(lang_dir, "tokenizer.json"))
+        self.tokenizer.no_truncation()
+        self.tokenizer.no_padding()
+        self.token_ids = np.load(os.path.join(lang_dir, "static_token_ids.npy"))
+        self.table = np.load(os.path.join(lang_dir, "static_token_embeddings.npy"))
+
+    def tokenize(self, texts: List[str]) -> Dict:
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return {"input_ids": [np.asarray(e.ids, dtype=np.int64) for e in encodings]}
+
+    def forward(self, features: Dict) -> np.ndarray:
+        embeddings = np.zeros((len(features["input_ids"]), self.table.shape[1]), dtype=np.float32)
+        for i, ids in enumerate(features["input_ids"]):
+            positions = np.searchsorted(self.token_ids, ids).clip(max=len(self.token_ids) - 1)
+            positions = positions[self.token_ids[positions] == ids]
+            if len(positions):
+                embeddings[i] = self.table[positions].mean(axis=0)
+        return embeddings
+
+def export_onnx_model(model_name: str, export_dir: str, quantize: bool = False, opset: int = 14) -> str:
+    """
+    Exporte un modèle Sentence Transformers (transformer + mean pooling) au format ONNX
+
+    Args:
+        model_name: Nom du modèle Sentence Transformers
+        export_dir: Répertoire de sortie
+        quantize: Si True, produit aussi une version quantifiée dynamiquement en int8
+        opset: Version d'opset ONNX
+
+    Returns:
+        str: Répertoire d'export
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    logger.info(f"Export ONNX du modèle {model_name} vers {export_dir}...")
+    os.makedirs(export_dir, exist_ok=True)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    modules = list(model)
+    if len(modules) != 2 or not getattr(modules[1], "pooling_mode_mean_tokens", False):
+        raise ValueError(f"Export ONNX supporté uniquement pour transformer + mean pooling: {model_name}")
+
+    transformer = modules[0].auto_model
+    tokenizer = model.tokenizer
+
+    class MeanPooledTransformer(torch.nn.Module):
+        """Transformer suivi du mean pooling de SentenceTransformer"""
+
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask):
+            token_embeddings = self.auto_model(input_ids=input_ids, attention_mask=attention_mask)[0]
+            mask = attention_mask.unsqueeze(-1).to(token_embeddings.dtype)
+            return (token_embeddings * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+
+    wrapper = MeanPooledTransformer(transformer).eval()
+    dummy = tokenizer(PARITY_SENTENCES[:2], padding=True, return_tensors="pt")
+
+    model_path = os.path.join(export_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            model_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["sentence_embedding"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "sentence_embedding": {0: "batch"}
+            },
+            opset_version=opset
+        )
+
+    tokenizer.save_pretrained(export_dir)
+    config = {
+        "model_name": model_name,
+        "max_seq_length": model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "embedding_dimension": model.get_sentence_embedding_dimension(),
+        "opset": opset
+    }
+    with open(os.path.join(export_dir, "encoder_config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantized_path = os.path.join(export_dir, "model_int8.onnx")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        logger.info(f"Modèle quantifié int8 sauvegardé: {quantized_path}")
+
+    logger.info(f"✅ Modèle ONNX exporté: {model_path}")
+    return export_dir
+
+def check_parity(encoder: QueryEncoder, reference: QueryEncoder,
+                 texts: List[str] = None, tolerance: float = 0.02) -> Dict:
+    """
+    Compare les embeddings de deux encodeurs (dérive cosinus)
+
+    Args:
+        encoder: Encodeur à valider
+        reference: Encodeur de référence (PyTorch)
+        texts: Phrases de test (par défaut: PARITY_SENTENCES)
+        tolerance: Dérive maximale admise (1 - similarité cosinus)
+
+    Returns:
+        dict: Dérive maximale, dérive moyenne et résultat du contrôle
+    """
+    texts = texts or PARITY_SENTENCES
+    candidate = encoder.encode(texts)
+    expected = reference.encode(texts)
+
+    candidate /= np.linalg.norm(candidate, axis=1, keepdims=True)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    drift = 1.0 - np.sum(candidate * expected, axis=1)
+
+    return {
+        "max_cosine_drift": float(drift.max()),
+        "mean_cosine_drift": float(drift.mean()),
+        "tolerance": tolerance,
+        "passed": bool(drift.max() <= tolerance)
+    }
+
+def create_encoder(backend: str = "torch",
+                   model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
+                   onnx_dir: Optional[str] = None,
+                   quantize: bool = False,
+                   parity_tolerance: float = 0.02,
+                   max_seq_length: Optional[int] = None,
+                   cache_size: int = 0) -> QueryEncoder:
+    """
+    Crée l'encodeur de requêtes demandé
+
+    Pour le backend ONNX, le modèle est exporté s'il n'existe pas encore dans onnx_dir,
+    puis comparé au modèle PyTorch si celui-ci est disponible. En cas de dérive
+    supérieure à la tolérance, l'encodeur PyTorch est utilisé à la place.
+
+    Args:
+        backend: "torch" ou "onnx"
+        model_name: Nom du modèle Sentence Transformers
+        onnx_dir: Répertoire de l'export ONNX
+        quantize: Si True, utilise le modèle quantifié en int8
+        parity_tolerance: Dérive cosinus maximale admise pour le backend ONNX
+        max_seq_length: Longueur maximale des requêtes en tokens (troncature)
+        cache_size: Taille du cache de tokenisation des requêtes
+
+    Returns:
+        QueryEncoder: Encodeur prêt à l'emploi
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Backend d'encodage non supporté: {backend} (attendu: {', '.join(ENCODER_BACKENDS)})")
+
+    if backend == "torch":
+        logger.info(f"Chargement du modèle Sentence Transformers {model_name} pour les requêtes...")
+        return TorchEncoder(model_name, max_seq_length=max_seq_length, cache_size=cache_size)
+
+    onnx_dir = onnx_dir or os.path.join("models", "onnx", model_name.replace("/", "_"))
+    model_file = "model_int8.onnx" if quantize else "model.onnx"
+    if not os.path.exists(os.path.join(onnx_dir, model_file)):
+        export_onnx_model(model_name, onnx_dir, quantize=quantize)
+
+    logger.info(f"Chargement du modèle ONNX{' int8' if quantize else ''} depuis {onnx_dir}...")
+    encoder = OnnxEncoder(onnx_dir, quantized=quantize, max_seq_length=max_seq_length, cache_size=cache_size)
+
+    try:
+        reference = TorchEncoder(model_name, max_seq_length=max_seq_length, cache_size=cache_size)
+    except ImportError:
+        logger.warning("sentence-transformers non installé: contrôle de parité ONNX ignoré")
+        return encoder
+
+    parity = check_parity(encoder, reference, tolerance=parity_tolerance)
+    encoder.parity = parity
+    if not parity["passed"]:
+        logger.error(
+            f"Dérive cosinus ONNX trop élevée ({parity['max_cosine_drift']:.4f} > {parity_tolerance}), "
+            f"utilisation du backend torch"
+        )
+        return reference
+
+    logger.info(f"✅ Parité ONNX/PyTorch validée (dérive max {parity['max_cosine_drift']:.5f})")
+    return encoder
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Registre des moteurs de recherche par corpus et par langue
+Charge les moteurs à la demande et les évince (LRU) pour respecter un budget mémoire
+"""
+
+import re
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Corpus servi par défaut (artefacts directement sous embeddings_dir/<langue>)
+DEFAULT_CORPUS = "default"
+
+# Noms de corpus autorisés (évite toute traversée de répertoire)
+CORPUS_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# Requêtes synthétiques de préchauffage (longueurs variées pour couvrir plusieurs tailles de batch)
+WARMUP_QUERIES = {
+    "fr": [
+        "Chiffrez-vous vos disques ?",
+        "Disposez-vous d'une politique de sécurité des systèmes d'information validée par la direction et revue annuellement ?",
+        "Comment gérez-vous les sauvegardes, leur chiffrement, leur externalisation et les tests de restauration réguliers ?"
+    ],
+    "en": [
+        "Do you encrypt your disks?",
+        "Do you have an information security policy approved by management and reviewed at least once a year?",
+        "How do you manage backups, their encryption, off-site storage and regular restoration tests?"
+    ]
+}
+
+# Valeur de allowed_corpora donnant accès à tous les corpus
+ALL_CORPORA = "*"
+
+def is_corpus_allowed(user_info: Optional[dict], corpus: str) -> bool:
+    """
+    Vérifie qu'un utilisateur a accès à un corpus
+
+    Args:
+        user_info: Informations utilisateur retournées par verify_api_token (None si anonyme)
+        corpus: Nom du corpus demandé
+
+    Returns:
+        bool: True si l'accès est autorisé
+    """
+    if corpus == DEFAULT_CORPUS:
+        return True
+    if not user_info:
+        return False
+    if user_info.get("is_admin", False):
+        return True
+    allowed = user_info.get("allowed_corpora") or [DEFAULT_CORPUS]
+    return ALL_CORPORA in allowed or corpus in allowed
+
+class EngineRegistry:
+    """Registre des moteurs chargés, indexé par (corpus, langue), avec éviction LRU"""
+
+    def __init__(self, loader, memory_budget_mb: Optional[float] = None,
+                 languages: List[str] = None, index_type: str = "auto"):
+        """
+        Initialise le registre
+
+        Args:
+            loader: EmbeddingLoader utilisé pour charger les moteurs
+            memory_budget_mb: Budget mémoire total des moteurs en Mo (None = illimité)
+            languages: Langues servies (par défaut: fr, en)
+            index_type: Type d'index FAISS à charger ("auto" : type retenu lors du build)
+        """
+        self.loader = loader
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self.languages = languages or ["fr", "en"]
+        self.index_type = index_type
+
+        self._engines: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.RLock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+        self.counters = {
+            "loads": 0,
+            "load_failures": 0,
+            "evictions": 0,
+            "hits": 0,
+            "misses": 0
+        }
+
+    def preload(self, corpus: str = DEFAULT_CORPUS, pin: bool = False) -> Dict[str, Dict]:
+        """
+        Charge tous les moteurs d'un corpus
+
+        Args:
+            corpus: Nom du corpus
+            pin: Si True, les moteurs ne sont jamais évincés
+
+        Returns:
+            dict: Moteurs chargés par langue
+        """
+        engines = {}
+        for lang in self.languages:
+            engine = self.get(corpus, lang)
+            if engine:
+                engines[lang] = engine
+                if pin:
+                    with self._lock:
+                        self._pinned.add((corpus, lang))
+        return engines
+
+    def get(self, corpus: str, language: str) -> Optional[Dict]:
+        """
+        Récupère un moteur, en le chargeant si nécessaire
+
+        Args:
+            corpus: Nom du corpus
+            language: Code de langue
+
+        Returns:
+            dict: Moteur chargé ou None s'il n'existe pas
+        """
+        if not isinstance(corpus, str) or not isinstance(language, str):
+            return None
+        if not CORPUS_NAME_PATTERN.match(corpus) or language not in self.languages:
+            return None
+
+        key = (corpus, language)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self._engines.move_to_end(key)
+                self.counters["hits"] += 1
+                return engine
+            self.counters["misses"] += 1
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Un seul chargement par clé, sans bloquer les autres moteurs
+        with load_lock:
+            with self._lock:
+                engine = self._engines.get(key)
+                if engine is not None:
+                    self._engines.move_to_end(key)
+                    return engine
+
+            engine = self.loader.load_language_engine(language, self.index_type, corpus=corpus)
+
+            with self._lock:
+                if engine is None:
+                    self.counters["load_failures"] += 1
+                    return None
+                self._engines[key] = engine
+                self.counters["loads"] += 1
+                self._enforce_budget(keep=key)
+
+            return engine
+
+    def resolve(self, corpus: str, language: str, fallback: str = "en") -> Tuple[str, Optional[Dict]]:
+        """
+        Récupère le moteur d'une langue, avec repli sur une langue par défaut
+
+        Args:
+            corpus: Nom du corpus
+            language: Langue détectée
+            fallback: Langue utilisée si aucun moteur n'existe pour la langue détectée
+
+        Returns:
+            tuple: (langue effectivement utilisée, moteur ou None)
+        """
+        engine = self.get(corpus, language)
+        if engine is None and language != fallback:
+            return fallback, self.get(corpus, fallback)
+        return language, engine
+
+    def warmup(self, rounds: int = 2, top_k: int = 5) -> Dict[str, float]:
+        """
+        Préchauffe les moteurs chargés avec des requêtes synthétiques
+        
+        Initialise le tokenizer, les noyaux torch et les pages de l'index FAISS
+        avant que le serveur ne se déclare prêt.
+
+        Args:
+            rounds: Nombre de passages sur les requêtes synthétiques
+            top_k: Nombre de résultats demandés par requête
+
+        Returns:
+            dict: Durée du préchauffage (secondes) par moteur "corpus/langue"
+        """
+        with self._lock:
+            resident = list(self._engines.items())
+
+        durations = {}
+        for (corpus, lang), engine in resident:
+            queries = WARMUP_QUERIES.get(lang, WARMUP_QUERIES["en"])
+            start = time.time()
+            for _ in range(rounds):
+                for query in queries:
+                    self.loader.search(engine, query, top_k=top_k)
+                    if engine.get('static'):
+                        self.loader.search(engine, query, top_k=top_k, quality="fast")
+            durations[f"{corpus}/{lang}"] = time.time() - start
+            logger.info(f"🔥 Moteur {lang} ({corpus}) préchauffé en {durations[f'{corpus}/{lang}']:.2f}s")
+
+        return durations
+
+    def reload(self, corpus: str, language: str) -> bool:
+        """
+        Recharge un moteur depuis le disque (nouvelle version publiée)
+        
+        Le nouveau moteur est chargé avant de remplacer l'ancien : les recherches en
+        cours continuent d'être servies par l'ancienne version pendant le chargement.
+
+        Args:
+            corpus: Nom du corpus
+            language: Code de langue
+
+        Returns:
+            bool: True si le moteur a été rechargé
+        """
+        key = (corpus, language)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            engine = self.loader.load_language_engine(language, self.index_type, corpus=corpus)
+            with self._lock:
+                if engine is None:
+                    self.counters["load_failures"] += 1
+                    return False
+                self._engines[key] = engine
+                self._engines.move_to_end(key)
+                self.counters["loads"] += 1
+                self._enforce_budget(keep=key)
+        logger.info(f"🔄 Moteur {language} ({corpus}) rechargé (version {engine.get('version')})")
+        return True
+
+    def evict(self, corpus: str, language: str) -> bool:
+        """Retire un moteur du registre"""
+        with self._lock:
+            key = (corpus, language)
+            if key not in self._engines:
+                return False
+            del self._engines[key]
+            self._pinned.discard(key)
+            self.counters["evictions"] += 1
+            logger.info(f"♻️  Moteur {language} ({corpus}) évincé")
+            return True
+
+    def _enforce_budget(self, keep: Tuple[str, str]):
+        """Évince les moteurs les moins récemment utilisés jusqu'à respecter le budget"""
+        if self.memory_budget_bytes is None:
+            return
+
+        for key in list(self._engines.keys()):
+            if self.resident_bytes <= self.memory_budget_bytes:
+                break
+            if key == keep or key in self._pinned:
+                continue
+            del self._engines[key]
+            self.counters["evictions"] += 1
+            logger.info(f"♻️  Moteur {key[1]} ({key[0]}) évincé (budget mémoire)")
+
+        if self.resident_bytes > self.memory_budget_bytes:
+            logger.warning(
+                f"Budget mémoire dépassé: {self.resident_bytes} octets résidents "
+                f"pour un budget de {self.memory_budget_bytes} octets"
+            )
+
+    @property
+    def resident_bytes(self) -> int:
+        """Empreinte mémoire estimée des moteurs chargés"""
+        with self._lock:
+            return sum(engine.get('resident_bytes', 0) for engine in self._engines.values())
+
+    def engines(self, corpus: str = DEFAULT_CORPUS) -> Dict[str, Dict]:
+        """
+        Retourne les moteurs actuellement chargés pour un corpus
+
+        Args:
+            corpus: Nom du corpus
+
+        Returns:
+            dict: Moteurs chargés par langue
+        """
+        with self._lock:
+            return {lang: engine for (c, lang), engine in self._engines.items() if c == corpus}
+
+    def get_stats(self) -> Dict:
+        """
+        Statistiques du registre (chargements, évictions, mémoire résidente)
+
+        Returns:
+            dict: Statistiques
+        """
+        with self._lock:
+            resident = [
+                {
+                    "corpus": corpus,
+                    "language": lang,
+                    "questions": len(engine['questions']),
+                    "index_type": engine.get('index_type'),
+                    "version": engine.get('version'),
+                    "resident_bytes": engine.get('resident_bytes', 0),
+                    "pinned": (corpus, lang) in self._pinned
+                }
+                for (corpus, lang), engine in self._engines.items()
+            ]
+            return {
+                **self.counters,
+                "resident_bytes": self.resident_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "resident_engines": resident,
+                "available_corpora": self.loader.list_corpora(self.languages)
+            }
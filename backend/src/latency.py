@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Suivi des latences par étape de la recherche (tokenisation, passe avant, recherche FAISS)
+"""
+
+import threading
+from collections import deque
+from typing import Dict
+
+import numpy as np
+
+class LatencyTracker:
+    """Fenêtre glissante des dernières latences mesurées, par étape"""
+
+    def __init__(self, window: int = 2000):
+        """
+        Args:
+            window: Nombre de mesures conservées par étape
+        """
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, duration_ms: float):
+        """Enregistre une mesure (en millisecondes) pour une étape"""
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(duration_ms)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Percentiles des latences par étape
+
+        Returns:
+            dict: {étape: {count, mean, p50, p95, p99, max}} en millisecondes
+        """
+        with self._lock:
+            samples = {stage: np.fromiter(values, dtype=np.float64) for stage, values in self._samples.items()}
+
+        stats = {}
+        for stage, values in samples.items():
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stats[stage] = {
+                "count": int(len(values)),
+                "mean": round(float(values.mean()), 3),
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(values.max()), 3)
+            }
+        return stats
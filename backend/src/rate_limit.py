@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Limitation de débit et quotas journaliers des recherches
+Un seau à jetons par client (utilisateur authentifié ou adresse IP) absorbe les rafales,
+un compteur journalier borne le volume ; tout est tenu en mémoire et les compteurs
+journaliers sont sauvegardés périodiquement sur disque
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RatePolicy:
+    """Débit, rafale et quota journalier d'une catégorie de clients"""
+
+    def __init__(self, rate_per_minute: float, burst: int, daily_quota: int):
+        """
+        Args:
+            rate_per_minute: Recherches autorisées par minute en régime établi (0 = illimité)
+            burst: Taille du seau (recherches consécutives autorisées)
+            daily_quota: Recherches autorisées par jour UTC (0 = illimité)
+        """
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.daily_quota = daily_quota
+
+    def as_dict(self) -> Dict:
+        return {
+            "rate_per_minute": round(self.rate_per_second * 60.0, 3),
+            "burst": self.burst,
+            "daily_quota": self.daily_quota
+        }
+
+class UsageLimiter:
+    """Seaux à jetons et quotas journaliers par clé ("user:<id>" ou "ip:<adresse>")"""
+
+    def __init__(self, policies: Dict[str, RatePolicy], state_path: Optional[str] = None):
+        """
+        Initialise le limiteur
+
+        Args:
+            policies: Politique par catégorie de clé ("user", "ip")
+            state_path: Fichier JSON de sauvegarde des compteurs journaliers (None = mémoire seule)
+        """
+        self.policies = policies
+        self.state_path = state_path
+        self._clients: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.rejections = {"rate": 0, "quota": 0}
+        self.load()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.utcnow().strftime("%Y-%m-%d")
+
+    @staticmethod
+    def _seconds_until_midnight() -> float:
+        now = datetime.utcnow()
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (midnight - now).total_seconds()
+
+    def _client(self, key: str, policy: RatePolicy, now: float, today: str) -> Dict:
+        """État d'une clé (seau rempli à la création, compteur remis à zéro chaque jour)"""
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = {"tokens": float(policy.burst), "updated": now,
+                                           "day": today, "today": 0, "total": 0}
+        if client["day"] != today:
+            client["day"], client["today"] = today, 0
+        return client
+
+    def check(self, key: str, category: str) -> Tuple[bool, float, Optional[str]]:
+        """
+        Vérifie et comptabilise une recherche
+
+        Args:
+            key: Clé du client ("user:<id>" ou "ip:<adresse>")
+            category: Catégorie de politique ("user" ou "ip")
+
+        Returns:
+            tuple: (autorisée, délai avant nouvel essai en secondes, motif du refus: "rate" ou "quota")
+        """
+        policy = self.policies[category]
+        now = time.monotonic()
+        today = self._today()
+
+        with self._lock:
+            client = self._client(key, policy, now, today)
+
+            if policy.daily_quota and client["today"] >= policy.daily_quota:
+                self.rejections["quota"] += 1
+                return False, self._seconds_until_midnight(), "quota"
+
+            if policy.rate_per_second > 0:
+                client["tokens"] = min(float(policy.burst),
+                                       client["tokens"] + (now - client["updated"]) * policy.rate_per_second)
+                client["updated"] = now
+                if client["tokens"] < 1.0:
+                    self.rejections["rate"] += 1
+                    return False, (1.0 - client["tokens"]) / policy.rate_per_second, "rate"
+                client["tokens"] -= 1.0
+
+            client["today"] += 1
+            client["total"] += 1
+            return True, 0.0, None
+
+    def usage(self) -> Dict:
+        """
+        Consommation courante par clé
+
+        Returns:
+            dict: Politiques, refus et état de chaque clé (jetons disponibles, recherches du jour)
+        """
+        now = time.monotonic()
+        today = self._today()
+        clients = {}
+        with self._lock:
+            for key, client in self._clients.items():
+                policy = self.policies[key.split(":", 1)[0]]
+                tokens = client["tokens"]
+                if policy.rate_per_second > 0:
+                    tokens = min(float(policy.burst), tokens + (now - client["updated"]) * policy.rate_per_second)
+                requests_today = client["today"] if client["day"] == today else 0
+                clients[key] = {
+                    "tokens": round(tokens, 2),
+                    "requests_today": requests_today,
+                    "daily_quota": policy.daily_quota,
+                    "quota_remaining": max(policy.daily_quota - requests_today, 0) if policy.daily_quota else None,
+                    "total_requests": client["total"]
+                }
+            rejections = dict(self.rejections)
+        return {
+            "day": today,
+            "policies": {name: policy.as_dict() for name, policy in self.policies.items()},
+            "rejections": rejections,
+            "clients": clients
+        }
+
+    def prune(self):
+        """Oublie les clés inactives (seau plein et aucune recherche aujourd'hui)"""
+        now = time.monotonic()
+        today = self._today()
+        with self._lock:
+            for key in list(self._clients):
+                client = self._clients[key]
+                policy = self.policies[key.split(":", 1)[0]]
+                full = policy.rate_per_second <= 0 or \
+                    client["tokens"] + (now - client["updated"]) * policy.rate_per_second >= policy.burst
+                if full and client["day"] != today:
+                    del self._clients[key]
+
+    def save(self):
+        """Sauvegarde les compteurs journaliers (écriture atomique)"""
+        if not self.state_path:
+            return
+        with self._lock:
+            state = {
+                key: {"day": client["day"], "today": client["today"], "total": client["total"]}
+                for key, client in self._clients.items()
+            }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def load(self):
+        """Recharge les compteurs journaliers sauvegardés (seaux remplis)"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Compteurs de quotas illisibles ({self.state_path}): {e}")
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            for key, saved in state.items():
+                category = key.split(":", 1)[0]
+                if category not in self.policies:
+                    continue
+                self._clients[key] = {"tokens": float(self.policies[category].burst), "updated": now,
+                                      "day": saved["day"], "today": saved["today"], "total": saved["total"]}
+
+    async def run_persistence(self, interval: float):
+        """
+        Sauvegarde périodiquement les compteurs et oublie les clés inactives
+
+        Args:
+            interval: Intervalle entre deux sauvegardes (secondes)
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.prune()
+                await loop.run_in_executor(None, self.save)
+            except Exception as e:
+                logger.error(f"Erreur lors de la sauvegarde des quotas: {e}")
+
+def create_usage_limiter() -> UsageLimiter:
+    """Crée le limiteur des recherches à partir des variables d'environnement"""
+    return UsageLimiter(
+        {
+            "user": RatePolicy(
+                float(os.getenv("SEARCH_RATE_PER_MINUTE", "120")),
+                int(os.getenv("SEARCH_BURST", "30")),
+                int(os.getenv("SEARCH_DAILY_QUOTA", "20000"))
+            ),
+            "ip": RatePolicy(
+                float(os.getenv("PUBLIC_SEARCH_RATE_PER_MINUTE", "30")),
+                int(os.getenv("PUBLIC_SEARCH_BURST", "10")),
+                int(os.getenv("PUBLIC_SEARCH_DAILY_QUOTA", "1000"))
+            )
+        },
+        state_path=os.getenv("USAGE_STATE_PATH", "./search_usage.json") or None
+    )
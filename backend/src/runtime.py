@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Configuration des threads CPU pour torch, FAISS et l'exécuteur de recherche
+Évite la sur-souscription entre les threads intra-op de torch, OpenMP (FAISS) et les requêtes concurrentes
+"""
+
+import os
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# latency : nombreuses petites requêtes concurrentes (1 thread de calcul par requête)
+# throughput : peu de requêtes, gros batchs (tous les cœurs pour une seule requête)
+THREAD_MODES = ("latency", "throughput")
+
+def _env_int(name: str) -> Optional[int]:
+    """Lit un entier positif depuis l'environnement"""
+    value = os.getenv(name)
+    return int(value) if value and int(value) > 0 else None
+
+def resolve_thread_settings(mode: Optional[str] = None,
+                            torch_threads: Optional[int] = None,
+                            faiss_threads: Optional[int] = None,
+                            executor_workers: Optional[int] = None) -> Dict:
+    """
+    Calcule la répartition des threads à partir du mode et des surcharges explicites
+
+    Les arguments non fournis sont lus dans THREAD_MODE, TORCH_NUM_THREADS,
+    FAISS_NUM_THREADS et SEARCH_EXECUTOR_WORKERS, puis déduits du mode.
+
+    Args:
+        mode: "latency" ou "throughput"
+        torch_threads: Threads intra-op de torch
+        faiss_threads: Threads OpenMP de FAISS
+        executor_workers: Taille de l'exécuteur de recherche
+
+    Returns:
+        dict: Paramètres retenus
+    """
+    mode = mode or os.getenv("THREAD_MODE", "latency")
+    if mode not in THREAD_MODES:
+        raise ValueError(f"Mode de threads non supporté: {mode} (attendu: {', '.join(THREAD_MODES)})")
+
+    cpu_count = os.cpu_count() or 1
+    torch_threads = torch_threads or _env_int("TORCH_NUM_THREADS")
+    faiss_threads = faiss_threads or _env_int("FAISS_NUM_THREADS")
+    executor_workers = executor_workers or _env_int("SEARCH_EXECUTOR_WORKERS")
+
+    if mode == "latency":
+        defaults = {"torch_threads": 1, "faiss_threads": 1, "executor_workers": cpu_count}
+    else:
+        defaults = {"torch_threads": cpu_count, "faiss_threads": cpu_count, "executor_workers": 1}
+
+    return {
+        "mode": mode,
+        "cpu_count": cpu_count,
+        "torch_threads": torch_threads or defaults["torch_threads"],
+        "faiss_threads": faiss_threads or defaults["faiss_threads"],
+        "executor_workers": executor_workers or defaults["executor_workers"]
+    }
+
+def apply_thread_settings(settings: Dict) -> Dict:
+    """
+    Applique la répartition des threads à torch et FAISS
+
+    À appeler avant le chargement des modèles pour que OMP_NUM_THREADS soit pris en compte.
+    Le réglage OpenMP de FAISS ne vaut que pour le thread appelant : les threads de
+    l'exécuteur de recherche l'appliquent via init_search_thread.
+
+    Args:
+        settings: Paramètres retournés par resolve_thread_settings
+
+    Returns:
+        dict: Paramètres effectivement appliqués
+    """
+    os.environ.setdefault("OMP_NUM_THREADS", str(settings["faiss_threads"]))
+    os.environ.setdefault("MKL_NUM_THREADS", str(settings["torch_threads"]))
+
+    applied = dict(settings)
+
+    try:
+        import torch
+        torch.set_num_threads(settings["torch_threads"])
+        applied["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        applied["torch_threads"] = None
+
+    try:
+        import faiss
+        faiss.omp_set_num_threads(settings["faiss_threads"])
+        applied["faiss_threads"] = faiss.omp_get_max_threads()
+    except ImportError:
+        applied["faiss_threads"] = None
+
+    logger.info(
+        f"Threads ({applied['mode']}): torch={applied['torch_threads']}, "
+        f"faiss={applied['faiss_threads']}, exécuteur={applied['executor_workers']}"
+    )
+    return applied
+
+def init_search_thread(faiss_threads: int):
+    """
+    Initialiseur des threads de l'exécuteur de recherche
+
+    omp_set_num_threads ne s'applique qu'au thread appelant : chaque thread qui interroge
+    FAISS doit le fixer lui-même.
+
+    Args:
+        faiss_threads: Threads OpenMP de FAISS
+    """
+    try:
+        import faiss
+        faiss.omp_set_num_threads(faiss_threads)
+    except ImportError:
+        pass
+
+def faiss_thread_count() -> Optional[int]:
+    """Threads OpenMP de FAISS vus par le thread appelant (None si FAISS est absent)"""
+    try:
+        import faiss
+        return faiss.omp_get_max_threads()
+    except ImportError:
+        return None
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Écriture différée et groupée des logs de recherche
+Les requêtes déposent leurs logs dans une file bornée ; une tâche de fond les insère
+par lots (tous les N logs ou toutes les M millisecondes) et vide la file à l'arrêt.
+Quand la file sature, les logs sont échantillonnés puis abandonnés, avec des compteurs
+"""
+
+import random
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from src.auth.crud import SearchLogCRUD
+from src.auth.database import ASYNC_DB, SessionLocal, AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+class SearchLogWriter:
+    """File bornée de logs de recherche, insérés par lots en tâche de fond"""
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 200, flush_interval_ms: float = 500.0,
+                 high_watermark: float = 0.8, sample_rate: float = 0.1):
+        """
+        Initialise l'écrivain
+
+        Args:
+            max_queue: Nombre maximal de logs en attente (au-delà, les logs sont abandonnés)
+            batch_size: Nombre de logs déclenchant une insertion
+            flush_interval_ms: Délai maximal avant insertion d'un log (millisecondes)
+            high_watermark: Taux de remplissage à partir duquel les logs sont échantillonnés
+            sample_rate: Proportion des logs conservés au-delà de high_watermark
+        """
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.high_watermark = int(max_queue * high_watermark)
+        self.sample_rate = sample_rate
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.counters = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "sampled_out": 0,
+            "dropped": 0,
+            "write_errors": 0
+        }
+
+    def submit(self, user_id: Optional[int], query: str, language: str, results_count: int, response_time: int) -> bool:
+        """
+        Dépose un log de recherche dans la file (sans attente)
+
+        Returns:
+            bool: True si le log a été accepté
+        """
+        if self._queue is None:
+            self.counters["dropped"] += 1
+            return False
+
+        if self._queue.qsize() >= self.high_watermark and random.random() >= self.sample_rate:
+            self.counters["sampled_out"] += 1
+            return False
+
+        try:
+            self._queue.put_nowait({
+                "user_id": user_id,
+                "query": query,
+                "language": language,
+                "results_count": results_count,
+                "response_time": response_time,
+                "created_at": datetime.utcnow()
+            })
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            return False
+
+        self.counters["enqueued"] += 1
+        return True
+
+    def start(self):
+        """Lance la tâche d'écriture dans la boucle d'événements courante"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Demande l'arrêt de la tâche d'écriture et attend l'insertion des logs restants"""
+        if self._task is not None:
+            # Pas d'annulation : la tâche termine son lot en cours puis vide la file
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+        if self._queue is not None:
+            records = []
+            while not self._queue.empty():
+                records.append(self._queue.get_nowait())
+            for start in range(0, len(records), self.batch_size):
+                await self._write(records[start:start + self.batch_size])
+
+    async def _get(self, timeout: Optional[float]) -> Optional[Dict]:
+        """
+        Prochain log de la file
+
+        Args:
+            timeout: Attente maximale en secondes (None = jusqu'au prochain log ou à l'arrêt)
+
+        Returns:
+            dict: Log, None si le délai expire ou si l'arrêt est demandé et la file vide
+        """
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        if self._stopping.is_set():
+            return None
+
+        getter = asyncio.ensure_future(self._queue.get())
+        stopper = asyncio.ensure_future(self._stopping.wait())
+        done, pending = await asyncio.wait({getter, stopper}, timeout=timeout,
+                                           return_when=asyncio.FIRST_COMPLETED)
+        # Un get annulé laisse le log dans la file
+        for task in pending:
+            task.cancel()
+        return getter.result() if getter in done else None
+
+    async def _run(self):
+        """Regroupe les logs jusqu'à batch_size ou flush_interval puis les insère, jusqu'à l'arrêt"""
+        loop = asyncio.get_event_loop()
+        while True:
+            record = await self._get(None)
+            if record is None:
+                # Arrêt demandé et file vide
+                return
+
+            records = [record]
+            deadline = loop.time() + self.flush_interval
+            while len(records) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0 and self._queue.empty():
+                    break
+                record = await self._get(max(timeout, 0.0))
+                if record is None:
+                    break
+                records.append(record)
+            await self._write(records)
+
+    async def _write(self, records: List[Dict]):
+        """Insère un lot de logs"""
+        if not records:
+            return
+        try:
+            if ASYNC_DB:
+                async with AsyncSessionLocal() as db:
+                    await SearchLogCRUD.bulk_create_search_logs_async(db, records)
+            else:
+                await run_in_threadpool(self._write_sync, records)
+            self.counters["written"] += len(records)
+            self.counters["batches"] += 1
+        except Exception as e:
+            self.counters["write_errors"] += len(records)
+            logger.error(f"Erreur lors de l'écriture de {len(records)} log(s) de recherche: {e}")
+
+    @staticmethod
+    def _write_sync(records: List[Dict]):
+        db = SessionLocal()
+        try:
+            SearchLogCRUD.bulk_create_search_logs(db, records)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict:
+        """
+        Compteurs de l'écrivain
+
+        Returns:
+            dict: Logs acceptés, écrits, échantillonnés, abandonnés, en erreur et en attente
+        """
+        return {
+            **self.counters,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000.0
+        }
@@ -45,3 +45,32 @@ def load_all_engines(embeddings_dir, embedding_model=None, crossencoder_model=No
         print(f"   Les fichiers doivent être dans: {embeddings_dir}")
         return {}
 
+
+
+def load_engine_registry(embeddings_dir, memory_budget_mb=None, languages=None, index_type="auto", **encoder_options):
+    """
+    Crée le registre des moteurs (corpus, langue) et précharge le corpus par défaut.
+    Les autres corpus (sous-dossiers de embeddings_dir) sont chargés à la demande.
+    index_type="auto" charge le type d'index retenu lors du build (metadata.json).
+    encoder_options est transmis à EmbeddingLoader (model_name, encoder_backend, verify_checksums, ...).
+    """
+    print(f"\n--- Chargement des embeddings depuis {embeddings_dir} ---")
+    
+    from .embedding_loader import EmbeddingLoader
+    from .engine_registry import EngineRegistry, DEFAULT_CORPUS
+    
+    loader = EmbeddingLoader(embeddings_dir, **encoder_options)
+    registry = EngineRegistry(loader, memory_budget_mb=memory_budget_mb, languages=languages, index_type=index_type)
+    engines = registry.preload(DEFAULT_CORPUS, pin=True)
+    
+    print(f"✅ {len(engines)} moteurs chargés avec succès")
+    for lang, engine in engines.items():
+        print(f"   - {lang}: {len(engine['questions'])} questions")
+    
+    print(f"🤖 Encodeur des requêtes: {loader.embedding_model.backend}")
+    corpora = loader.list_corpora(registry.languages)
+    print(f"📚 Corpus disponibles: {', '.join(corpora) if corpora else 'aucun'}")
+    if memory_budget_mb:
+        print(f"💾 Budget mémoire des moteurs: {memory_budget_mb} Mo")
+    
+    return registry
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Génération en flux et cache des archives zip servies par l'API de téléchargement
+Chaque archive est enregistrée une seule fois par contenu : sa clé est une empreinte
+des fichiers qu'elle contient (SHA-256 du manifeste de la version publiée, ou taille
+et date de modification pour l'ancienne disposition sans versions)
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import zipfile
+
+from bundles import BUNDLE_MANIFEST, VERSIONS_DIR, bundle_files, current_version_dir
+
+def bundle_entries(lang_dir, prefix):
+    """
+    Fichiers du bundle publié d'une langue, avec leur nom dans l'archive et leur empreinte
+    
+    Args:
+        lang_dir: Répertoire de la langue
+        prefix: Préfixe des noms dans l'archive (ex: "fr")
+    
+    Returns:
+        list: Triplets (chemin, nom dans l'archive, empreinte)
+    """
+    hashes = {}
+    version_dir = current_version_dir(lang_dir)
+    if version_dir is not None:
+        manifest_path = os.path.join(version_dir, BUNDLE_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                hashes = {name: entry['sha256'] for name, entry in json.load(f).get('files', {}).items()}
+    
+    entries = []
+    for path, name in bundle_files(lang_dir):
+        # versions/<version>/<fichier> -> <fichier> dans le manifeste
+        parts = name.split("/", 2)
+        digest = hashes.get(parts[2]) if len(parts) == 3 and parts[0] == VERSIONS_DIR else None
+        if digest is None:
+            stat = os.stat(path)
+            digest = f"{stat.st_size}:{stat.st_mtime_ns}"
+        entries.append((path, f"{prefix}/{name}", digest))
+    return entries
+
+def archive_key(entries):
+    """
+    Clé de contenu d'une archive
+    
+    Args:
+        entries: Triplets (chemin, nom dans l'archive, empreinte)
+    
+    Returns:
+        str: Empreinte SHA-256 des noms et empreintes des fichiers
+    """
+    digest = hashlib.sha256()
+    for _, arcname, fingerprint in sorted(entries, key=lambda entry: entry[1]):
+        digest.update(f"{arcname}\0{fingerprint}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+# Fichiers déjà incompressibles (index FAISS, vecteurs float32) : stockés sans compression
+STORED_EXTENSIONS = (".idx", ".npy")
+
+class _StreamBuffer:
+    """Flux d'écriture non positionnable : zipfile y écrit, le générateur le vide"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        """Retourne et vide les octets accumulés"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_zip(entries, block_size=1 << 20):
+    """
+    Génère une archive zip en flux, sans fichier temporaire
+    
+    Les entrées sont écrites avec des descripteurs de données (flux non positionnable) ;
+    les index FAISS et les vecteurs sont stockés sans compression.
+    
+    Args:
+        entries: Triplets (chemin, nom dans l'archive, empreinte)
+        block_size: Taille des blocs lus dans chaque fichier
+    
+    Yields:
+        bytes: Blocs de l'archive
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w') as zipf:
+        for path, arcname, _ in entries:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = (
+                zipfile.ZIP_STORED if arcname.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+            )
+            with open(path, 'rb') as source, zipf.open(info, 'w') as target:
+                for block in iter(lambda: source.read(block_size), b""):
+                    target.write(block)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    data = buffer.drain()
+    if data:
+        yield data
+
+class ArchiveCache:
+    """Archives générées une fois par contenu et publiées atomiquement"""
+    
+    def __init__(self, cache_dir, keep=2):
+        """
+        Initialise le cache
+        
+        Args:
+            cache_dir: Répertoire des archives
+            keep: Nombre d'archives conservées par périmètre (fr, en, all)
+        """
+        self.cache_dir = cache_dir
+        self.keep = keep
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def _lock(self, key):
+        """Verrou propre à une clé (une seule construction par archive)"""
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    def archive_path(self, scope, key):
+        """Chemin de l'archive d'un périmètre pour une clé de contenu"""
+        return os.path.join(self.cache_dir, f"{scope}-{key[:32]}.zip")
+    
+    def cached_path(self, scope, key):
+        """
+        Chemin de l'archive si elle est déjà en cache
+        
+        Args:
+            scope: Périmètre (fr, en, all)
+            key: Clé de contenu
+        
+        Returns:
+            str: Chemin de l'archive, ou None si elle n'a pas encore été générée
+        """
+        path = self.archive_path(scope, key)
+        return path if os.path.exists(path) else None
+    
+    def stream(self, scope, key, entries):
+        """
+        Génère l'archive en flux et l'enregistre au passage dans le cache
+        
+        Les octets sont produits au fur et à mesure de la compression. Une seule
+        requête par clé recopie le flux dans un fichier temporaire, publié par
+        os.replace une fois l'archive complète (supprimé si le client se déconnecte) ;
+        les requêtes concurrentes reçoivent le flux sans l'écrire sur disque.
+        
+        Args:
+            scope: Périmètre (fr, en, all)
+            key: Clé de contenu (voir archive_key)
+            entries: Triplets (chemin, nom dans l'archive, empreinte)
+        
+        Yields:
+            bytes: Blocs de l'archive zip
+        """
+        lock = self._lock(key)
+        if not lock.acquire(blocking=False):
+            yield from iter_zip(entries)
+            return
+        
+        tmp_path = None
+        try:
+            if self.cached_path(scope, key):
+                yield from iter_zip(entries)
+                return
+            
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{scope}-", suffix=".tmp", dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                for data in iter_zip(entries):
+                    f.write(data)
+                    yield data
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.archive_path(scope, key))
+            tmp_path = None
+            self.prune(scope)
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            lock.release()
+    
+    def prune(self, scope):
+        """
+        Supprime les archives les plus anciennes d'un périmètre
+        
+        Args:
+            scope: Périmètre (fr, en, all)
+        
+        Returns:
+            list: Archives supprimées
+        """
+        archives = sorted(
+            (os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+             if name.startswith(f"{scope}-") and name.endswith(".zip")),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        removed = []
+        for path in archives[max(1, self.keep):]:
+            try:
+                os.remove(path)
+                removed.append(os.path.basename(path))
+            except OSError:
+                pass
+        return removed
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bundles d'artefacts versionnés
+Chaque build est écrit dans <langue>/versions/<version>/ avec un manifeste (tailles,
+SHA-256, modèle, dimension, nombre de lignes), puis publié en remplaçant
+atomiquement le pointeur <langue>/CURRENT
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+
+VERSIONS_DIR = "versions"
+CURRENT_POINTER = "CURRENT"
+BUNDLE_MANIFEST = "manifest.json"
+
+def file_sha256(path, block_size=1 << 20):
+    """Empreinte SHA-256 d'un fichier, lue par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def new_version_dir(lang_dir):
+    """
+    Crée le répertoire d'une nouvelle version
+
+    Args:
+        lang_dir: Répertoire de la langue
+
+    Returns:
+        str: Chemin du répertoire de la version (nom horodaté)
+    """
+    version = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    version_dir = os.path.join(lang_dir, VERSIONS_DIR, version)
+    os.makedirs(version_dir)
+    return version_dir
+
+def current_version_dir(lang_dir):
+    """
+    Répertoire de la version publiée
+
+    Args:
+        lang_dir: Répertoire de la langue
+
+    Returns:
+        str: Chemin de la version pointée par CURRENT, ou None si aucune
+    """
+    pointer = os.path.join(lang_dir, CURRENT_POINTER)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, 'r', encoding='utf-8') as f:
+        version = f.read().strip()
+    version_dir = os.path.join(lang_dir, VERSIONS_DIR, version)
+    return version_dir if version and os.path.isdir(version_dir) else None
+
+def write_bundle_manifest(version_dir, embedding_model, embedding_dimension, rows):
+    """
+    Écrit le manifeste d'une version (tous les fichiers du répertoire, sous-dossiers compris)
+
+    Args:
+        version_dir: Répertoire de la version
+        embedding_model: Nom du modèle d'embedding
+        embedding_dimension: Dimension des vecteurs
+        rows: Nombre de lignes
+
+    Returns:
+        dict: Manifeste écrit
+    """
+    files = {}
+    for root, _, names in os.walk(version_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, version_dir).replace(os.sep, "/")
+            if relative == BUNDLE_MANIFEST:
+                continue
+            files[relative] = {'size': os.path.getsize(path), 'sha256': file_sha256(path)}
+
+    manifest = {
+        'version': os.path.basename(version_dir),
+        'created': datetime.now().isoformat(),
+        'embedding_model': embedding_model,
+        'embedding_dimension': embedding_dimension,
+        'rows': rows,
+        'files': files
+    }
+    manifest_path = os.path.join(version_dir, BUNDLE_MANIFEST)
+    with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest
+
+def publish_version(lang_dir, version_dir):
+    """
+    Publie une version en remplaçant atomiquement le pointeur CURRENT
+
+    Args:
+        lang_dir: Répertoire de la langue
+        version_dir: Répertoire de la version à publier
+    """
+    pointer = os.path.join(lang_dir, CURRENT_POINTER)
+    with open(pointer + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(version_dir) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer + ".tmp", pointer)
+
+def prune_versions(lang_dir, keep=3):
+    """
+    Supprime les versions les plus anciennes (la version publiée est toujours conservée)
+
+    Args:
+        lang_dir: Répertoire de la langue
+        keep: Nombre de versions conservées
+
+    Returns:
+        list: Versions supprimées
+    """
+    versions_root = os.path.join(lang_dir, VERSIONS_DIR)
+    if not os.path.isdir(versions_root):
+        return []
+    current = current_version_dir(lang_dir)
+    versions = sorted(os.listdir(versions_root), reverse=True)
+    removed = []
+    for version in versions[max(1, keep):]:
+        version_dir = os.path.join(versions_root, version)
+        if current and os.path.samefile(version_dir, current):
+            continue
+        shutil.rmtree(version_dir)
+        removed.append(version)
+    return removed
+
+def bundle_files(lang_dir):
+    """
+    Fichiers du bundle publié d'une langue, avec leur chemin relatif au répertoire de la langue
+
+    Retourne CURRENT et les fichiers de la version publiée, ou à défaut les fichiers
+    à la racine du répertoire (ancienne disposition sans versions).
+
+    Args:
+        lang_dir: Répertoire de la langue
+
+    Returns:
+        list: Couples (chemin, chemin relatif)
+    """
+    version_dir = current_version_dir(lang_dir)
+    if version_dir is None:
+        return [
+            (os.path.join(lang_dir, name), name)
+            for name in sorted(os.listdir(lang_dir))
+            if os.path.isfile(os.path.join(lang_dir, name))
+        ]
+
+    files = [(os.path.join(lang_dir, CURRENT_POINTER), CURRENT_POINTER)]
+    prefix = f"{VERSIONS_DIR}/{os.path.basename(version_dir)}"
+    for root, _, names in os.walk(version_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            files.append((path, f"{prefix}/{os.path.relpath(path, version_dir).replace(os.sep, '/')}"))
+    return files
+
+def bundle_file_hashes(lang_dir, hash_cache=None):
+    """
+    Taille et SHA-256 de chaque fichier du bundle publié d'une langue
+
+    Les empreintes des fichiers d'une version proviennent de son manifeste ; les autres
+    (CURRENT, manifeste, ancienne disposition) sont calculées, et mémorisées dans
+    hash_cache par (chemin, taille, date de modification) si fourni.
+
+    Args:
+        lang_dir: Répertoire de la langue
+        hash_cache: Dictionnaire de cache des empreintes calculées (optionnel)
+
+    Returns:
+        dict: Chemin relatif -> {'size', 'sha256'}
+    """
+    known = {}
+    version_dir = current_version_dir(lang_dir)
+    if version_dir is not None:
+        manifest_path = os.path.join(version_dir, BUNDLE_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                prefix = f"{VERSIONS_DIR}/{os.path.basename(version_dir)}/"
+                known = {prefix + name: entry for name, entry in json.load(f).get('files', {}).items()}
+
+    files = {}
+    for path, name in bundle_files(lang_dir):
+        stat = os.stat(path)
+        entry = known.get(name)
+        if entry is None or entry['size'] != stat.st_size:
+            cache_key = (path, stat.st_size, stat.st_mtime_ns)
+            digest = hash_cache.get(cache_key) if hash_cache is not None else None
+            if digest is None:
+                digest = file_sha256(path)
+                if hash_cache is not None:
+                    hash_cache[cache_key] = digest
+            entry = {'size': stat.st_size, 'sha256': digest}
+        files[name] = {'size': entry['size'], 'sha256': entry['sha256']}
+    return files
@@ -5,12 +5,26 @@ API simple pour télécharger les fichiers d'embeddings calculés
 """
 
 import os
-import zipfile
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import uvicorn
 
+from bundles import bundle_files, bundle_file_hashes, current_version_dir
+from archive_cache import ArchiveCache, archive_key, bundle_entries
+
+EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", "embeddings")
+LANGUAGES = ["fr", "en"]
+
+# Empreintes calculées, par (chemin, taille, date de modification)
+hash_cache = {}
+
+# Archives construites une fois par version des artefacts
+archive_cache = ArchiveCache(
+    os.getenv("ARCHIVE_CACHE_DIR", os.path.join(EMBEDDINGS_DIR, ".archives")),
+    keep=int(os.getenv("ARCHIVE_CACHE_KEEP", "2"))
+)
+
 app = FastAPI(
     title="API de téléchargement des embeddings",
     description="API pour télécharger les fichiers d'embeddings calculés",
@@ -26,7 +40,9 @@ async def root():
             "download_fr": "/download/fr",
             "download_en": "/download/en", 
             "download_all": "/download/all",
-            "list_files": "/files"
+            "list_files": "/files",
+            "manifest": "/manifest",
+            "download_file": "/file/{language}/{path}"
         }
     }
 
@@ -36,89 +52,208 @@ async def list_files():
     files = {}
     
     # Vérifier les fichiers français
-    fr_dir = Path("embeddings/fr")
+    fr_dir = Path(EMBEDDINGS_DIR) / "fr"
     if fr_dir.exists():
-        files["fr"] = [f.name for f in fr_dir.iterdir() if f.is_file()]
+        files["fr"] = [name for _, name in bundle_files(fr_dir)]
     
     # Vérifier les fichiers anglais
-    en_dir = Path("embeddings/en")
+    en_dir = Path(EMBEDDINGS_DIR) / "en"
     if en_dir.exists():
-        files["en"] = [f.name for f in en_dir.iterdir() if f.is_file()]
+        files["en"] = [name for _, name in bundle_files(en_dir)]
     
     return {
         "available_files": files,
         "total_files": sum(len(files.get(lang, [])) for lang in files)
     }
 
-@app.get("/download/fr")
-async def download_fr():
-    """Télécharger les fichiers français"""
-    fr_dir = Path("embeddings/fr")
-    if not fr_dir.exists():
-        raise HTTPException(status_code=404, detail="Fichiers français non trouvés")
+def read_version(lang_dir):
+    """Version publiée d'une langue (None pour l'ancienne disposition sans versions)"""
+    version_dir = current_version_dir(lang_dir)
+    return os.path.basename(version_dir) if version_dir else None
+
+def parse_range(range_header, size):
+    """
+    Analyse un en-tête Range à une seule plage (bytes=début-fin, bytes=début-, bytes=-n)
+    
+    Args:
+        range_header: Valeur de l'en-tête Range
+        size: Taille du fichier
+        
+    Returns:
+        tuple: (début, fin incluse), None si la plage n'est pas satisfaisable,
+               ou "ignore" si l'en-tête n'est pas exploitable (réponse complète)
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return "ignore"
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            length = int(last)
+            if length <= 0:
+                return None
+            start, end = max(size - length, 0), size - 1
+    except ValueError:
+        return "ignore"
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+def iter_file_range(path, start, end, block_size=1 << 20):
+    """Lit une plage d'octets d'un fichier par blocs"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+def etag_matches(header, etag):
+    """Vérifie si un en-tête If-None-Match / If-Range correspond à l'ETag"""
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def file_response(request: Request, path, etag, filename, media_type):
+    """
+    Sert un fichier avec ETag, If-None-Match (304) et Range / If-Range (206)
+    
+    Args:
+        request: Requête HTTP
+        path: Chemin du fichier
+        etag: ETag du contenu (entre guillemets)
+        filename: Nom proposé au client
+        media_type: Type MIME
+    """
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache"
+    }
     
-    # Créer un zip temporaire
-    zip_path = "fr_embeddings.zip"
-    with zipfile.ZipFile(zip_path, 'w') as zipf:
-        for file_path in fr_dir.iterdir():
-            if file_path.is_file():
-                zipf.write(file_path, f"fr/{file_path.name}")
+    # Contenu inchangé depuis le dernier téléchargement
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    # Reprise d'un téléchargement interrompu (ignorée si If-Range ne correspond plus)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or etag_matches(if_range, etag)):
+        size = os.path.getsize(path)
+        byte_range = parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range != "ignore":
+            start, end = byte_range
+            headers.update({
+                "Content-Range": f"bytes {start}-{end}/{size}",
+                "Content-Length": str(end - start + 1),
+                "Content-Disposition": f'attachment; filename="{filename}"'
+            })
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
     
     return FileResponse(
-        zip_path,
-        media_type="application/zip",
-        filename="fr_embeddings.zip"
+        path,
+        media_type=media_type,
+        filename=filename,
+        headers=headers
     )
 
-@app.get("/download/en")
-async def download_en():
-    """Télécharger les fichiers anglais"""
-    en_dir = Path("embeddings/en")
-    if not en_dir.exists():
-        raise HTTPException(status_code=404, detail="Fichiers anglais non trouvés")
+def archive_response(request: Request, scope: str, languages):
+    """
+    Sert l'archive d'un périmètre depuis le cache
     
-    # Créer un zip temporaire
-    zip_path = "en_embeddings.zip"
-    with zipfile.ZipFile(zip_path, 'w') as zipf:
-        for file_path in en_dir.iterdir():
-            if file_path.is_file():
-                zipf.write(file_path, f"en/{file_path.name}")
+    Args:
+        request: Requête HTTP
+        scope: Périmètre de l'archive (fr, en, all)
+        languages: Langues incluses dans l'archive
+    """
+    entries = []
+    for language in languages:
+        lang_dir = Path(EMBEDDINGS_DIR) / language
+        if lang_dir.exists():
+            entries.extend(bundle_entries(str(lang_dir), language))
+    if not entries:
+        raise HTTPException(status_code=404, detail=f"Aucun fichier d'embeddings trouvé ({scope})")
     
-    return FileResponse(
-        zip_path,
+    key = archive_key(entries)
+    etag = f'"{key}"'
+    filename = f"{scope}_embeddings.zip"
+    
+    # Archive déjà en cache : réponses conditionnelles et reprises (Range)
+    zip_path = archive_cache.cached_path(scope, key)
+    if zip_path:
+        return file_response(request, zip_path, etag, filename, "application/zip")
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
+    # Première demande pour cette version : archive générée en flux (et mise en cache au passage)
+    return StreamingResponse(
+        archive_cache.stream(scope, key, entries),
         media_type="application/zip",
-        filename="en_embeddings.zip"
+        headers={
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        }
     )
 
+@app.get("/manifest")
+def manifest():
+    """Manifeste des fichiers servis (taille et SHA-256) par langue, pour la synchronisation différentielle"""
+    languages = {}
+    for language in LANGUAGES:
+        lang_dir = Path(EMBEDDINGS_DIR) / language
+        if not lang_dir.exists():
+            continue
+        languages[language] = {
+            "version": read_version(str(lang_dir)),
+            "files": bundle_file_hashes(str(lang_dir), hash_cache)
+        }
+    return {"languages": languages}
+
+@app.get("/file/{language}/{name:path}")
+def download_file(request: Request, language: str, name: str):
+    """Télécharger un fichier du bundle publié d'une langue (chemin relatif du manifeste)"""
+    if language not in LANGUAGES:
+        raise HTTPException(status_code=404, detail=f"Langue inconnue: {language}")
+    lang_dir = Path(EMBEDDINGS_DIR) / language
+    files = dict((relative, path) for path, relative in bundle_files(str(lang_dir))) if lang_dir.exists() else {}
+    
+    # Seuls les fichiers du bundle publié sont servis (pas de traversée de répertoire)
+    if name not in files:
+        raise HTTPException(status_code=404, detail=f"Fichier non trouvé: {language}/{name}")
+    
+    digest = bundle_file_hashes(str(lang_dir), hash_cache)[name]['sha256']
+    return file_response(request, files[name], f'"{digest}"', os.path.basename(name), "application/octet-stream")
+
+@app.get("/download/fr")
+def download_fr(request: Request):
+    """Télécharger les fichiers français"""
+    return archive_response(request, "fr", ["fr"])
+
+@app.get("/download/en")
+def download_en(request: Request):
+    """Télécharger les fichiers anglais"""
+    return archive_response(request, "en", ["en"])
+
 @app.get("/download/all")
-async def download_all():
+def download_all(request: Request):
     """Télécharger tous les fichiers"""
-    fr_dir = Path("embeddings/fr")
-    en_dir = Path("embeddings/en")
-    
-    if not fr_dir.exists() and not en_dir.exists():
-        raise HTTPException(status_code=404, detail="Aucun fichier d'embeddings trouvé")
-    
-    # Créer un zip temporaire
-    zip_path = "all_embeddings.zip"
-    with zipfile.ZipFile(zip_path, 'w') as zipf:
-        # Ajouter les fichiers français
-        if fr_dir.exists():
-            for file_path in fr_dir.iterdir():
-                if file_path.is_file():
-                    zipf.write(file_path, f"fr/{file_path.name}")
-        
-        # Ajouter les fichiers anglais
-        if en_dir.exists():
-            for file_path in en_dir.iterdir():
-                if file_path.is_file():
-                    zipf.write(file_path, f"en/{file_path.name}")
-    
-    return FileResponse(
-        zip_path,
-        media_type="application/zip",
-        filename="all_embeddings.zip"
-    )
+    return archive_response(request, "all", ["fr", "en"])
 
 if __name__ == "__main__":
     print("🚀 Démarrage de l'API de téléchargement")
@@ -128,6 +263,9 @@ if __name__ == "__main__":
     print("   - GET /download/en  - Télécharger fichiers anglais")
     print("   - GET /download/all - Télécharger tous les fichiers")
     print("   - GET /files        - Lister les fichiers disponibles")
+    print("   - GET /manifest     - Manifeste (tailles, SHA-256) pour la synchronisation")
+    print("   - GET /file/{langue}/{chemin} - Télécharger un fichier")
+    print(f"   Cache des archives: {archive_cache.cache_dir}")
     print()
     
     uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
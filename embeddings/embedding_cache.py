@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cache persistant des embeddings calculés
+Indexé par (modèle, empreinte du texte normalisé) dans une base SQLite
+"""
+
+import re
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+
+def normalize_text(text):
+    """Normalise un texte avant calcul de son empreinte (Unicode NFKC, espaces)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+def text_hash(text):
+    """Empreinte SHA-1 du texte normalisé"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """Cache SQLite (modèle, empreinte du texte) -> vecteur float32"""
+    
+    def __init__(self, path):
+        """
+        Initialise le cache
+        
+        Args:
+            path: Chemin du fichier SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self._connection.commit()
+    
+    def get_many(self, model, hashes, chunk_size=500):
+        """
+        Récupère les vecteurs en cache
+        
+        Args:
+            model: Nom du modèle d'embedding
+            hashes: Empreintes recherchées
+            chunk_size: Nombre d'empreintes par requête SQL
+            
+        Returns:
+            dict: Empreinte -> vecteur (float32) pour les empreintes trouvées
+        """
+        found = {}
+        hashes = list(hashes)
+        with self._lock:
+            for start in range(0, len(hashes), chunk_size):
+                chunk = hashes[start:start + chunk_size]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model] + chunk
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+    
+    def put_many(self, model, items):
+        """
+        Enregistre des vecteurs dans le cache
+        
+        Args:
+            model: Nom du modèle d'embedding
+            items: Couples (empreinte, vecteur)
+        """
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+            )
+            self._connection.commit()
+    
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._lock:
+            self._connection.close()
@@ -8,15 +8,36 @@ Génère les fichiers .npy, index FAISS et métadonnées sans les charger en mé
 import os
 import json
 import glob
+import hashlib
 import argparse
 import numpy as np
 import faiss
+import torch
 import pickle
+import shutil
+import tempfile
 from datetime import datetime
 from sentence_transformers import SentenceTransformer, CrossEncoder
 from tqdm import tqdm
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import threading
+import time
 import logging
 
+# Analyseur JSON rapide si disponible
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+from embedding_cache import EmbeddingCache, text_hash
+from stream_writers import NpyAppender, ColumnWriter, METADATA_COLUMNS_DIR
+from spreadsheet_reader import (DATA_COLUMNS, SPREADSHEET_EXTENSIONS, new_chunk, append_row,
+                                iter_spreadsheet_chunks, load_spreadsheet_config)
+from bundles import new_version_dir, current_version_dir, write_bundle_manifest, publish_version, prune_versions
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,11 +49,243 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Manifeste des builds (empreintes des fichiers sources et positions des lignes)
+BUILD_MANIFEST = "build_manifest.json"
+
+def parse_questionnaire_file(filepath):
+    """
+    Analyse un fichier JSON de questionnaire (exécutable dans un processus du pool)
+    
+    Args:
+        filepath: Chemin du fichier JSON
+        
+    Returns:
+        dict: Bloc de colonnes du fichier (DATA_COLUMNS), nom du fichier, empreinte
+              SHA-256 du contenu et erreur éventuelle
+    """
+    chunk = new_chunk(filepath)
+    
+    try:
+        with open(filepath, 'rb') as f:
+            content = f.read()
+        chunk['sha256'] = hashlib.sha256(content).hexdigest()
+        file_data = json_loads(content)
+    except Exception as e:
+        chunk['error'] = str(e)
+        return chunk
+    
+    entreprise = file_data.get("Entreprise", "").strip()
+    date_str = file_data.get("date", "").strip()
+    
+    for item in file_data.get("data", []):
+        append_row(
+            chunk,
+            entreprise,
+            date_str,
+            item.get("Question", "").strip(),
+            item.get("Reponse", "").strip(),
+            item.get("Commentaire", "").strip()
+        )
+    
+    return chunk
+
+# Choix automatique du type d'index (voir select_index_type)
+AUTO_FLAT_MAX_ROWS = 100_000
+AUTO_HNSW_MAX_ROWS = 2_000_000
+AUTO_TARGET_RECALL = 0.95
+HNSW_M = 32
+PQ_NBITS = 8
+IVF_TRAIN_POINTS_PER_LIST = 256
+
+def ivf_nlist(num_rows):
+    """Nombre de listes IVF (~4·√N, avec au moins 39 vecteurs par liste)"""
+    return max(1, min(int(4 * np.sqrt(num_rows)), num_rows // 39, 65536))
+
+def pq_subquantizers(dim):
+    """Nombre de sous-quantificateurs PQ : plus grand diviseur de dim n'excédant pas dim / 8"""
+    return max(m for m in range(1, max(1, dim // 8) + 1) if dim % m == 0)
+
+def index_bytes_per_vector(index_type, dim):
+    """Estimation de l'empreinte mémoire d'un vecteur dans l'index (octets)"""
+    if index_type == "flat":
+        return dim * 4
+    if index_type == "hnsw":
+        return dim * 4 + HNSW_M * 2 * 4
+    if index_type == "ivf":
+        return dim * 4 + 8
+    if index_type == "ivfpq":
+        return pq_subquantizers(dim) * PQ_NBITS // 8 + 8
+    raise ValueError(f"Type d'index non supporté: {index_type}")
+
+def select_index_type(num_rows, dim, memory_budget_mb=None):
+    """
+    Choisit le type d'index à partir de la taille du corpus et d'un budget mémoire
+    
+    flat (exact) pour les petits corpus, HNSW jusqu'à quelques millions de vecteurs,
+    IVF au-delà, et IVF-PQ (vecteurs compressés) si le budget ne permet pas de
+    conserver les vecteurs complets.
+    
+    Args:
+        num_rows: Nombre de vecteurs
+        dim: Dimension des vecteurs
+        memory_budget_mb: Budget mémoire de l'index en Mo (None = illimité)
+        
+    Returns:
+        str: "flat", "hnsw", "ivf" ou "ivfpq"
+    """
+    budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb else float("inf")
+    
+    def fits(index_type):
+        return num_rows * index_bytes_per_vector(index_type, dim) <= budget
+    
+    if num_rows <= AUTO_FLAT_MAX_ROWS and fits("flat"):
+        return "flat"
+    if num_rows <= AUTO_HNSW_MAX_ROWS and fits("hnsw"):
+        return "hnsw"
+    if fits("ivf"):
+        return "ivf"
+    return "ivfpq"
+
+def index_params(index, index_type):
+    """Paramètres de construction d'un index FAISS (enregistrés dans metadata.json)"""
+    if index_type == "hnsw":
+        return {'M': HNSW_M, 'efConstruction': index.hnsw.efConstruction}
+    if index_type in ("ivf", "ivfpq"):
+        ivf = faiss.extract_index_ivf(index)
+        params = {'nlist': ivf.nlist}
+        # Un index "ivfpq" entraîné sur trop peu de vecteurs peut être un IVF non compressé
+        if index_type == "ivfpq" and isinstance(ivf, faiss.IndexIVFPQ):
+            params.update({'m': ivf.pq.M, 'nbits': ivf.pq.nbits})
+        return params
+    return {}
+
+def create_faiss_index(train_vectors, index_type="flat", num_rows=None):
+    """
+    Crée un index FAISS vide (entraîné si nécessaire)
+    
+    Les index IVF sont entraînés sur un échantillon aléatoire des vecteurs
+    (au plus IVF_TRAIN_POINTS_PER_LIST points par liste).
+    
+    Args:
+        train_vectors: Vecteurs d'entraînement (dimension, et centroïdes pour IVF)
+        index_type: Type d'index FAISS ("flat", "ivf", "ivfpq", "hnsw")
+        num_rows: Nombre total de vecteurs attendus (dimensionne nlist, défaut: train_vectors)
+        
+    Returns:
+        faiss.Index: Index prêt à recevoir des vecteurs
+    """
+    dim = train_vectors.shape[1]
+    
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type in ("ivf", "ivfpq"):
+        nlist = ivf_nlist(num_rows or train_vectors.shape[0])
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            sample_size = nlist * IVF_TRAIN_POINTS_PER_LIST
+        else:
+            # Un codebook de 2^nbits centroïdes demande au moins autant de points d'entraînement
+            nbits = min(PQ_NBITS, int(np.log2(max(train_vectors.shape[0], 1))))
+            if nbits < 1:
+                logger.warning(f"Trop peu de vecteurs pour IVF-PQ ({train_vectors.shape[0]}), index IVF non compressé")
+                index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            else:
+                if nbits < PQ_NBITS:
+                    logger.warning(f"{train_vectors.shape[0]} vecteurs d'entraînement : codebooks PQ "
+                                   f"réduits à {nbits} bits (au lieu de {PQ_NBITS})")
+                index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_subquantizers(dim), nbits,
+                                         faiss.METRIC_INNER_PRODUCT)
+            # Les codebooks PQ ont aussi besoin d'assez de points par centroïde
+            sample_size = max(nlist * IVF_TRAIN_POINTS_PER_LIST, (1 << PQ_NBITS) * IVF_TRAIN_POINTS_PER_LIST)
+        
+        if train_vectors.shape[0] > sample_size:
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(train_vectors.shape[0], size=sample_size, replace=False))
+            train_vectors = train_vectors[sample]
+        logger.info(f"Entraînement IVF (nlist={nlist}) sur {train_vectors.shape[0]} vecteurs")
+        index.train(np.ascontiguousarray(train_vectors, dtype=np.float32))
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+    else:
+        raise ValueError(f"Type d'index non supporté: {index_type}")
+    
+    return index
+
+# Build shardé : "merge" fusionne des shards IVF aux centroïdes partagés,
+# "set" produit un ensemble d'index interrogé par le backend (IndexShards)
+SHARD_MODES = ("merge", "set")
+SHARD_KEYS = ("hash", "company")
+
+def shard_assignments(keys, shards):
+    """Affecte chaque ligne à un shard à partir d'une clé stable (MD5 modulo le nombre de shards)"""
+    return np.fromiter(
+        (int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16) % shards for key in keys),
+        dtype=np.int64, count=len(keys)
+    )
+
+def build_shard_index(task):
+    """
+    Construit l'index d'un shard (exécuté dans un processus du pool)
+    
+    En mode "merge", les vecteurs sont ajoutés à une copie de l'index IVF entraîné
+    commun ; en mode "set", chaque shard construit son propre index. Les identifiants
+    globaux des lignes sont conservés dans les deux cas.
+    
+    Args:
+        task: dict (vectors_path, ids_path, output_path, index_type, trained_path, threads)
+        
+    Returns:
+        dict: Chemin de l'index du shard, nombre de vecteurs et durée
+    """
+    start = time.perf_counter()
+    faiss.omp_set_num_threads(task['threads'])
+    vectors = np.load(task['vectors_path'])
+    ids = np.load(task['ids_path'])
+    
+    if task['trained_path']:
+        index = faiss.read_index(task['trained_path'])
+    else:
+        index = faiss.IndexIDMap(create_faiss_index(vectors, task['index_type']))
+    index.add_with_ids(vectors, ids)
+    faiss.write_index(index, task['output_path'])
+    
+    return {'path': task['output_path'], 'rows': int(index.ntotal), 'seconds': round(time.perf_counter() - start, 3)}
+
+def exact_search(embeddings, queries, k, block_size=65536):
+    """
+    Recherche exacte (produit scalaire) par blocs, sans charger tous les vecteurs
+    
+    Args:
+        embeddings: Embeddings du corpus (tableau ou memmap)
+        queries: Requêtes (nq, dim)
+        k: Nombre de voisins
+        block_size: Nombre de vecteurs lus par bloc
+        
+    Returns:
+        numpy.ndarray: Identifiants (nq, k) des k plus proches voisins (non triés)
+    """
+    best_scores = best_ids = None
+    for start in range(0, embeddings.shape[0], block_size):
+        block = np.ascontiguousarray(embeddings[start:start + block_size], dtype=np.float32)
+        scores = queries @ block.T
+        ids = np.broadcast_to(np.arange(start, start + block.shape[0]), scores.shape)
+        if best_scores is not None:
+            scores = np.hstack([best_scores, scores])
+            ids = np.hstack([best_ids, ids])
+        kk = min(k, scores.shape[1])
+        top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    return best_ids
+
 class EmbeddingCalculator:
     """Calculateur d'embeddings qui génère les fichiers sans les charger"""
     
     def __init__(self, embedding_model_name="paraphrase-multilingual-MiniLM-L12-v2", 
-                 crossencoder_model_name=None, output_dir="embeddings"):
+                 crossencoder_model_name=None, output_dir="embeddings", cache_path=None, workers=1,
+                 spreadsheet_config=None):
         """
         Initialise le calculateur d'embeddings
         
@@ -40,14 +293,30 @@ class EmbeddingCalculator:
             embedding_model_name: Nom du modèle Sentence Transformers
             crossencoder_model_name: Nom du modèle Cross-Encoder (optionnel)
             output_dir: Répertoire de sortie pour les fichiers générés
+            cache_path: Fichier SQLite du cache d'embeddings (None pour désactiver)
+            workers: Nombre de processus d'encodage (une réplique du modèle par processus)
+            spreadsheet_config: Correspondance des colonnes des tableurs CSV / XLSX
+                                (voir load_spreadsheet_config, None pour les valeurs par défaut)
         """
         self.embedding_model_name = embedding_model_name
         self.crossencoder_model_name = crossencoder_model_name
-        self.output_dir = output_dir
+        # Répertoire de sortie propre à chaque thread (langues traitées en parallèle)
+        self._local = threading.local()
+        self._base_output_dir = output_dir
+        self.workers = max(1, workers)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.throughput = []
+        self.spreadsheet_config = spreadsheet_config or load_spreadsheet_config()
         
         # Créer le répertoire de sortie
         os.makedirs(output_dir, exist_ok=True)
         
+        # Cache persistant des embeddings (clé: modèle + empreinte du texte normalisé)
+        self.cache = EmbeddingCache(cache_path) if cache_path else None
+        self.cache_stats = {'texts': 0, 'unique_texts': 0, 'cache_hits': 0, 'encoded': 0}
+        
         # Charger les modèles
         logger.info(f"Chargement du modèle d'embedding: {embedding_model_name}")
         self.embedding_model = SentenceTransformer(embedding_model_name)
@@ -58,69 +327,329 @@ class EmbeddingCalculator:
         else:
             self.crossencoder = None
     
-    def load_dataset(self, directory):
+    @property
+    def output_dir(self):
+        """Répertoire de sortie courant (celui de la langue traitée par le thread courant)"""
+        return getattr(self._local, 'output_dir', self._base_output_dir)
+    
+    @output_dir.setter
+    def output_dir(self, value):
+        self._local.output_dir = value
+    
+    def _encode(self, texts, batch_size):
+        """
+        Encode des textes dans le processus courant ou via le pool multi-processus
+        
+        Le pool (une réplique du modèle par processus, morceaux distribués et
+        résultats rassemblés dans l'ordre) est démarré au premier appel si workers > 1.
+        
+        Args:
+            texts: Textes à encoder
+            batch_size: Taille des batchs
+            
+        Returns:
+            numpy.ndarray: Embeddings non normalisés
+        """
+        start = time.perf_counter()
+        if self.workers > 1:
+            with self._pool_lock:
+                if self._pool is None:
+                    # Répartir les cœurs entre les répliques pour éviter la sur-souscription
+                    os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // self.workers)))
+                    logger.info(f"Démarrage du pool d'encodage: {self.workers} processus")
+                    self._pool = self.embedding_model.start_multi_process_pool(["cpu"] * self.workers)
+                embeddings = self.embedding_model.encode_multi_process(
+                    texts, self._pool, batch_size=batch_size,
+                    chunk_size=max(batch_size, min(5000, len(texts) // (self.workers * 4) + 1))
+                )
+        else:
+            embeddings = self.embedding_model.encode(
+                texts,
+                convert_to_numpy=True,
+                show_progress_bar=True,
+                batch_size=batch_size
+            )
+        
+        elapsed = time.perf_counter() - start
+        rate = len(texts) / elapsed if elapsed > 0 else 0.0
+        with self._stats_lock:
+            self.throughput.append({
+                'workers': self.workers,
+                'texts': len(texts),
+                'seconds': round(elapsed, 3),
+                'texts_per_second': round(rate, 1)
+            })
+        logger.info(f"Débit d'encodage: {rate:.1f} textes/s avec {self.workers} worker(s) ({len(texts)} textes)")
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def close(self):
+        """Arrête le pool d'encodage et ferme le cache"""
+        if self._pool is not None:
+            self.embedding_model.stop_multi_process_pool(self._pool)
+            self._pool = None
+        if self.cache:
+            self.cache.close()
+    
+    def iter_dataset(self, directory, workers=1, prefetch=4):
+        """
+        Parcourt les questionnaires d'un répertoire (JSON, CSV, XLSX) et produit des blocs de colonnes
+        
+        Les fichiers JSON sont analysés en parallèle dans un pool de processus et les blocs
+        sont produits dans l'ordre des fichiers dès qu'ils sont prêts, ce qui permet de
+        commencer l'encodage avant la fin de l'analyse. Au plus workers * prefetch
+        fichiers sont en cours de traitement à la fois. Les tableurs sont lus ligne par
+        ligne dans le processus courant et peuvent produire plusieurs blocs ('part').
+        Un fichier illisible est ignoré, sauf un tableur dont des blocs ont déjà été
+        produits : le build est alors interrompu (ValueError) plutôt que d'indexer un
+        fichier tronqué.
+        
+        Args:
+            directory: Répertoire contenant les questionnaires
+            workers: Nombre de processus d'analyse des fichiers JSON (1 = dans le processus courant)
+            prefetch: Nombre de fichiers en avance par processus
+            
+        Yields:
+            dict: Bloc de colonnes (voir parse_questionnaire_file et iter_spreadsheet_chunks)
+        """
+        source_files = sorted(
+            path for path in glob.glob(os.path.join(directory, "*"))
+            if path.lower().endswith((".json",) + SPREADSHEET_EXTENSIONS)
+        )
+        if not source_files:
+            logger.warning(f"Aucun questionnaire (JSON, CSV, XLSX) trouvé dans {directory}")
+            return
+        
+        progress = tqdm(total=len(source_files), desc="Chargement des questionnaires")
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        
+        try:
+            for chunk in self._ordered_results(executor, source_files, workers * prefetch):
+                if chunk.get('part', 0) == 0:
+                    progress.update(1)
+                if chunk['error']:
+                    if chunk.get('part', 0) > 0:
+                        # Les blocs précédents du tableur ont déjà été produits : le fichier
+                        # serait indexé tronqué, avec l'empreinte du fichier complet
+                        raise ValueError(
+                            f"Erreur lors du chargement de {chunk['path']} après {chunk['part']} bloc(s): "
+                            f"{chunk['error']}"
+                        )
+                    logger.error(f"Erreur lors du chargement de {chunk['path']}: {chunk['error']}")
+                    continue
+                yield chunk
+        finally:
+            progress.close()
+            if executor:
+                executor.shutdown()
+    
+    def _ordered_results(self, executor, source_files, window):
+        """
+        Restitue les blocs dans l'ordre des fichiers
+        
+        Les fichiers JSON sont soumis au pool par fenêtre glissante (ou analysés sur place
+        sans pool) ; les tableurs sont lus en flux au moment de leur tour.
+        """
+        def submit(path):
+            if path.lower().endswith(SPREADSHEET_EXTENSIONS):
+                return path
+            return executor.submit(parse_questionnaire_file, path) if executor else path
+        
+        pending = deque()
+        files = iter(source_files)
+        for path in files:
+            pending.append(submit(path))
+            if len(pending) >= window:
+                break
+        while pending:
+            item = pending.popleft()
+            if not isinstance(item, str):
+                yield item.result()
+            elif item.lower().endswith(SPREADSHEET_EXTENSIONS):
+                yield from iter_spreadsheet_chunks(item, self.spreadsheet_config)
+            else:
+                yield parse_questionnaire_file(item)
+            path = next(files, None)
+            if path is not None:
+                pending.append(submit(path))
+    
+    def load_dataset(self, directory, workers=1):
         """
         Charge les fichiers JSON d'un répertoire et extrait les données
         
         Args:
             directory: Répertoire contenant les fichiers JSON
+            workers: Nombre de processus d'analyse des fichiers
             
         Returns:
             dict: Données extraites (questions, réponses, commentaires, etc.)
+                  et 'sources' (fichier, empreinte, position et nombre de lignes)
         """
         logger.info(f"Chargement des données depuis: {directory}")
         
-        json_files = glob.glob(os.path.join(directory, "*.json"))
-        if not json_files:
-            logger.warning(f"Aucun fichier JSON trouvé dans {directory}")
-            return None
+        data = {key: [] for key in DATA_COLUMNS}
+        data['sources'] = []
         
-        data = {
-            'questions': [],
-            'reponses': [],
-            'commentaires': [],
-            'entreprises': [],
-            'annees': [],
-            'metadata': []
-        }
+        for chunk in self.iter_dataset(directory, workers):
+            if chunk.get('part', 0) == 0:
+                data['sources'].append({
+                    'file': chunk['file'],
+                    'sha256': chunk['sha256'],
+                    'offset': len(data['questions']),
+                    'count': 0
+                })
+            data['sources'][-1]['count'] += len(chunk['questions'])
+            for key in DATA_COLUMNS:
+                data[key].extend(chunk[key])
         
-        for filepath in tqdm(json_files, desc="Chargement des fichiers JSON"):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    file_data = json.load(f)
-                
-                entreprise = file_data.get("Entreprise", "").strip()
-                date_str = file_data.get("date", "").strip()
-                annee = ""
-                if date_str and "-" in date_str:
-                    annee = date_str.split("-")[0]
-                
-                for item in file_data.get("data", []):
-                    question = item.get("Question", "").strip()
-                    if question:
-                        data['questions'].append(question)
-                        data['reponses'].append(item.get("Reponse", "").strip())
-                        data['commentaires'].append(item.get("Commentaire", "").strip())
-                        data['entreprises'].append(entreprise)
-                        data['annees'].append(annee)
-                        
-                        # Métadonnées pour chaque question
-                        metadata = {
-                            'entreprise': entreprise,
-                            'annee': annee,
-                            'date': date_str,
-                            'fichier_source': os.path.basename(filepath),
-                            'reponse': item.get("Reponse", "").strip(),
-                            'commentaire': item.get("Commentaire", "").strip()
-                        }
-                        data['metadata'].append(metadata)
-                        
-            except Exception as e:
-                logger.error(f"Erreur lors du chargement de {filepath}: {e}")
-        
-        logger.info(f"Chargé {len(data['questions'])} questions depuis {len(json_files)} fichiers")
+        if not data['sources']:
+            return None
+        
+        logger.info(f"Chargé {len(data['questions'])} questions depuis {len(data['sources'])} fichiers")
         return data
     
+    def load_previous_build(self, previous_dir=None):
+        """
+        Charge le build précédent (manifeste, colonnes, embeddings)
+        
+        Args:
+            previous_dir: Répertoire du build précédent (défaut: répertoire de sortie)
+            
+        Returns:
+            tuple: (manifeste, data_info, embeddings en lecture mmap) ou None si inutilisable
+        """
+        previous_dir = previous_dir or self.output_dir
+        manifest_path = os.path.join(previous_dir, BUILD_MANIFEST)
+        metadata_path = os.path.join(previous_dir, "metadata.pkl")
+        embeddings_path = os.path.join(previous_dir, "embeddings.npy")
+        if not all(os.path.exists(p) for p in (manifest_path, metadata_path, embeddings_path)):
+            return None
+        
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('embedding_model') != self.embedding_model_name:
+            logger.info("Modèle différent du build précédent, reconstruction complète")
+            return None
+        
+        with open(metadata_path, 'rb') as f:
+            data_info = pickle.load(f)['data_info']
+        embeddings = np.load(embeddings_path, mmap_mode='r')
+        if embeddings.shape[0] != manifest.get('total_rows') or len(data_info['questions']) != embeddings.shape[0]:
+            logger.warning("Build précédent incohérent, reconstruction complète")
+            return None
+        
+        return manifest, data_info, embeddings
+    
+    def update_dataset(self, directory, batch_size=64, workers=1, previous_dir=None):
+        """
+        Mise à jour incrémentale : ne ré-encode que les fichiers nouveaux ou modifiés
+        
+        Les lignes des fichiers inchangés (même SHA-256) sont reprises du build précédent,
+        celles des fichiers supprimés disparaissent.
+        
+        Args:
+            directory: Répertoire contenant les fichiers JSON
+            batch_size: Taille des batchs pour le calcul
+            workers: Nombre de processus d'analyse des fichiers
+            previous_dir: Répertoire du build précédent (défaut: répertoire de sortie)
+            
+        Returns:
+            tuple: (données, embeddings) ou (None, None) si aucune donnée
+        """
+        previous = self.load_previous_build(previous_dir)
+        if previous is None:
+            logger.info("Aucun build précédent exploitable, calcul complet")
+            data = self.load_dataset(directory, workers)
+            if not data or not data['questions']:
+                return None, None
+            return data, self.calculate_embeddings(data['questions'], batch_size)
+        
+        manifest, previous_data, previous_embeddings = previous
+        
+        data = {key: [] for key in DATA_COLUMNS}
+        data['sources'] = []
+        segments = []  # (début, fin dans les nouvelles données, vecteurs repris ou None)
+        to_encode = []
+        reused = changed = 0
+        
+        for chunk in self.iter_dataset(directory, workers):
+            name = chunk['file']
+            offset = len(data['questions'])
+            
+            if chunk.get('part', 0) > 0:
+                # Bloc suivant d'un tableur : déjà repris en entier, ou à encoder à la suite
+                if segments[-1][2] is None:
+                    count = len(chunk['questions'])
+                    for key in DATA_COLUMNS:
+                        data[key].extend(chunk[key])
+                    segments.append((offset, offset + count, None))
+                    to_encode.extend(chunk['questions'])
+                    data['sources'][-1]['count'] += count
+                continue
+            
+            previous_entry = manifest['files'].get(name)
+            if previous_entry and previous_entry['sha256'] == chunk['sha256']:
+                start, count = previous_entry['offset'], previous_entry['count']
+                for key in DATA_COLUMNS:
+                    data[key].extend(previous_data[key][start:start + count])
+                segments.append((offset, offset + count, previous_embeddings[start:start + count]))
+                reused += 1
+            else:
+                count = len(chunk['questions'])
+                for key in DATA_COLUMNS:
+                    data[key].extend(chunk[key])
+                segments.append((offset, offset + count, None))
+                to_encode.extend(chunk['questions'])
+                changed += 1
+            
+            data['sources'].append({'file': name, 'sha256': chunk['sha256'], 'offset': offset, 'count': count})
+        
+        removed = len(set(manifest['files']) - {source['file'] for source in data['sources']})
+        logger.info(f"Build incrémental: {reused} fichiers repris, {changed} à encoder, {removed} supprimés")
+        
+        if not data['questions']:
+            return None, None
+        
+        dim = previous_embeddings.shape[1]
+        new_embeddings = (
+            self.calculate_embeddings(to_encode, batch_size, save_embeddings=False)
+            if to_encode else np.empty((0, dim), dtype=np.float32)
+        )
+        
+        embeddings = np.empty((len(data['questions']), dim), dtype=np.float32)
+        cursor = 0
+        for start, end, vectors in segments:
+            if vectors is None:
+                vectors = new_embeddings[cursor:cursor + end - start]
+                cursor += end - start
+            embeddings[start:end] = vectors
+        
+        # Libérer le memmap du build précédent avant d'écrire embeddings.npy
+        del segments, previous, previous_embeddings
+        np.save(os.path.join(self.output_dir, "embeddings.npy"), embeddings)
+        return data, embeddings
+    
+    def save_build_manifest(self, sources, total_rows):
+        """
+        Sauvegarde le manifeste du build (empreintes des fichiers et positions des lignes)
+        
+        Args:
+            sources: Fichiers sources (fichier, empreinte, position, nombre de lignes)
+            total_rows: Nombre total de lignes du build
+        """
+        manifest = {
+            'embedding_model': self.embedding_model_name,
+            'timestamp': datetime.now().isoformat(),
+            'total_rows': total_rows,
+            'files': {
+                source['file']: {'sha256': source['sha256'], 'offset': source['offset'], 'count': source['count']}
+                for source in sources
+            }
+        }
+        manifest_path = os.path.join(self.output_dir, BUILD_MANIFEST)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        logger.info(f"Manifeste du build sauvegardé: {manifest_path}")
+    
     def calculate_embeddings(self, questions, batch_size=64, save_embeddings=True):
         """
         Calcule les embeddings pour les questions
@@ -138,16 +667,33 @@ class EmbeddingCalculator:
         
         logger.info(f"Calcul des embeddings pour {len(questions)} questions...")
         
-        # Calcul des embeddings par batch
-        embeddings = self.embedding_model.encode(
-            questions,
-            convert_to_numpy=True,
-            show_progress_bar=True,
-            batch_size=batch_size
-        )
+        # Dédoublonnage : chaque texte normalisé n'est encodé qu'une fois
+        hashes = [text_hash(q) for q in questions]
+        unique = {}
+        for question, key in zip(questions, hashes):
+            unique.setdefault(key, question)
         
-        # Normalisation L2 pour FAISS
-        faiss.normalize_L2(embeddings)
+        vectors = self.cache.get_many(self.embedding_model_name, unique.keys()) if self.cache else {}
+        missing = [key for key in unique if key not in vectors]
+        
+        if missing:
+            # Calcul des embeddings par batch
+            computed = self._encode([unique[key] for key in missing], batch_size)
+            
+            # Normalisation L2 pour FAISS
+            faiss.normalize_L2(computed)
+            vectors.update(zip(missing, computed))
+            if self.cache:
+                self.cache.put_many(self.embedding_model_name, zip(missing, computed))
+        
+        embeddings = np.vstack([vectors[key] for key in hashes]).astype(np.float32)
+        
+        with self._stats_lock:
+            self.cache_stats['texts'] += len(questions)
+            self.cache_stats['unique_texts'] += len(unique)
+            self.cache_stats['cache_hits'] += len(unique) - len(missing)
+            self.cache_stats['encoded'] += len(missing)
+        logger.info(f"{len(unique)} textes uniques, {len(unique) - len(missing)} trouvés en cache, {len(missing)} encodés")
         
         logger.info(f"Embeddings calculés: {embeddings.shape}")
         
@@ -158,50 +704,522 @@ class EmbeddingCalculator:
         
         return embeddings
     
-    def build_faiss_index(self, embeddings, index_type="flat"):
+    def build_faiss_index(self, embeddings, index_type="flat", memory_budget_mb=None,
+                          target_recall=AUTO_TARGET_RECALL):
         """
         Construit l'index FAISS
         
         Args:
             embeddings: Matrice des embeddings
-            index_type: Type d'index FAISS ("flat", "ivf", "hnsw")
+            index_type: Type d'index FAISS ("flat", "ivf", "ivfpq", "hnsw" ou "auto")
+            memory_budget_mb: Budget mémoire de l'index pour le choix automatique (None = illimité)
+            target_recall: Rappel visé lors du réglage des paramètres de recherche
             
         Returns:
-            str: Chemin vers l'index FAISS sauvegardé
+            tuple: (chemin vers l'index FAISS sauvegardé, informations sur l'index)
         """
+        requested = index_type
+        if index_type == "auto":
+            index_type = select_index_type(embeddings.shape[0], embeddings.shape[1], memory_budget_mb)
+            logger.info(f"Type d'index choisi automatiquement: {index_type} "
+                        f"({embeddings.shape[0]} vecteurs, budget: {memory_budget_mb or 'illimité'} Mo)")
+        
         logger.info(f"Construction de l'index FAISS ({index_type})...")
         
-        dim = embeddings.shape[1]
+        index = self.create_index(embeddings, index_type, num_rows=embeddings.shape[0])
+        index.add(embeddings)
         
-        if index_type == "flat":
-            index = faiss.IndexFlatIP(dim)
-        elif index_type == "ivf":
-            nlist = min(4096, max(1, embeddings.shape[0] // 30))
-            quantizer = faiss.IndexFlatIP(dim)
-            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
-            index.train(embeddings)
-        elif index_type == "hnsw":
-            index = faiss.IndexHNSWFlat(dim, 32)
-            index.hnsw.efConstruction = 200
+        index_info = {'type': index_type, 'requested': requested, 'params': index_params(index, index_type)}
+        if index_type != "flat":
+            index_info.update(self.tune_index(index, index_type, embeddings, target_recall))
+        
+        return self.save_index(index, index_type), index_info
+    
+    def build_sharded_index(self, embeddings, data, index_type="ivf", sharding=None,
+                            memory_budget_mb=None, target_recall=AUTO_TARGET_RECALL):
+        """
+        Construit l'index par shards dans des processus parallèles
+        
+        Les lignes sont réparties par entreprise ou par empreinte du texte. En mode "merge"
+        (IVF / IVF-PQ), le quantificateur est entraîné une seule fois sur un échantillon
+        global et partagé par tous les shards, dont les index sont ensuite fusionnés
+        (merge_from) en un index unique. En mode "set", chaque shard est un index autonome
+        que le backend interroge en parallèle en fusionnant les top-k (IndexShards).
+        
+        Args:
+            embeddings: Matrice des embeddings
+            data: Données extraites (clés de partitionnement)
+            index_type: Type d'index FAISS (ou "auto")
+            sharding: dict count, by ("hash" ou "company"), mode ("merge" ou "set"), workers
+            memory_budget_mb: Budget mémoire de l'index pour index_type="auto"
+            target_recall: Rappel visé lors du réglage des paramètres de recherche
+            
+        Returns:
+            tuple: (chemin de l'index ou du répertoire des shards, informations sur l'index)
+        """
+        count = sharding['count']
+        shard_by = sharding.get('by') or "hash"
+        mode = sharding.get('mode') or "merge"
+        workers = max(1, min(count, sharding.get('workers') or os.cpu_count() or 1))
+        
+        requested = index_type
+        if index_type == "auto":
+            index_type = select_index_type(embeddings.shape[0], embeddings.shape[1], memory_budget_mb)
+        if mode == "merge" and index_type not in ("ivf", "ivfpq"):
+            logger.warning(f"Fusion impossible pour un index {index_type} (IVF requis), ensemble de shards utilisé")
+            mode = "set"
+        
+        keys = data['entreprises'] if shard_by == "company" else data['questions']
+        assignments = shard_assignments(keys, count)
+        logger.info(f"Build shardé ({mode}, {index_type}): {count} shards par {shard_by}, {workers} processus")
+        
+        work_dir = tempfile.mkdtemp(prefix="shards_", dir=self.output_dir)
+        try:
+            trained_path = None
+            if mode == "merge":
+                # Quantificateur commun, entraîné une seule fois sur un échantillon global
+                trained_path = os.path.join(work_dir, "trained.idx")
+                faiss.write_index(self.create_index(embeddings, index_type, num_rows=embeddings.shape[0]), trained_path)
+                shard_dir = work_dir
+            else:
+                shard_dir = os.path.join(self.output_dir, f"faiss_shards_{index_type}")
+                os.makedirs(shard_dir, exist_ok=True)
+            
+            tasks = []
+            for shard in range(count):
+                ids = np.flatnonzero(assignments == shard).astype(np.int64)
+                if not len(ids):
+                    continue
+                vectors_path = os.path.join(work_dir, f"vectors_{shard:03d}.npy")
+                ids_path = os.path.join(work_dir, f"ids_{shard:03d}.npy")
+                np.save(vectors_path, np.ascontiguousarray(embeddings[ids], dtype=np.float32))
+                np.save(ids_path, ids)
+                tasks.append({
+                    'vectors_path': vectors_path,
+                    'ids_path': ids_path,
+                    'output_path': os.path.join(shard_dir, f"shard_{shard:03d}.idx"),
+                    'index_type': index_type,
+                    'trained_path': trained_path,
+                    'threads': max(1, (os.cpu_count() or 1) // workers)
+                })
+            
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                shard_results = list(executor.map(build_shard_index, tasks))
+            for result in shard_results:
+                logger.info(f"Shard {os.path.basename(result['path'])}: {result['rows']} vecteurs en {result['seconds']}s")
+            
+            if mode == "merge":
+                index = faiss.read_index(shard_results[0]['path'])
+                for result in shard_results[1:]:
+                    index.merge_from(faiss.read_index(result['path']), 0)
+                params = index_params(index, index_type)
+                nlist = None
+            else:
+                shards = [faiss.read_index(result['path']) for result in shard_results]
+                index = faiss.IndexShards(embeddings.shape[1], True, False)
+                for shard_index in shards:
+                    index.add_shard(shard_index)
+                params = index_params(faiss.downcast_index(shards[0].index), index_type)
+                nlist = max((faiss.extract_index_ivf(shard.index).nlist for shard in shards), default=None) \
+                    if index_type in ("ivf", "ivfpq") else None
+            
+            index_info = {'type': index_type, 'requested': requested, 'params': params}
+            if index_type != "flat":
+                index_info.update(self.tune_index(index, index_type, embeddings, target_recall, nlist=nlist))
+            
+            index_path = self.save_index(index, index_type) if mode == "merge" else shard_dir
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        index_info['shards'] = {
+            'mode': mode,
+            'by': shard_by,
+            'count': len(shard_results),
+            'sizes': [result['rows'] for result in shard_results]
+        }
+        if mode == "set":
+            index_info['shards'].update({
+                'directory': os.path.basename(shard_dir),
+                'files': [os.path.basename(result['path']) for result in shard_results]
+            })
+        return index_path, index_info
+    
+    def create_index(self, train_vectors, index_type="flat", num_rows=None):
+        """Crée un index FAISS vide (voir create_faiss_index)"""
+        return create_faiss_index(train_vectors, index_type, num_rows)
+    
+    def tune_index(self, index, index_type, embeddings, target_recall=AUTO_TARGET_RECALL,
+                   num_queries=200, top_k=10, nlist=None):
+        """
+        Balaye le paramètre de recherche (nprobe ou efSearch) et retient le plus petit
+        qui atteint le rappel visé
+        
+        Les requêtes sont un échantillon des vecteurs du corpus ; chacune est exclue de
+        ses propres résultats. La vérité terrain est une recherche exacte par blocs.
+        
+        Args:
+            index: Index FAISS rempli
+            index_type: Type d'index ("ivf", "ivfpq", "hnsw")
+            embeddings: Embeddings du corpus (tableau ou memmap)
+            target_recall: Rappel visé
+            num_queries: Nombre de requêtes échantillonnées
+            top_k: Profondeur de la comparaison
+            nlist: Nombre de listes IVF (déduit de l'index si None)
+            
+        Returns:
+            dict: 'search_params' retenus et résultats du balayage sous 'sweep'
+        """
+        rng = np.random.default_rng(1)
+        num_rows = embeddings.shape[0]
+        sample = np.sort(rng.choice(num_rows, size=min(num_queries, num_rows), replace=False))
+        queries = np.ascontiguousarray(embeddings[sample], dtype=np.float32)
+        k = min(top_k + 1, num_rows)
+        truth = exact_search(embeddings, queries, k)
+        
+        if index_type == "hnsw":
+            name, values = "efSearch", [16, 32, 64, 128, 256, 512]
         else:
-            raise ValueError(f"Type d'index non supporté: {index_type}")
+            nlist = nlist or faiss.extract_index_ivf(index).nlist
+            name, values = "nprobe", [v for v in (1, 2, 4, 8, 16, 32, 64, 128, 256) if v <= nlist] or [nlist]
         
-        index.add(embeddings)
+        parameters = faiss.ParameterSpace()
+        recall_key = f"recall_at_{top_k}"
+        sweep = []
+        for value in values:
+            parameters.set_index_parameter(index, name, value)
+            ids = np.empty((len(queries), k), dtype=np.int64)
+            start = time.perf_counter()
+            for i in range(len(queries)):
+                _, ids[i] = index.search(queries[i:i + 1], k)
+            latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+            
+            recalls = []
+            for query_id, expected_row, found_row in zip(sample, truth, ids):
+                expected = set(expected_row) - {query_id}
+                if expected:
+                    recalls.append(len(expected & (set(found_row) - {query_id})) / len(expected))
+            sweep.append({
+                name: value,
+                recall_key: round(float(np.mean(recalls)), 4) if recalls else None,
+                'latency_ms': round(latency_ms, 4)
+            })
+            logger.info(f"Balayage {name}={value}: rappel@{top_k}={sweep[-1][recall_key]}, {latency_ms:.3f} ms/requête")
         
-        # Sauvegarder l'index
+        reached = [point for point in sweep if (point[recall_key] or 0) >= target_recall]
+        chosen = reached[0] if reached else max(sweep, key=lambda point: point[recall_key] or 0)
+        parameters.set_index_parameter(index, name, chosen[name])
+        logger.info(f"Paramètre retenu: {name}={chosen[name]} (rappel@{top_k}={chosen[recall_key]})")
+        
+        return {
+            'search_params': {name: chosen[name]},
+            'sweep': {
+                'queries': len(sample),
+                'top_k': top_k,
+                'target_recall': target_recall,
+                'results': sweep
+            }
+        }
+    
+    def save_index(self, index, index_type):
+        """
+        Sauvegarde un index FAISS dans le répertoire de sortie
+        
+        Args:
+            index: Index FAISS rempli
+            index_type: Type d'index (suffixe du fichier)
+            
+        Returns:
+            str: Chemin vers l'index FAISS sauvegardé
+        """
         index_path = os.path.join(self.output_dir, f"faiss_index_{index_type}.idx")
         faiss.write_index(index, index_path)
         
         logger.info(f"Index FAISS sauvegardé: {index_path} ({index.ntotal} vecteurs)")
         return index_path
     
-    def save_metadata(self, data, embeddings_shape):
+    def iter_row_chunks(self, directory, chunk_size, workers=1, sources=None):
+        """
+        Regroupe les lignes des fichiers en blocs d'au plus chunk_size lignes
+        
+        Args:
+            directory: Répertoire contenant les fichiers JSON
+            chunk_size: Nombre maximal de lignes par bloc
+            workers: Nombre de processus d'analyse des fichiers
+            sources: Liste complétée avec (fichier, empreinte, position, nombre de lignes)
+            
+        Yields:
+            dict: Bloc de colonnes (DATA_COLUMNS)
+        """
+        buffer = {key: [] for key in DATA_COLUMNS}
+        total = 0
+        
+        for chunk in self.iter_dataset(directory, workers):
+            count = len(chunk['questions'])
+            if sources is not None:
+                if chunk.get('part', 0) == 0:
+                    sources.append({'file': chunk['file'], 'sha256': chunk['sha256'], 'offset': total, 'count': 0})
+                sources[-1]['count'] += count
+            total += count
+            
+            start = 0
+            while start < count:
+                take = min(chunk_size - len(buffer['questions']), count - start)
+                for key in DATA_COLUMNS:
+                    buffer[key].extend(chunk[key][start:start + take])
+                start += take
+                if len(buffer['questions']) >= chunk_size:
+                    yield buffer
+                    buffer = {key: [] for key in DATA_COLUMNS}
+        
+        if buffer['questions']:
+            yield buffer
+    
+    def stream_build(self, directory, chunk_size, batch_size=64, index_type="flat", workers=1,
+                     target_recall=AUTO_TARGET_RECALL, index_memory_mb=None):
+        """
+        Build en flux : lecture et encodage par blocs de chunk_size lignes, puis indexation
+        
+        Chaque bloc est encodé, ajouté à embeddings.npy et aux colonnes de métadonnées sur
+        disque, puis libéré : la mémoire crête dépend de la taille des blocs et non de celle
+        du corpus (hors index FAISS). L'index est construit ensuite à partir de embeddings.npy
+        (mmap) : la taille du corpus est alors connue ("auto" et nlist en dépendent) et les
+        index IVF sont entraînés sur un échantillon tiré dans tout le corpus.
+        
+        Args:
+            directory: Répertoire contenant les fichiers JSON
+            chunk_size: Nombre de lignes par bloc
+            batch_size: Taille des batchs pour le calcul
+            index_type: Type d'index FAISS
+            workers: Nombre de processus d'analyse des fichiers
+            target_recall: Rappel visé lors du réglage des paramètres de recherche
+            index_memory_mb: Budget mémoire de l'index pour index_type="auto"
+            
+        Returns:
+            dict: Statistiques du build (lignes, dimension, entreprises, années, sources,
+                  chemin et informations de l'index) ou None si aucune donnée
+        """
+        logger.info(f"Build en flux depuis {directory} (blocs de {chunk_size} lignes)")
+        
+        sources = []
+        appender = columns = None
+        entreprises = set()
+        annees = []
+        
+        try:
+            for rows in self.iter_row_chunks(directory, chunk_size, workers, sources):
+                embeddings = self.calculate_embeddings(rows['questions'], batch_size, save_embeddings=False)
+                
+                if appender is None:
+                    appender = NpyAppender(os.path.join(self.output_dir, "embeddings.npy"), embeddings.shape[1])
+                    columns = ColumnWriter(self.output_dir, DATA_COLUMNS)
+                
+                appender.append(embeddings)
+                columns.append(rows)
+                
+                entreprises.update(rows['entreprises'])
+                annees = [a for a in annees + rows['annees'] if a]
+                annees = [min(annees), max(annees)] if annees else []
+                logger.info(f"Bloc encodé: {appender.rows} lignes au total")
+        finally:
+            if appender:
+                appender.close()
+            if columns:
+                columns.close()
+        
+        if appender is None or appender.rows == 0:
+            return None
+        
+        embeddings = np.load(os.path.join(self.output_dir, "embeddings.npy"), mmap_mode='r')
+        num_rows = embeddings.shape[0]
+        
+        requested = index_type
+        if index_type == "auto":
+            index_type = select_index_type(num_rows, appender.dim, index_memory_mb)
+            logger.info(f"Type d'index choisi automatiquement: {index_type} ({num_rows} lignes)")
+        
+        index = self.create_index(embeddings, index_type, num_rows)
+        for start in range(0, num_rows, chunk_size):
+            index.add(np.ascontiguousarray(embeddings[start:start + chunk_size], dtype=np.float32))
+        logger.info(f"Index {index_type} construit: {index.ntotal} lignes")
+        
+        index_info = {'type': index_type, 'requested': requested, 'params': index_params(index, index_type)}
+        if index_type != "flat":
+            index_info.update(self.tune_index(index, index_type, embeddings, target_recall))
+        del embeddings
+        
+        return {
+            'rows': index.ntotal,
+            'dim': appender.dim,
+            'unique_entreprises': len(entreprises),
+            'years': annees,
+            'sources': sources,
+            'index_path': self.save_index(index, index_type),
+            'index_info': index_info
+        }
+    
+    def distill_token_embeddings(self, token_ids, batch_size=1024):
+        """
+        Distille des embeddings statiques de tokens depuis le modèle d'embedding
+        
+        Chaque token est encodé seul (entouré des tokens spéciaux) par le modèle complet.
+        
+        Args:
+            token_ids: Identifiants de tokens à distiller
+            batch_size: Taille des batchs
+            
+        Returns:
+            numpy.ndarray: Matrice (len(token_ids), dim) des embeddings de tokens
+        """
+        tokenizer = self.embedding_model.tokenizer
+        device = self.embedding_model.device
+        table = []
+        
+        for start in tqdm(range(0, len(token_ids), batch_size), desc="Distillation des tokens"):
+            batch = torch.as_tensor(token_ids[start:start + batch_size], dtype=torch.long).unsqueeze(1)
+            input_ids = torch.cat([
+                torch.full_like(batch, tokenizer.cls_token_id),
+                batch,
+                torch.full_like(batch, tokenizer.sep_token_id)
+            ], dim=1).to(device)
+            features = {'input_ids': input_ids, 'attention_mask': torch.ones_like(input_ids)}
+            with torch.no_grad():
+                output = self.embedding_model(features)
+            table.append(output['sentence_embedding'].cpu().numpy())
+        
+        return np.vstack(table).astype(np.float32)
+    
+    def static_encode(self, token_lists, token_ids, table):
+        """
+        Encode des textes tokenisés par moyenne des embeddings statiques de leurs tokens
+        
+        Args:
+            token_lists: Listes d'identifiants de tokens (sans tokens spéciaux)
+            token_ids: Identifiants triés des tokens distillés
+            table: Embeddings statiques alignés sur token_ids
+            
+        Returns:
+            numpy.ndarray: Embeddings normalisés L2
+        """
+        embeddings = np.zeros((len(token_lists), table.shape[1]), dtype=np.float32)
+        for i, ids in enumerate(token_lists):
+            ids = np.asarray(ids, dtype=np.int64)
+            positions = np.searchsorted(token_ids, ids).clip(max=len(token_ids) - 1)
+            positions = positions[token_ids[positions] == ids]
+            if len(positions):
+                embeddings[i] = table[positions].mean(axis=0)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    def build_static_tier(self, questions, batch_size=1024):
+        """
+        Construit le tier statique (encodage rapide pour les recherches de prévisualisation)
+        
+        Génère dans le répertoire de sortie : la table des tokens distillés, le tokenizer
+        et un index FAISS dédié calculé avec l'encodeur statique.
+        
+        Args:
+            questions: Liste des questions
+            batch_size: Taille des batchs de distillation
+            
+        Returns:
+            tuple: (embeddings statiques des questions, listes de tokens) ou None si
+                   aucune question ne produit de token
+        """
+        logger.info("Construction du tier statique...")
+        tokenizer = self.embedding_model.tokenizer
+        token_lists = tokenizer(questions, add_special_tokens=False)['input_ids']
+        non_empty = [np.asarray(ids, dtype=np.int64) for ids in token_lists if ids]
+        if not non_empty:
+            logger.warning("Aucun token dans les questions, tier statique ignoré")
+            return None
+        token_ids = np.unique(np.concatenate(non_empty))
+        
+        table = self.distill_token_embeddings(token_ids, batch_size)
+        np.save(os.path.join(self.output_dir, "static_token_ids.npy"), token_ids)
+        np.save(os.path.join(self.output_dir, "static_token_embeddings.npy"), table)
+        tokenizer.backend_tokenizer.save(os.path.join(self.output_dir, "tokenizer.json"))
+        
+        embeddings = self.static_encode(token_lists, token_ids, table)
+        index = faiss.IndexFlatIP(embeddings.shape[1])
+        index.add(embeddings)
+        index_path = os.path.join(self.output_dir, "faiss_index_static.idx")
+        faiss.write_index(index, index_path)
+        
+        logger.info(f"Tier statique sauvegardé: {len(token_ids)} tokens, {index_path}")
+        return embeddings, token_lists
+    
+    def benchmark_static_tier(self, questions, full_embeddings, static_embeddings, token_lists,
+                              num_queries=200, top_k=10):
+        """
+        Mesure l'écart de rappel et de latence entre le tier statique et le modèle complet
+        
+        Les requêtes sont un échantillon des questions du corpus ; la question elle-même
+        est exclue des résultats. Le rappel est le recouvrement du top-k statique avec
+        le top-k du modèle complet.
+        
+        Args:
+            questions: Liste des questions
+            full_embeddings: Embeddings du modèle complet
+            static_embeddings: Embeddings du tier statique
+            token_lists: Listes de tokens des questions
+            num_queries: Nombre de requêtes échantillonnées
+            top_k: Profondeur de la comparaison
+            
+        Returns:
+            dict: Rappel moyen et latences d'encodage
+        """
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(questions), size=min(num_queries, len(questions)), replace=False)
+        
+        full_index = faiss.IndexFlatIP(full_embeddings.shape[1])
+        full_index.add(full_embeddings)
+        static_index = faiss.IndexFlatIP(static_embeddings.shape[1])
+        static_index.add(static_embeddings)
+        
+        k = min(top_k + 1, len(questions))
+        _, full_ids = full_index.search(full_embeddings[sample], k)
+        _, static_ids = static_index.search(static_embeddings[sample], k)
+        
+        recalls = []
+        for query_id, full_row, static_row in zip(sample, full_ids, static_ids):
+            expected = set(full_row) - {query_id}
+            found = set(static_row) - {query_id}
+            if expected:
+                recalls.append(len(expected & found) / len(expected))
+        
+        # Latence d'encodage requête par requête
+        start = time.perf_counter()
+        for i in sample:
+            self.embedding_model.encode([questions[i]], convert_to_numpy=True)
+        full_ms = (time.perf_counter() - start) * 1000 / len(sample)
+        
+        token_ids = np.load(os.path.join(self.output_dir, "static_token_ids.npy"))
+        table = np.load(os.path.join(self.output_dir, "static_token_embeddings.npy"))
+        tokenizer = self.embedding_model.tokenizer
+        start = time.perf_counter()
+        for i in sample:
+            ids = tokenizer(questions[i], add_special_tokens=False)['input_ids']
+            self.static_encode([ids], token_ids, table)
+        static_ms = (time.perf_counter() - start) * 1000 / len(sample)
+        
+        report = {
+            'queries': len(sample),
+            'top_k': top_k,
+            f'recall_at_{top_k}': float(np.mean(recalls)) if recalls else None,
+            'full_encode_ms': round(full_ms, 3),
+            'static_encode_ms': round(static_ms, 3)
+        }
+        logger.info(f"Benchmark tier statique: {report}")
+        return report
+    
+    def save_metadata(self, data, embeddings_shape, extra_info=None):
         """
         Sauvegarde les métadonnées
         
         Args:
             data: Données extraites
             embeddings_shape: Forme de la matrice d'embeddings
+            extra_info: Sections supplémentaires ajoutées à metadata.json
         """
         metadata = {
             'model_info': {
@@ -228,19 +1246,37 @@ class EmbeddingCalculator:
         with open(metadata_path, 'wb') as f:
             pickle.dump(metadata, f)
         
+        # Les colonnes d'un build en flux précédent ne doivent pas masquer ce build
+        columns_dir = os.path.join(self.output_dir, METADATA_COLUMNS_DIR)
+        if os.path.isdir(columns_dir):
+            shutil.rmtree(columns_dir)
+        
         logger.info(f"Métadonnées sauvegardées: {metadata_path}")
         
-        # Sauvegarder aussi en JSON pour lisibilité
+        self.save_metadata_json(metadata['model_info'], metadata['calculation_info'], {
+            'total_questions': len(data['questions']),
+            'unique_entreprises': len(set(data['entreprises'])),
+            'years_range': f"{min(data['annees']) if data['annees'] else 'N/A'} - {max(data['annees']) if data['annees'] else 'N/A'}",
+            'embedding_dimension': embeddings_shape[1]
+        }, extra_info)
+    
+    def save_metadata_json(self, model_info, calculation_info, statistics, extra_info=None):
+        """
+        Sauvegarde metadata.json (version lisible des métadonnées, sans les colonnes)
+        
+        Args:
+            model_info: Informations sur le modèle
+            calculation_info: Date et répertoire du calcul
+            statistics: Statistiques du corpus
+            extra_info: Sections supplémentaires
+        """
         metadata_json = {
-            'model_info': metadata['model_info'],
-            'calculation_info': metadata['calculation_info'],
-            'statistics': {
-                'total_questions': len(data['questions']),
-                'unique_entreprises': len(set(data['entreprises'])),
-                'years_range': f"{min(data['annees']) if data['annees'] else 'N/A'} - {max(data['annees']) if data['annees'] else 'N/A'}",
-                'embedding_dimension': embeddings_shape[1]
-            }
+            'model_info': model_info,
+            'calculation_info': calculation_info,
+            'statistics': statistics
         }
+        if extra_info:
+            metadata_json.update(extra_info)
         
         metadata_json_path = os.path.join(self.output_dir, "metadata.json")
         with open(metadata_json_path, 'w', encoding='utf-8') as f:
@@ -248,15 +1284,62 @@ class EmbeddingCalculator:
         
         logger.info(f"Métadonnées JSON sauvegardées: {metadata_json_path}")
     
-    def process_language(self, data_dir, language, batch_size=64, index_type="flat"):
+    def save_streaming_metadata(self, stats, extra_info=None):
+        """
+        Sauvegarde les métadonnées d'un build en flux
+        
+        Les colonnes sont déjà écrites dans metadata_columns/ ; seul metadata.json est
+        produit et l'ancien metadata.pkl est supprimé pour ne pas masquer ce build.
+        
+        Args:
+            stats: Statistiques retournées par stream_build
+            extra_info: Sections supplémentaires ajoutées à metadata.json
+        """
+        metadata_path = os.path.join(self.output_dir, "metadata.pkl")
+        if os.path.exists(metadata_path):
+            os.remove(metadata_path)
+        
+        years = stats['years']
+        self.save_metadata_json({
+            'embedding_model': self.embedding_model_name,
+            'crossencoder_model': self.crossencoder_model_name,
+            'embedding_dimension': stats['dim'],
+            'num_questions': stats['rows']
+        }, {
+            'timestamp': datetime.now().isoformat(),
+            'output_directory': self.output_dir
+        }, {
+            'total_questions': stats['rows'],
+            'unique_entreprises': stats['unique_entreprises'],
+            'years_range': f"{years[0]} - {years[1]}" if years else "N/A - N/A",
+            'embedding_dimension': stats['dim']
+        }, {'metadata_format': METADATA_COLUMNS_DIR, **(extra_info or {})})
+    
+    def process_language(self, data_dir, language, batch_size=64, index_type="flat",
+                         static_tier=False, benchmark_static=False, incremental=False, ingest_workers=1,
+                         chunk_size=None, index_memory_mb=None, target_recall=AUTO_TARGET_RECALL,
+                         keep_versions=3, sharding=None):
         """
         Traite une langue complète (calcul + sauvegarde)
         
+        Le build est écrit dans une nouvelle version (<langue>/versions/<version>/),
+        accompagné d'un manifeste, puis publié en remplaçant atomiquement le pointeur
+        CURRENT : le backend ne voit jamais un ensemble de fichiers à moitié écrit.
+        
         Args:
             data_dir: Répertoire des données
             language: Code de langue (fr, en)
             batch_size: Taille des batchs
             index_type: Type d'index FAISS
+            static_tier: Si True, construit aussi le tier statique (quality=fast)
+            benchmark_static: Si True, compare le tier statique au modèle complet
+            incremental: Si True, ne ré-encode que les fichiers modifiés depuis le dernier build
+            ingest_workers: Nombre de processus d'analyse des fichiers JSON
+            chunk_size: Si défini, build en flux par blocs de chunk_size lignes (mémoire bornée)
+            index_memory_mb: Budget mémoire de l'index pour index_type="auto"
+            target_recall: Rappel visé lors du réglage des paramètres de recherche
+            keep_versions: Nombre de versions conservées après publication
+            sharding: Build shardé (count, by, mode, workers), None pour un index unique
         """
         logger.info(f"=== Traitement de la langue: {language} ===")
         
@@ -264,40 +1347,175 @@ class EmbeddingCalculator:
         lang_output_dir = os.path.join(self.output_dir, language)
         os.makedirs(lang_output_dir, exist_ok=True)
         
+        # Build précédent (version publiée, ou ancienne disposition sans versions)
+        previous_dir = current_version_dir(lang_output_dir) or lang_output_dir
+        version_dir = new_version_dir(lang_output_dir)
+        
         # Sauvegarder le répertoire de sortie temporairement
         original_output_dir = self.output_dir
-        self.output_dir = lang_output_dir
+        self.output_dir = version_dir
         
         try:
+            if chunk_size:
+                result = self.process_language_streaming(data_dir, language, chunk_size, batch_size,
+                                                         index_type, ingest_workers,
+                                                         static_tier=static_tier, incremental=incremental,
+                                                         target_recall=target_recall,
+                                                         index_memory_mb=index_memory_mb, sharding=sharding)
+            else:
+                result = self.build_language(data_dir, language, batch_size, index_type,
+                                             static_tier=static_tier, benchmark_static=benchmark_static,
+                                             incremental=incremental, ingest_workers=ingest_workers,
+                                             index_memory_mb=index_memory_mb, target_recall=target_recall,
+                                             previous_dir=previous_dir, sharding=sharding)
+        except Exception:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            raise
+        finally:
+            # Restaurer le répertoire de sortie original
+            self.output_dir = original_output_dir
+        
+        if result is None:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            return None
+        
+        # Publier la version
+        write_bundle_manifest(version_dir, self.embedding_model_name,
+                              int(result['embedding_shape'][1]), int(result['num_questions']))
+        publish_version(lang_output_dir, version_dir)
+        removed = prune_versions(lang_output_dir, keep_versions)
+        logger.info(f"📦 Version {os.path.basename(version_dir)} publiée pour {language}"
+                    + (f" ({len(removed)} ancienne(s) version(s) supprimée(s))" if removed else ""))
+        
+        result['version'] = os.path.basename(version_dir)
+        return result
+    
+    def build_language(self, data_dir, language, batch_size=64, index_type="flat",
+                       static_tier=False, benchmark_static=False, incremental=False, ingest_workers=1,
+                       index_memory_mb=None, target_recall=AUTO_TARGET_RECALL, previous_dir=None,
+                       sharding=None):
+        """
+        Calcule les artefacts d'une langue dans le répertoire de sortie courant
+        
+        Args:
+            data_dir: Répertoire des données
+            language: Code de langue (fr, en)
+            batch_size: Taille des batchs
+            index_type: Type d'index FAISS
+            static_tier: Si True, construit aussi le tier statique (quality=fast)
+            benchmark_static: Si True, compare le tier statique au modèle complet
+            incremental: Si True, ne ré-encode que les fichiers modifiés depuis le dernier build
+            ingest_workers: Nombre de processus d'analyse des fichiers JSON
+            index_memory_mb: Budget mémoire de l'index pour index_type="auto"
+            target_recall: Rappel visé lors du réglage des paramètres de recherche
+            previous_dir: Répertoire du build précédent (builds incrémentaux)
+            sharding: Build shardé (count, by, mode, workers), None pour un index unique
+        
+        Returns:
+            dict: Résultat du traitement ou None si aucune donnée
+        """
+        if incremental:
+            # Reprendre les vecteurs des fichiers inchangés
+            data, embeddings = self.update_dataset(data_dir, batch_size, ingest_workers, previous_dir)
+            if data is None:
+                logger.warning(f"Aucune donnée trouvée pour {language}")
+                return None
+        else:
             # Charger les données
-            data = self.load_dataset(data_dir)
+            data = self.load_dataset(data_dir, ingest_workers)
             if not data or not data['questions']:
                 logger.warning(f"Aucune donnée trouvée pour {language}")
                 return None
             
             # Calculer les embeddings
             embeddings = self.calculate_embeddings(data['questions'], batch_size)
-            
-            # Construire l'index FAISS
-            index_path = self.build_faiss_index(embeddings, index_type)
-            
-            # Sauvegarder les métadonnées
-            self.save_metadata(data, embeddings.shape)
-            
-            logger.info(f"✅ Langue {language} traitée avec succès")
-            return {
-                'language': language,
-                'num_questions': len(data['questions']),
-                'embedding_shape': embeddings.shape,
-                'index_path': index_path,
-                'output_dir': lang_output_dir
-            }
-            
-        finally:
-            # Restaurer le répertoire de sortie original
-            self.output_dir = original_output_dir
+        
+        # Construire l'index FAISS (unique ou par shards)
+        if sharding and sharding.get('count', 1) > 1:
+            index_path, index_info = self.build_sharded_index(embeddings, data, index_type, sharding,
+                                                              index_memory_mb, target_recall)
+        else:
+            index_path, index_info = self.build_faiss_index(embeddings, index_type, index_memory_mb, target_recall)
+        
+        # Tier statique optionnel
+        extra_info = {'index_info': index_info}
+        static = self.build_static_tier(data['questions']) if static_tier else None
+        if static is not None:
+            static_embeddings, token_lists = static
+            extra_info['static_tier'] = {'index': "faiss_index_static.idx"}
+            if benchmark_static:
+                extra_info['static_tier']['benchmark'] = self.benchmark_static_tier(
+                    data['questions'], embeddings, static_embeddings, token_lists
+                )
+        
+        # Sauvegarder les métadonnées
+        self.save_metadata(data, embeddings.shape, extra_info)
+        self.save_build_manifest(data.get('sources', []), len(data['questions']))
+        
+        logger.info(f"✅ Langue {language} traitée avec succès")
+        return {
+            'language': language,
+            'num_questions': len(data['questions']),
+            'embedding_shape': embeddings.shape,
+            'index_path': index_path,
+            'output_dir': self.output_dir,
+            'static_tier': extra_info.get('static_tier'),
+            'index_info': index_info
+        }
+    
+    def process_language_streaming(self, data_dir, language, chunk_size, batch_size=64, index_type="flat",
+                                   ingest_workers=1, static_tier=False, incremental=False,
+                                   target_recall=AUTO_TARGET_RECALL, index_memory_mb=None, sharding=None):
+        """
+        Traite une langue avec le build en flux (répertoire de sortie déjà positionné)
+        
+        Args:
+            data_dir: Répertoire des données
+            language: Code de langue (fr, en)
+            chunk_size: Nombre de lignes par bloc
+            batch_size: Taille des batchs
+            index_type: Type d'index FAISS
+            ingest_workers: Nombre de processus d'analyse des fichiers JSON
+            static_tier: Ignoré (le tier statique nécessite toutes les questions en mémoire)
+            incremental: Ignoré (les vecteurs inchangés sont repris via le cache d'embeddings)
+            target_recall: Rappel visé lors du réglage des paramètres de recherche
+            index_memory_mb: Budget mémoire de l'index pour index_type="auto"
+            sharding: Ignoré (le build shardé nécessite tous les vecteurs en mémoire)
+        """
+        if static_tier:
+            logger.warning("Tier statique non disponible en build en flux, ignoré")
+        if sharding and sharding.get('count', 1) > 1:
+            logger.warning("Build shardé non disponible en build en flux, index unique construit")
+        if incremental:
+            logger.info("Build en flux: les fichiers inchangés sont repris via le cache d'embeddings")
+        
+        stats = self.stream_build(data_dir, chunk_size, batch_size, index_type, ingest_workers, target_recall,
+                                  index_memory_mb)
+        if stats is None:
+            logger.warning(f"Aucune donnée trouvée pour {language}")
+            return None
+        
+        self.save_streaming_metadata(stats, {
+            'streaming': {'chunk_size': chunk_size},
+            'index_info': stats['index_info']
+        })
+        self.save_build_manifest(stats['sources'], stats['rows'])
+        
+        logger.info(f"✅ Langue {language} traitée avec succès (build en flux)")
+        return {
+            'language': language,
+            'num_questions': stats['rows'],
+            'embedding_shape': (stats['rows'], stats['dim']),
+            'index_path': stats['index_path'],
+            'output_dir': self.output_dir,
+            'static_tier': None,
+            'index_info': stats['index_info']
+        }
     
-    def process_all_languages(self, data_base_dir, languages=None, batch_size=64, index_type="flat"):
+    def process_all_languages(self, data_base_dir, languages=None, batch_size=64, index_type="flat",
+                              static_tier=False, benchmark_static=False, incremental=False, ingest_workers=1,
+                              parallel_languages=False, chunk_size=None, index_memory_mb=None,
+                              target_recall=AUTO_TARGET_RECALL, keep_versions=3, sharding=None):
         """
         Traite toutes les langues
         
@@ -306,6 +1524,16 @@ class EmbeddingCalculator:
             languages: Liste des langues à traiter (par défaut: fr, en)
             batch_size: Taille des batchs
             index_type: Type d'index FAISS
+            static_tier: Si True, construit aussi le tier statique (quality=fast)
+            benchmark_static: Si True, compare le tier statique au modèle complet
+            incremental: Si True, ne ré-encode que les fichiers modifiés depuis le dernier build
+            ingest_workers: Nombre de processus d'analyse des fichiers JSON
+            parallel_languages: Si True, les langues sont traitées simultanément
+            chunk_size: Si défini, build en flux par blocs de chunk_size lignes (mémoire bornée)
+            index_memory_mb: Budget mémoire de l'index pour index_type="auto"
+            target_recall: Rappel visé lors du réglage des paramètres de recherche
+            keep_versions: Nombre de versions conservées par langue
+            sharding: Build shardé (count, by, mode, workers), None pour un index unique
             
         Returns:
             dict: Résumé du traitement
@@ -315,14 +1543,27 @@ class EmbeddingCalculator:
         
         results = {}
         
-        for lang in languages:
+        def process(lang):
             lang_dir = os.path.join(data_base_dir, lang)
-            if os.path.exists(lang_dir):
-                result = self.process_language(lang_dir, lang, batch_size, index_type)
-                if result:
-                    results[lang] = result
-            else:
+            if not os.path.exists(lang_dir):
                 logger.warning(f"Répertoire non trouvé: {lang_dir}")
+                return None
+            return self.process_language(lang_dir, lang, batch_size, index_type,
+                                         static_tier=static_tier, benchmark_static=benchmark_static,
+                                         incremental=incremental, ingest_workers=ingest_workers,
+                                         chunk_size=chunk_size, index_memory_mb=index_memory_mb,
+                                         target_recall=target_recall, keep_versions=keep_versions,
+                                         sharding=sharding)
+        
+        if parallel_languages and len(languages) > 1:
+            with ThreadPoolExecutor(max_workers=len(languages)) as executor:
+                outcomes = list(executor.map(process, languages))
+        else:
+            outcomes = [process(lang) for lang in languages]
+        
+        for lang, result in zip(languages, outcomes):
+            if result:
+                results[lang] = result
         
         # Sauvegarder un résumé global
         summary = {
@@ -331,7 +1572,13 @@ class EmbeddingCalculator:
             'crossencoder_model': self.crossencoder_model_name,
             'languages_processed': list(results.keys()),
             'results': results,
-            'total_questions': sum(r['num_questions'] for r in results.values())
+            'total_questions': sum(r['num_questions'] for r in results.values()),
+            'embedding_cache': {
+                **self.cache_stats,
+                'hit_rate': self.cache_stats['cache_hits'] / self.cache_stats['unique_texts']
+                    if self.cache_stats['unique_texts'] else 0.0
+            },
+            'encoding_throughput': self.throughput
         }
         
         summary_path = os.path.join(self.output_dir, "calculation_summary.json")
@@ -349,7 +1596,7 @@ def main():
         description="Calculateur d'embeddings pour le moteur de recherche sémantique"
     )
     parser.add_argument("--data_dir", type=str, default="backend/data", 
-                       help="Répertoire contenant les sous-dossiers 'fr' et 'en'")
+                       help="Répertoire contenant les sous-dossiers 'fr' et 'en' (questionnaires JSON, CSV ou XLSX)")
     parser.add_argument("--output_dir", type=str, default="embeddings", 
                        help="Répertoire de sortie pour les fichiers générés")
     parser.add_argument("--embedding_model", type=str, 
@@ -360,10 +1607,44 @@ def main():
     parser.add_argument("--batch_size", type=int, default=64, 
                        help="Taille des batchs pour la vectorisation")
     parser.add_argument("--index_type", type=str, default="flat", 
-                       choices=["flat", "ivf", "hnsw"], 
-                       help="Type d'index FAISS")
+                       choices=["flat", "ivf", "ivfpq", "hnsw", "auto"], 
+                       help="Type d'index FAISS ('auto' : choix selon la taille du corpus et --index_memory_mb)")
+    parser.add_argument("--index_memory_mb", type=float, default=None,
+                       help="Budget mémoire de l'index pour --index_type auto (Mo)")
+    parser.add_argument("--target_recall", type=float, default=AUTO_TARGET_RECALL,
+                       help="Rappel visé lors du réglage de nprobe / efSearch")
     parser.add_argument("--languages", nargs="+", default=["fr", "en"], 
                        help="Langues à traiter")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Nombre de processus d'encodage (une réplique du modèle par processus)")
+    parser.add_argument("--parallel_languages", action="store_true",
+                       help="Traiter les langues simultanément")
+    parser.add_argument("--ingest_workers", type=int, default=1,
+                       help="Nombre de processus pour l'analyse parallèle des fichiers JSON")
+    parser.add_argument("--stream_chunk_size", type=int, default=None,
+                       help="Build en flux par blocs de N lignes (mémoire bornée par la taille des blocs)")
+    parser.add_argument("--shards", type=int, default=1,
+                       help="Nombre de shards du build parallèle de l'index (1 = index unique)")
+    parser.add_argument("--shard_by", type=str, default="hash", choices=SHARD_KEYS,
+                       help="Répartition des lignes entre shards : empreinte du texte ou entreprise")
+    parser.add_argument("--shard_mode", type=str, default="merge", choices=SHARD_MODES,
+                       help="'merge' : fusion en un index IVF aux centroïdes partagés, 'set' : ensemble de shards interrogé par le backend")
+    parser.add_argument("--shard_workers", type=int, default=None,
+                       help="Nombre de processus de construction des shards (défaut: un par cœur)")
+    parser.add_argument("--keep_versions", type=int, default=3,
+                       help="Nombre de versions publiées conservées par langue")
+    parser.add_argument("--column_mapping", type=str, default=None,
+                       help="Fichier JSON de correspondance des colonnes des tableurs CSV / XLSX")
+    parser.add_argument("--cache_path", type=str, default=None,
+                       help="Cache SQLite des embeddings (défaut: <output_dir>/embedding_cache.sqlite)")
+    parser.add_argument("--no_cache", action="store_true",
+                       help="Désactiver le cache persistant des embeddings")
+    parser.add_argument("--incremental", action="store_true",
+                       help="Ne ré-encoder que les fichiers nouveaux ou modifiés depuis le dernier build")
+    parser.add_argument("--static_tier", action="store_true",
+                       help="Construire le tier statique (encodage rapide, quality=fast)")
+    parser.add_argument("--benchmark_static", action="store_true",
+                       help="Mesurer l'écart de rappel du tier statique par rapport au modèle complet")
     
     args = parser.parse_args()
     
@@ -377,16 +1658,39 @@ def main():
         calculator = EmbeddingCalculator(
             embedding_model_name=args.embedding_model,
             crossencoder_model_name=args.crossencoder_model,
-            output_dir=args.output_dir
+            output_dir=args.output_dir,
+            cache_path=None if args.no_cache else (
+                args.cache_path or os.path.join(args.output_dir, "embedding_cache.sqlite")
+            ),
+            workers=args.workers,
+            spreadsheet_config=load_spreadsheet_config(args.column_mapping)
         )
         
-        # Traiter toutes les langues
-        summary = calculator.process_all_languages(
-            args.data_dir,
-            languages=args.languages,
-            batch_size=args.batch_size,
-            index_type=args.index_type
-        )
+        # Traiter toutes les langues (processus d'encodage arrêtés même si le build échoue)
+        try:
+            summary = calculator.process_all_languages(
+                args.data_dir,
+                languages=args.languages,
+                batch_size=args.batch_size,
+                index_type=args.index_type,
+                static_tier=args.static_tier or args.benchmark_static,
+                benchmark_static=args.benchmark_static,
+                incremental=args.incremental,
+                ingest_workers=args.ingest_workers,
+                parallel_languages=args.parallel_languages,
+                chunk_size=args.stream_chunk_size,
+                index_memory_mb=args.index_memory_mb,
+                target_recall=args.target_recall,
+                keep_versions=args.keep_versions,
+                sharding={
+                    'count': args.shards,
+                    'by': args.shard_by,
+                    'mode': args.shard_mode,
+                    'workers': args.shard_workers
+                } if args.shards > 1 else None
+            )
+        finally:
+            calculator.close()
         
         print("\n" + "="*60)
         print("🎉 CALCUL DES EMBEDDINGS TERMINÉ")
@@ -395,6 +1699,24 @@ def main():
         print(f"🔤 Langues traitées: {', '.join(summary['languages_processed'])}")
         print(f"📊 Total questions: {summary['total_questions']}")
         print(f"🤖 Modèle utilisé: {args.embedding_model}")
+        for entry in summary['encoding_throughput']:
+            print(f"⏱️  Encodage: {entry['texts_per_second']:.1f} textes/s "
+                  f"({entry['texts']} textes, {entry['workers']} worker(s))")
+        cache_stats = summary['embedding_cache']
+        print(f"🗃️  Cache d'embeddings: {cache_stats['hit_rate']:.1%} de succès "
+              f"({cache_stats['cache_hits']}/{cache_stats['unique_texts']} textes uniques, "
+              f"{cache_stats['texts'] - cache_stats['unique_texts']} doublons)")
+        for lang, result in summary['results'].items():
+            print(f"📦 Version publiée {lang}: {result['version']}")
+            index_info = result.get('index_info') or {}
+            if index_info:
+                print(f"🗂️  Index {lang}: {index_info['type']} {index_info['params']} "
+                      f"{index_info.get('search_params', {})}")
+            benchmark = (result.get('static_tier') or {}).get('benchmark')
+            if benchmark:
+                recall_key = f"recall_at_{benchmark['top_k']}"
+                print(f"⚡ Tier statique {lang}: rappel@{benchmark['top_k']} = {benchmark[recall_key]:.3f}, "
+                      f"encodage {benchmark['static_encode_ms']:.3f} ms vs {benchmark['full_encode_ms']:.3f} ms")
         print(f"📋 Résumé détaillé: {os.path.join(args.output_dir, 'calculation_summary.json')}")
         print("="*60)
         
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Lecture des questionnaires au format tableur (CSV, XLSX)
+Les lignes sont lues une à une (mémoire constante) et regroupées en blocs de colonnes
+identiques à ceux produits pour les fichiers JSON
+"""
+
+import os
+import csv
+import json
+import hashlib
+from datetime import date, datetime
+
+# Colonnes extraites pour chaque question
+DATA_COLUMNS = ['questions', 'reponses', 'commentaires', 'entreprises', 'annees', 'metadata']
+
+SPREADSHEET_EXTENSIONS = (".csv", ".xlsx")
+
+# Correspondance champ -> en-têtes acceptés (comparaison insensible à la casse)
+DEFAULT_SPREADSHEET_CONFIG = {
+    'columns': {
+        'question': ["Question"],
+        'reponse': ["Reponse", "Réponse"],
+        'commentaire': ["Commentaire"],
+        'entreprise': ["Entreprise"],
+        'date': ["date"]
+    },
+    # Valeurs utilisées si la colonne est absente ou vide (entreprise: nom du fichier par défaut)
+    'defaults': {},
+    'delimiter': None,
+    'encoding': "utf-8-sig",
+    'sheet': None,
+    'chunk_rows': 5000
+}
+
+def new_chunk(filepath, sha256=None, part=0):
+    """
+    Crée un bloc de colonnes vide pour un fichier source
+
+    Args:
+        filepath: Chemin du fichier source
+        sha256: Empreinte du contenu du fichier
+        part: Numéro du bloc dans le fichier (les gros tableurs en produisent plusieurs)
+
+    Returns:
+        dict: Bloc (DATA_COLUMNS, file, path, sha256, part, error)
+    """
+    chunk = {key: [] for key in DATA_COLUMNS}
+    chunk.update({'file': os.path.basename(filepath), 'path': filepath, 'sha256': sha256, 'part': part, 'error': None})
+    return chunk
+
+def append_row(chunk, entreprise, date_str, question, reponse, commentaire):
+    """
+    Ajoute une question à un bloc (ignorée si la question est vide)
+
+    Args:
+        chunk: Bloc de colonnes
+        entreprise: Nom de l'entreprise
+        date_str: Date du questionnaire (AAAA-MM-JJ)
+        question: Texte de la question
+        reponse: Réponse
+        commentaire: Commentaire
+    """
+    if not question:
+        return
+    annee = date_str.split("-")[0] if date_str and "-" in date_str else ""
+
+    chunk['questions'].append(question)
+    chunk['reponses'].append(reponse)
+    chunk['commentaires'].append(commentaire)
+    chunk['entreprises'].append(entreprise)
+    chunk['annees'].append(annee)
+
+    # Métadonnées pour chaque question
+    chunk['metadata'].append({
+        'entreprise': entreprise,
+        'annee': annee,
+        'date': date_str,
+        'fichier_source': chunk['file'],
+        'reponse': reponse,
+        'commentaire': commentaire
+    })
+
+def load_spreadsheet_config(path=None):
+    """
+    Charge la configuration de correspondance des colonnes
+
+    Args:
+        path: Fichier JSON surchargeant DEFAULT_SPREADSHEET_CONFIG (None pour les valeurs par défaut)
+
+    Returns:
+        dict: Configuration complète
+    """
+    config = json.loads(json.dumps(DEFAULT_SPREADSHEET_CONFIG))
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+        for key, value in overrides.get('columns', {}).items():
+            config['columns'][key] = [value] if isinstance(value, str) else list(value)
+        config['defaults'].update(overrides.get('defaults', {}))
+        for key in ('delimiter', 'encoding', 'sheet', 'chunk_rows'):
+            if key in overrides:
+                config[key] = overrides[key]
+    return config
+
+def _file_sha256(path, block_size=1 << 20):
+    """Empreinte SHA-256 d'un fichier, lue par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cell_text(value):
+    """Convertit une cellule en texte (dates au format ISO)"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def _resolve_columns(header, columns):
+    """Position de chaque champ dans l'en-tête (None si absent)"""
+    positions = {name.strip().lower(): i for i, name in enumerate(_cell_text(cell) for cell in header)}
+    return {
+        field: next((positions[name.lower()] for name in names if name.lower() in positions), None)
+        for field, names in columns.items()
+    }
+
+def _iter_csv_rows(path, config):
+    """Lignes d'un fichier CSV (listes de cellules), en-tête compris"""
+    with open(path, 'r', encoding=config['encoding'], newline='') as f:
+        delimiter = config['delimiter']
+        if not delimiter:
+            sample = f.read(64 * 1024)
+            f.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+            except csv.Error:
+                delimiter = ","
+        for row in csv.reader(f, delimiter=delimiter):
+            yield row
+
+def _iter_xlsx_rows(path, config):
+    """Lignes d'une feuille XLSX (lecture en flux, read_only), en-tête compris"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("openpyxl est requis pour lire les fichiers XLSX (pip install openpyxl)")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[config['sheet']] if config['sheet'] else workbook.worksheets[0]
+        for row in sheet.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+def iter_spreadsheet_chunks(filepath, config=None):
+    """
+    Lit un questionnaire CSV ou XLSX ligne par ligne et produit des blocs de colonnes
+
+    La première ligne est l'en-tête ; les colonnes sont associées aux champs par
+    config['columns']. Au plus config['chunk_rows'] questions sont en mémoire à la fois.
+    En cas d'erreur, un bloc portant 'error' est produit et la lecture s'arrête.
+
+    Args:
+        filepath: Chemin du fichier
+        config: Configuration (voir load_spreadsheet_config)
+
+    Yields:
+        dict: Bloc de colonnes (voir new_chunk)
+    """
+    config = config or load_spreadsheet_config()
+    part = 0
+    try:
+        sha256 = _file_sha256(filepath)
+        reader = _iter_xlsx_rows if filepath.lower().endswith(".xlsx") else _iter_csv_rows
+        rows = reader(filepath, config)
+
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = _resolve_columns(header, config['columns'])
+        if positions.get('question') is None:
+            chunk = new_chunk(filepath, sha256)
+            chunk['error'] = f"colonne question introuvable (en-têtes: {[_cell_text(cell) for cell in header]})"
+            yield chunk
+            return
+
+        defaults = config['defaults']
+        default_entreprise = defaults.get('entreprise', os.path.splitext(os.path.basename(filepath))[0])
+        default_date = defaults.get('date', "")
+
+        def field(row, name, default=""):
+            position = positions.get(name)
+            value = _cell_text(row[position]) if position is not None and position < len(row) else ""
+            return value or default
+
+        chunk = new_chunk(filepath, sha256, part)
+        for row in rows:
+            append_row(
+                chunk,
+                field(row, 'entreprise', default_entreprise),
+                field(row, 'date', default_date),
+                field(row, 'question'),
+                field(row, 'reponse'),
+                field(row, 'commentaire')
+            )
+            if len(chunk['questions']) >= config['chunk_rows']:
+                yield chunk
+                part += 1
+                chunk = new_chunk(filepath, sha256, part)
+
+        if chunk['questions'] or part == 0:
+            yield chunk
+    except Exception as e:
+        chunk = new_chunk(filepath, part=part)
+        chunk['error'] = str(e)
+        yield chunk
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Écriture incrémentale des artefacts pour le build en flux
+Les vecteurs et les colonnes de métadonnées sont écrits bloc par bloc sur disque
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+
+# Répertoire des colonnes de métadonnées (un fichier JSONL par colonne)
+METADATA_COLUMNS_DIR = "metadata_columns"
+
+class NpyAppender:
+    """Écrit un fichier .npy (float32, 2 dimensions) par ajouts successifs de lignes"""
+
+    # Taille fixe de l'en-tête (multiple de 64), réécrit avec la forme finale à la fermeture
+    HEADER_SIZE = 128
+
+    def __init__(self, path, dim):
+        """
+        Ouvre le fichier et réserve l'en-tête
+
+        Args:
+            path: Chemin du fichier .npy
+            dim: Dimension des vecteurs
+        """
+        self.path = path
+        self.dim = dim
+        self.rows = 0
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        """Écrit l'en-tête .npy (format 1.0) complété par des espaces jusqu'à HEADER_SIZE"""
+        header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d, %d), }" % (self.rows, self.dim)
+        header = header.ljust(self.HEADER_SIZE - 10 - 1) + "\n"
+        self._file.write(b"\x93NUMPY\x01\x00")
+        self._file.write(len(header).to_bytes(2, "little"))
+        self._file.write(header.encode("latin1"))
+
+    def append(self, vectors):
+        """
+        Ajoute des lignes à la fin du fichier
+
+        Args:
+            vectors: Matrice (n, dim)
+        """
+        vectors = np.ascontiguousarray(vectors, dtype='<f4')
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Forme incompatible: {vectors.shape} (dimension attendue: {self.dim})")
+        self._file.write(vectors.tobytes())
+        self.rows += vectors.shape[0]
+
+    def close(self):
+        """Réécrit l'en-tête avec le nombre final de lignes et ferme le fichier"""
+        if self._file.closed:
+            return
+        self._file.flush()
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+
+class ColumnWriter:
+    """Écrit les colonnes de métadonnées en JSONL (une valeur par ligne), bloc par bloc"""
+
+    def __init__(self, output_dir, columns):
+        """
+        Crée le répertoire des colonnes et ouvre un fichier par colonne
+
+        Args:
+            output_dir: Répertoire de sortie de la langue
+            columns: Noms des colonnes
+        """
+        self.directory = os.path.join(output_dir, METADATA_COLUMNS_DIR)
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory)
+        self._files = {
+            column: open(os.path.join(self.directory, f"{column}.jsonl"), 'w', encoding='utf-8')
+            for column in columns
+        }
+
+    def append(self, chunk):
+        """
+        Ajoute un bloc de lignes
+
+        Args:
+            chunk: Dictionnaire colonne -> liste de valeurs
+        """
+        for column, f in self._files.items():
+            for value in chunk[column]:
+                f.write(json.dumps(value, ensure_ascii=False))
+                f.write("\n")
+
+    def close(self):
+        """Ferme les fichiers des colonnes"""
+        for f in self._files.values():
+            f.close()